@@ -0,0 +1,126 @@
+# audio_output.py
+"""
+오디오 출력 전용 스레드
+- sounddevice OutputStream 을 한 번 열어두고 계속 재사용 (aplay 프로세스/임시 wav 없음)
+- 모든 발화는 큐에 쌓여서 출력 스레드 하나가 순서대로 재생
+- interrupt(): 재생 중인 문장도 즉시 끊고 대기 큐 비우기 (barge-in)
+"""
+
+import queue
+import threading
+
+import numpy as np
+import sounddevice as sd
+
+BLOCK_MS = 50   # 이 단위로 끊어서 써야 barge-in 이 빨리 반응함
+
+
+class AudioPlayer:
+    def __init__(self, block_ms=BLOCK_MS):
+        self.block_ms = block_ms
+        self._q = queue.Queue()
+        self._lock = threading.Lock()
+        self._epoch = 0          # interrupt 할 때마다 증가 → 이전 발화는 버림
+        self._pending = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stream = None
+        self._rate = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # ==============================
+    # 외부 API
+    # ==============================
+    def play(self, pcm: np.ndarray, sample_rate: int, interrupt: bool = False):
+        """int16 PCM 버퍼를 재생 큐에 추가 (바로 리턴)"""
+        if interrupt:
+            self.interrupt()
+        with self._lock:
+            self._pending += 1
+            self._idle.clear()
+            epoch = self._epoch
+        self._q.put((epoch, pcm, sample_rate))
+
+    def interrupt(self):
+        """현재 재생 중단 + 대기 중인 발화 모두 버리기"""
+        with self._lock:
+            self._epoch += 1
+        while True:
+            try:
+                self._q.get_nowait()
+            except queue.Empty:
+                break
+            self._done()
+
+    def wait(self, timeout=None) -> bool:
+        """큐에 있는 발화가 모두 끝날 때까지 대기"""
+        return self._idle.wait(timeout)
+
+    @property
+    def busy(self) -> bool:
+        return not self._idle.is_set()
+
+    def close(self):
+        self.interrupt()
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+    # ==============================
+    # 출력 스레드
+    # ==============================
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending <= 0:
+                self._pending = 0
+                self._idle.set()
+
+    def _open(self, sample_rate):
+        if self._stream is not None and self._rate == sample_rate:
+            return self._stream
+        if self._stream is not None:
+            self._stream.close()
+        self._stream = sd.OutputStream(
+            samplerate=sample_rate, channels=1, dtype="int16", latency="low"
+        )
+        self._stream.start()
+        self._rate = sample_rate
+        return self._stream
+
+    def _run(self):
+        while True:
+            epoch, pcm, sample_rate = self._q.get()
+            try:
+                if epoch == self._epoch:
+                    self._write(epoch, pcm, sample_rate)
+            except Exception as e:
+                print(f"🔇 오디오 출력 오류: {e}")
+                self._stream = None
+            finally:
+                self._done()
+
+    def _write(self, epoch, pcm, sample_rate):
+        stream = self._open(sample_rate)
+        block = max(1, int(sample_rate * self.block_ms / 1000))
+        for i in range(0, len(pcm), block):
+            if epoch != self._epoch:
+                # barge-in: 장치 버퍼에 남은 소리까지 버리고 다시 시작
+                stream.abort()
+                stream.start()
+                return
+            stream.write(pcm[i:i + block])
+
+
+_player = None
+_player_lock = threading.Lock()
+
+
+def get_player() -> AudioPlayer:
+    """프로세스 전체에서 공유하는 오디오 출력 스레드"""
+    global _player
+    with _player_lock:
+        if _player is None:
+            _player = AudioPlayer()
+        return _player
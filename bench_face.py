@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+얼굴 감지 백엔드 벤치마크 - 녹화해 둔 프레임을 백엔드마다 똑같이 재생
+- 백엔드 × 입력 축소(scale) 조합별 FPS, 프레임당 지연 p50/p95, recall
+- recall: 폴더에 labels.json ({"파일명": [[x, y, w, h], ...]}) 이 있으면 박스 기준 (IoU ≥ 0.5),
+  없으면 "모든 프레임에 얼굴이 있다" 고 보고 얼굴을 하나라도 찾은 프레임 비율
+- *-track: face_tracker (ROI 추적) 를 붙였을 때
+- 스레드 수는 FACE_THREADS 환경변수 (보드 코어 수에 맞춰 비교)
+
+사용법:
+  python bench_face.py record <폴더> [장수]      # 카메라에서 프레임 녹화 (얼굴을 비추면서)
+  python bench_face.py <폴더> [변형 ...]          # 벤치마크
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from face_detector import create_detector, FACE_THREADS
+from face_tracker import FaceTracker, iou_matrix
+
+MATCH_IOU = 0.5
+
+VARIANTS = {
+    "haar": lambda: create_detector("haar"),
+    "haar-0.5": lambda: create_detector("haar", scale=0.5),
+    "haar-track": lambda: FaceTracker(create_detector("haar")),
+    "lbp": lambda: create_detector("lbp"),
+    "lbp-0.5": lambda: create_detector("lbp", scale=0.5),
+    "ssd": lambda: create_detector("ssd"),
+    "yunet": lambda: create_detector("yunet"),
+    "yunet-0.5": lambda: create_detector("yunet", scale=0.5),
+}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def record(folder, count=200):
+    from camera_service import get_camera
+
+    os.makedirs(folder, exist_ok=True)
+    view = get_camera().subscribe()
+    print(f"📷 {count}장 녹화 → {folder}")
+    saved = 0
+    while saved < count:
+        frame = view.next(timeout=1.0)
+        if frame is None:
+            continue
+        cv2.imwrite(os.path.join(folder, f"frame_{saved:05d}.jpg"), frame)
+        saved += 1
+        time.sleep(0.1)
+    get_camera().stop()
+
+
+def load_frames(folder):
+    paths = sorted(glob.glob(os.path.join(folder, "*.jpg")) + glob.glob(os.path.join(folder, "*.png")))
+    frames = []
+    for path in paths:
+        frame = cv2.imread(path)
+        if frame is not None:
+            frames.append((os.path.basename(path), frame, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)))
+    labels = None
+    labels_path = os.path.join(folder, "labels.json")
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            labels = json.load(f)
+    return frames, labels
+
+
+def run(name, frames, labels):
+    try:
+        detector = VARIANTS[name]()
+    except Exception as e:
+        print(f"  {name:<11} 로딩 실패: {e}")
+        return
+
+    if isinstance(detector, FaceTracker):
+        detect = lambda frame, gray: detector.update(gray)
+    elif detector.color:
+        detect = lambda frame, gray: detector(frame)
+    else:
+        detect = lambda frame, gray: detector(gray)
+
+    times, hits, total, found_faces = [], 0, 0, 0
+    t_start = time.perf_counter()
+    for fname, frame, gray in frames:
+        t0 = time.perf_counter()
+        boxes = detect(frame, gray)
+        times.append((time.perf_counter() - t0) * 1000)
+        found_faces += len(boxes)
+
+        if labels is not None:
+            truth = labels.get(fname, [])
+            total += len(truth)
+            if truth and len(boxes):
+                hits += int(np.sum(iou_matrix(truth, boxes).max(axis=1) >= MATCH_IOU))
+        else:
+            total += 1
+            hits += len(boxes) > 0
+    elapsed = time.perf_counter() - t_start
+
+    recall = hits / total if total else 0.0
+    print(f"  {name:<11} {len(frames) / elapsed:6.1f} FPS  p50 {percentile(times, 50):6.1f}ms  "
+          f"p95 {percentile(times, 95):6.1f}ms  recall {recall * 100:5.1f}%  "
+          f"얼굴/프레임 {found_faces / len(frames):.2f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "record":
+        record(sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 200)
+        return
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    frames, labels = load_frames(sys.argv[1])
+    if not frames:
+        print(f"❌ 프레임 없음: {sys.argv[1]}")
+        return
+    names = sys.argv[2:] or list(VARIANTS)
+    h, w = frames[0][1].shape[:2]
+    print(f"🧪 얼굴 감지 벤치마크: {len(frames)}프레임 ({w}x{h}), "
+          f"recall 기준 {'labels.json' if labels is not None else '얼굴 찾은 프레임 비율'}, "
+          f"스레드 {FACE_THREADS or cv2.getNumThreads()}")
+    for name in names:
+        run(name, frames, labels)
+
+
+if __name__ == "__main__":
+    main()
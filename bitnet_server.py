@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+BitNet 상주(persistent) 추론 서버
+- llama-server 를 한 번만 띄워 GGUF 모델을 메모리에 계속 올려둠
+- 127.0.0.1 로컬 소켓(HTTP)으로 프롬프트 전달
+- 프로세스가 죽으면 워치독이 자동 재시작
+- 요청이 밀려 있으면 BitNetBusy 로 즉시 거절 (back-pressure)
+"""
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+
+BITNET_MODEL_PATH = "/home/sptcnl/models/BitNet-b1.58-2B/ggml-model-i2_s.gguf"
+BITNET_SERVER_BINARY = "/home/sptcnl/BitNet/build/bin/llama-server"
+BITNET_HOST = "127.0.0.1"
+BITNET_PORT = 8081
+BITNET_THREADS = 4
+BITNET_CTX = 2048
+
+STARTUP_TIMEOUT = 60.0   # 모델 로딩 대기 (Pi에서 ~800MB 로딩)
+MAX_PENDING = 1          # 동시에 처리할 요청 수 (초과시 BitNetBusy)
+RESTART_BACKOFF = (1, 2, 5, 10)
+
+
+class BitNetBusy(Exception):
+    """워커가 이미 다른 요청을 처리 중"""
+
+
+class BitNetUnavailable(Exception):
+    """서버 프로세스를 띄울 수 없음"""
+
+
+# 연결 실패 / 연결 끊김 / 응답 도중 읽기 시간 초과 (socket.timeout) / 응답이 중간에 잘림
+_REQUEST_ERRORS = (urllib.error.URLError, TimeoutError, socket.timeout, OSError,
+                   http.client.HTTPException)
+
+
+class BitNetServer:
+    def __init__(self, model_path=BITNET_MODEL_PATH, binary=BITNET_SERVER_BINARY,
+                 host=BITNET_HOST, port=BITNET_PORT, threads=BITNET_THREADS,
+                 ctx_size=BITNET_CTX, max_pending=MAX_PENDING):
+        self.model_path = model_path
+        self.binary = binary
+        self.host = host
+        self.port = port
+        self.threads = threads
+        self.ctx_size = ctx_size
+        self.base_url = f"http://{host}:{port}"
+
+        self.proc = None
+        self.running = False
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._ready = threading.Event()
+        self._watchdog = None
+
+    @staticmethod
+    def available(model_path=BITNET_MODEL_PATH, binary=BITNET_SERVER_BINARY):
+        return (
+            os.path.exists(model_path) and
+            os.path.exists(binary) and
+            os.access(binary, os.X_OK)
+        )
+
+    # ==============================
+    # 프로세스 관리
+    # ==============================
+    def start(self, wait=True):
+        """서버 프로세스 시작 + 워치독 시작"""
+        if not self.available(self.model_path, self.binary):
+            raise BitNetUnavailable(f"BitNet 서버 바이너리/모델 없음: {self.binary}")
+
+        self.running = True
+        self._spawn()
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = threading.Thread(target=self._watchdog_loop, daemon=True)
+            self._watchdog.start()
+        if wait:
+            return self.wait_ready(STARTUP_TIMEOUT)
+        return True
+
+    def _spawn(self):
+        with self._lock:
+            if self.proc and self.proc.poll() is None:
+                return
+            self._ready.clear()
+            cmd = [
+                self.binary, '-m', self.model_path,
+                '--host', self.host, '--port', str(self.port),
+                '-t', str(self.threads), '-c', str(self.ctx_size),
+                '-np', '1',
+            ]
+            print(f"🚀 BitNet 서버 시작: {self.base_url}")
+            self.proc = subprocess.Popen(
+                cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+
+    def _check_health(self):
+        """/health 한 번 확인 → 200 이면 ready 설정 (모델 로딩 완료)"""
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/health", timeout=1) as res:
+                if res.status != 200:
+                    return False
+        except (urllib.error.URLError, OSError):
+            return False
+        if not self._ready.is_set():
+            self._ready.set()
+            self.restarts = 0
+            print("✅ BitNet 서버 준비 완료! (모델 상주)")
+        return True
+
+    def wait_ready(self, timeout=STARTUP_TIMEOUT):
+        """ready 가 될 때까지 대기 (시간 초과돼도 워치독이 계속 /health 확인)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._ready.is_set():
+                return True
+            if self.proc is None or self.proc.poll() is not None:
+                return False
+            if self._check_health():
+                return True
+            time.sleep(0.2)
+        return False
+
+    def _watchdog_loop(self):
+        """크래시 감지 → 백오프 후 재시작, 살아 있는데 ready 아니면 /health 계속 확인"""
+        while self.running:
+            proc = self.proc
+            if proc is not None and proc.poll() is not None:
+                self._ready.clear()
+                delay = RESTART_BACKOFF[min(self.restarts, len(RESTART_BACKOFF) - 1)]
+                print(f"⚠️ BitNet 서버 종료됨 (code={proc.returncode}), {delay}초 후 재시작")
+                time.sleep(delay)
+                if not self.running:
+                    break
+                self.restarts += 1
+                self._spawn()
+            elif proc is not None and not self._ready.is_set():
+                # start(wait=False) 이거나 wait_ready 가 시간 초과된 뒤에도 준비되면 바로 ready
+                self._check_health()
+                time.sleep(0.5)
+                continue
+            time.sleep(1.0)
+
+    def stop(self):
+        self.running = False
+        self._ready.clear()
+        with self._lock:
+            if self.proc and self.proc.poll() is None:
+                self.proc.terminate()
+                try:
+                    self.proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.proc.kill()
+            self.proc = None
+        print("🛑 BitNet 서버 정지")
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    # ==============================
+    # 추론 요청
+    # ==============================
+    def _request(self, prompt, max_tokens, temperature, stream):
+        body = {
+            "prompt": prompt,
+            "n_predict": max_tokens,
+            "temperature": temperature,
+            "cache_prompt": True,
+            "stream": stream,
+        }
+        return urllib.request.Request(
+            f"{self.base_url}/completion",
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+
+    def _acquire(self):
+        if not self.ready:
+            raise BitNetUnavailable("BitNet 서버 준비 안됨")
+        if not self._slots.acquire(blocking=False):
+            raise BitNetBusy("BitNet 워커 사용 중")
+
+    def _request_failed(self, e):
+        # 서버가 죽었으면 워치독이 재시작하도록, 응답 도중 멈췄으면 (읽기 시간 초과)
+        # 워치독이 /health 를 다시 확인할 때까지 ready 해제 → 그동안 요청은 fallback 으로
+        timed_out = isinstance(e, socket.timeout) or isinstance(getattr(e, "reason", None), socket.timeout)
+        if timed_out or self.proc is None or self.proc.poll() is not None:
+            self._ready.clear()
+        return BitNetUnavailable(f"BitNet 요청 실패: {e}")
+
+    def complete(self, prompt: str, max_tokens: int = 50, temperature: float = 0.7,
+                 timeout: float = 10.0) -> str:
+        """프롬프트 1개 → 응답 텍스트 (바쁘면 BitNetBusy)"""
+        self._acquire()
+        try:
+            req = self._request(prompt, max_tokens, temperature, stream=False)
+            try:
+                with urllib.request.urlopen(req, timeout=timeout) as res:
+                    return json.loads(res.read().decode()).get("content", "")
+            except _REQUEST_ERRORS as e:
+                raise self._request_failed(e)
+        finally:
+            self._slots.release()
+
+    def stream(self, prompt: str, max_tokens: int = 50, temperature: float = 0.7,
+               timeout: float = 10.0, cancel=None):
+        """토큰 조각 generator (SSE 스트리밍, 바쁘면 BitNetBusy)
+
+        cancel(threading.Event) 가 켜지면 바로 연결을 끊음 → 서버도 생성을 멈추고 슬롯 반환
+        """
+        self._acquire()
+        try:
+            req = self._request(prompt, max_tokens, temperature, stream=True)
+            try:
+                with urllib.request.urlopen(req, timeout=timeout) as res:
+                    for line in res:
+                        if cancel is not None and cancel.is_set():
+                            break
+                        line = line.decode().strip()
+                        if not line.startswith("data:"):
+                            continue
+                        data = json.loads(line[5:])
+                        if data.get("content"):
+                            yield data["content"]
+                        if data.get("stop"):
+                            break
+            except _REQUEST_ERRORS as e:
+                raise self._request_failed(e)
+        finally:
+            self._slots.release()
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_server() -> BitNetServer:
+    """프로세스 전체에서 공유하는 BitNet 서버 (최초 호출시 생성)"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = BitNetServer()
+        return _server
+
+
+if __name__ == "__main__":
+    server = get_server()
+    try:
+        t0 = time.time()
+        server.start()
+        print(f"로딩 시간: {time.time() - t0:.1f}초")
+        for q in ["안녕!", "오늘 기분 어때?", "산책 갈래?"]:
+            t0 = time.time()
+            reply = server.complete(f"주인: {q}\n친구 로봇 개:")
+            print(f"[{time.time() - t0:.2f}s] {q} → {reply.strip()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
@@ -0,0 +1,117 @@
+# chat_session.py
+"""
+대화 세션 - 고정 prefix(페르소나) + 최근 대화 기록을 이어 붙인 프롬프트
+- 프롬프트는 턴마다 뒤에만 붙음 (append-only) → 앞부분 KV 를 그대로 재사용
+  · ChatSession  : 텍스트 기록만 관리, KV 재사용은 서버 쪽에 맡김
+                   (BitNet llama-server cache_prompt, llama.cpp GGUF 는 공통 prefix 자동 재사용)
+  · KvChatSession: 모델의 KV 상태를 세션이 직접 들고 있다가 새 턴의 토큰만 계산 (transformers int8)
+- 기록이 한도를 넘으면 오래된 턴을 절반까지 한 번에 버림
+  (매 턴 조금씩 버리면 prefix 가 매번 바뀌어 캐시가 계속 깨짐)
+- 한 세션은 한 번에 한 대화만 (LLM executor / BitNet 워커가 이미 1개씩 직렬 처리)
+"""
+
+from collections import deque
+
+
+class ChatSession:
+    def __init__(self, prefix="", bot_tag="Robot:", max_turns=6, max_chars=600):
+        self.prefix = prefix
+        self.bot_tag = bot_tag
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self.turns = deque()       # "사용자 줄\n봇 태그 응답\n" 문자열
+        self.stopped = True        # 직전 응답이 stop 문자열(줄바꿈)로 끝났는지
+        self.evictions = 0
+
+    def history(self) -> str:
+        return "".join(self.turns)
+
+    def prompt(self, user_line: str) -> str:
+        """이번 턴 프롬프트 (prefix + 기록 + 새 사용자 줄 + 봇 태그)"""
+        return f"{self.prefix}{self.history()}{user_line}\n{self.bot_tag}"
+
+    def _evict(self, extra=0, force=False):
+        """한도를 넘었으면 (또는 force) 오래된 턴을 절반까지 버림 → 버렸으면 True"""
+        chars = sum(map(len, self.turns)) + extra
+        if not (force or len(self.turns) >= self.max_turns or chars > self.max_chars):
+            return False
+        while self.turns and (len(self.turns) > self.max_turns // 2 or chars > self.max_chars // 2):
+            chars -= len(self.turns.popleft())
+        self.evictions += 1
+        return True
+
+    def add(self, user_line: str, reply: str):
+        self.turns.append(f"{user_line}\n{self.bot_tag}{reply}\n")
+
+    def reset(self):
+        self.turns.clear()
+        self.stopped = True
+
+    def stream(self, generate, user_line: str, stop="\n"):
+        """generate(prompt) 토큰 조각 generator 를 감싸서 응답을 기록에 남김
+
+        stop: 봇 턴이 끝나는 문자열 (모델이 다음 사용자 줄까지 지어내지 않게)
+        """
+        self._evict(len(user_line))
+        yield from self._run(generate(self.prompt(user_line)), user_line, stop)
+
+    def _run(self, fragments, user_line, stop):
+        reply = ""
+        self.stopped = False
+        try:
+            for frag in fragments:
+                text = reply + frag
+                body = len(text) - len(text.lstrip())   # 앞쪽 공백/줄바꿈은 건너뜀
+                cut = text.find(stop, body) if stop and text.strip() else -1
+                if cut >= 0:
+                    frag, reply = text[len(reply):cut], text[:cut]
+                    self.stopped = True
+                    if frag:
+                        yield frag
+                    break
+                reply = text
+                yield frag
+        finally:
+            close = getattr(fragments, "close", None)
+            if close:
+                close()
+            # 중간에 끊겨도 (barge-in, 길이 제한) 실제로 생성된 만큼은 기록
+            if reply.strip():
+                self.add(user_line, reply)
+
+
+class KvChatSession(ChatSession):
+    """모델 KV 상태를 직접 보관 (backend.new_state / prefill / stream_state 지원 백엔드)"""
+
+    def __init__(self, backend, prefix="", bot_tag="Robot:", max_turns=6, max_tokens=384):
+        super().__init__(prefix, bot_tag, max_turns, max_chars=max_tokens * 4)
+        self.backend = backend
+        self.max_tokens = max_tokens
+        self.state = None
+
+    def _rebuild(self):
+        """prefix 캐시에서 시작해 남은 기록만 다시 계산 (처음 / 기록을 버린 뒤에만)"""
+        self.state = self.backend.new_state()
+        history = self.history()
+        if history:
+            self.backend.prefill(self.state, history)
+
+    def stream(self, user_line: str, max_new_tokens=30, temperature=0.8, stop="\n", cancel=None):
+        # 직전 응답이 줄바꿈 전에 끊겼으면 (길이 제한 / eos) 줄바꿈부터
+        lead = "" if self.stopped else "\n"
+        new_text = f"{lead}{user_line}\n{self.bot_tag}"
+        needed = len(self.backend.tokenizer(new_text).input_ids) + max_new_tokens
+        overflow = self.state is not None and self.state.length + needed > self.max_tokens
+        if self._evict(len(user_line), force=overflow):
+            self.state = None
+        if self.state is None:
+            self._rebuild()
+            new_text = f"{user_line}\n{self.bot_tag}"   # 다시 만든 기록은 줄바꿈으로 끝남
+
+        # 직전 응답까지는 이미 KV 에 있으므로 새 사용자 줄만 계산
+        fragments = self.backend.stream_state(self.state, new_text, max_new_tokens, temperature, cancel)
+        yield from self._run(fragments, user_line, stop)
+
+    def reset(self):
+        super().reset()
+        self.state = None
@@ -1,18 +1,32 @@
 #!/usr/bin/env python3
 """
 BitNet b1.58 반려로봇 - Raspberry Pi 최적화 완전 버전
-fswebcam 얼굴감지 + 꼬리서보 + 음성인식(STT) + 감정분석 + TTS + 1-bit LLM
+카메라 얼굴감지 + 꼬리서보 + 음성인식(STT) + 감정분석 + TTS + 1-bit LLM
 """
 
 import cv2
-from face_emotion import get_current_emotion  # fswebcam 버전
-from stt_whispercpp import stt_from_mic
-from tts_piper import tts_play
+from face_emotion import get_current_emotion  # 공유 카메라 버전
+from camera_service import get_camera
+from face_tracker import FaceTracker
+from stt_whispercpp import stt_listen
+from tts_piper import synthesize_pcm
+from audio_output import get_player
+from pipeline import SharedState, robot_pipeline
+from response_cache import get_cache
+from phrase_bank import get_bank
+from llm_stream import sentence_chunks
+from chat_session import ChatSession
+from voice_registry import get_voice
+from emotion_service import get_service as get_emotion_service
+import lazy_loader
+from bitnet_server import get_server, BitNetServer, BitNetBusy, BitNetUnavailable
 import time
 import threading
 import RPi.GPIO as GPIO
 import gc  # 메모리 관리용
 import subprocess
+import codecs
+import select
 import os
 import sys
 
@@ -31,45 +45,60 @@ if LLM_AVAILABLE:
 else:
     print("⚠️ BitNet Fallback 모드 (규칙 기반 응답)")
 
-# GPIO 서보 설정
-GPIO.setmode(GPIO.BCM)
+REPORT_INTERVAL = 15.0   # 상태 / 파이프라인 지표 출력 간격 (초)
+
+# 대화 세션: 고정 페르소나 + 최근 대화 → 상주 서버(cache_prompt)가 앞부분 KV 재사용
+BITNET_PERSONA = "친구 로봇 개는 주인과 함께 사는 다정한 반려 로봇이야. 짧고 귀엽게 한 문장으로 대답해.\n"
+chat_session = ChatSession(prefix=BITNET_PERSONA, bot_tag="친구 로봇 개:", max_turns=6, max_chars=600)
+
+# GPIO 서보 설정 (import 시점이 아니라 RobotHardware 생성시)
 servo_pin = 12
-GPIO.setup(servo_pin, GPIO.OUT) 
-servo = GPIO.PWM(servo_pin, 50)
-servo.start(0)
+servo = None
 servo_min_duty = 3
 servo_max_duty = 12
 
+def setup_servo():
+    global servo
+    if servo is None:
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(servo_pin, GPIO.OUT) 
+        servo = GPIO.PWM(servo_pin, 50)
+        servo.start(0)
+    return servo
+
+# 무거운 모델은 백그라운드에서 병렬 로딩 (whisper/mic 은 stt_whispercpp 에서 등록)
+emotion_model = lazy_loader.register("emotion", lambda: get_emotion_service().load())
+tts_voice = lazy_loader.register("voice", lambda: get_voice("lessac"))
+bitnet = lazy_loader.register(
+    "bitnet",
+    lambda: get_server().start(wait=True) if LLM_AVAILABLE and BitNetServer.available() else None,
+)
+
 class RobotHardware:
     def __init__(self):
-        self.cascade_path = "/home/sptcnl/haarcascade_frontalface_default.xml"
-        self.face_cascade = cv2.CascadeClassifier(self.cascade_path)
+        setup_servo()
+        # 전체 프레임 감지는 가끔만, 그 사이엔 마지막 얼굴 주변만 → 얼굴 추적 FPS ↑
+        self.face_tracker = FaceTracker()   # 감지 백엔드는 FACE_DETECTOR
+        self.camera = get_camera()   # 카메라 장치는 캡처 서비스가 독점
+        self.frames = self.camera.subscribe()
+        self.gray_frames = self.camera.subscribe(gray=True)
         self.face_detected = False
+        self.last_faces = ()
         self.running = False
         self.tail_running = False
         self.tail_thread = None
         
     def start_camera(self):
-        """fswebcam 카메라 테스트"""
-        test_img = self.capture_face_image()
-        if test_img:
-            print("📷 fswebcam USB 카메라 연결 성공!")
-            os.unlink(test_img)
+        """카메라 서비스 시작 확인 (프로세스 내부 캡처, fswebcam/임시파일 없음)"""
+        frame = self.capture_face_image()
+        if frame is not None:
+            print("📷 카메라 연결 성공! (in-process 캡처)")
         else:
-            print("❌ fswebcam 카메라 연결 실패! (sudo apt install fswebcam)")
+            print("❌ 카메라 연결 실패! (/dev/video0 또는 CAMERA_BACKEND 확인)")
     
-    def capture_face_image(self):
-        """fswebcam 단일 이미지 캡처"""
-        temp_file = f"/tmp/webcam_face_{int(time.time())}.jpg"
-        cmd = [
-            "fswebcam", "--resolution", "640x480",
-            "--no-banner", "--save", temp_file
-        ]
-        try:
-            subprocess.run(cmd, check=True, capture_output=True, timeout=3)
-            return temp_file if os.path.exists(temp_file) else None
-        except:
-            return None
+    def capture_face_image(self, timeout=2.0):
+        """최신 카메라 프레임 1장 (BGR numpy, 실패시 None)"""
+        return self.frames.next(timeout=timeout)
     
     def set_servo_degree(self, degree):
         degree = max(0, min(180, degree))
@@ -103,17 +132,17 @@ class RobotHardware:
         self.set_servo_degree(90)  # 중앙 정지
         print("🛑 꼬리 정지!")
     
-    def detect_face(self):
-        """fswebcam + OpenCV 얼굴 인식 (0.5초 주기)"""
-        img_path = self.capture_face_image()
-        if not img_path:
+    def detect_face(self, gray=None):
+        """공유 카메라 흑백 프레임 + 얼굴 추적기 (gray 를 안 주면 새 프레임 대기)"""
+        if gray is None:
+            gray = self.gray_frames.next(timeout=0.5)
+        if gray is None:
             return False, 0
         
         try:
-            frame = cv2.imread(img_path)
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(gray, 1.2, 5)
+            faces = self.face_tracker.update(gray)
             face_detected = len(faces) > 0
+            self.last_faces = faces  # 감정 분석이 같은 박스 재사용
             
             # 꼬리 제어 로직
             if face_detected and not self.tail_running:
@@ -121,27 +150,38 @@ class RobotHardware:
             elif not face_detected and self.tail_running:
                 self.stop_tail()
             
-            os.unlink(img_path)
             return face_detected, len(faces)
         except:
-            if os.path.exists(img_path):
-                os.unlink(img_path)
             return False, 0
     
     def cleanup(self):
         """종료 정리"""
         self.stop_tail()
+        self.camera.stop()
         cv2.destroyAllWindows()
-        servo.ChangeDutyCycle(0)
-        servo.stop()
+        if servo is not None:
+            servo.ChangeDutyCycle(0)
+            servo.stop()
         GPIO.cleanup()
         print("✅ 하드웨어 정리 완료!")
 
 def bitnet_chat(prompt: str, max_tokens: int = 50) -> str:
-    """BitNet 공식 바이너리 호출 (안정적)"""
+    """BitNet 상주 서버 우선, 서버가 없으면 공식 바이너리 1회 호출"""
     if not LLM_AVAILABLE:
         return "멍멍! 🐶"
     
+    server = get_server()
+    if server.running and not server.ready:
+        return "아직 준비 중이에요... 🐕"  # 백그라운드 로딩 중 (바이너리로 모델 중복 로딩 방지)
+    if server.ready:
+        try:
+            reply = server.complete(prompt, max_tokens=max_tokens).strip()
+            return reply[:80] if reply else "좋은 하루! 🐾"
+        except BitNetBusy:
+            return "잠깐만요, 생각중이에요... 🐕"
+        except BitNetUnavailable as e:
+            print(f"🤖 BitNet 서버 오류: {e} (바이너리로 재시도)")
+    
     try:
         cmd = [
             BITNET_BINARY, '-m', BITNET_MODEL_PATH,
@@ -156,6 +196,106 @@ def bitnet_chat(prompt: str, max_tokens: int = 50) -> str:
         print(f"🤖 BitNet 오류: {e}")
         return "생각중... 🐕"
 
+def bitnet_chat_stream(prompt: str, max_tokens: int = 50, cancel=None):
+    """BitNet 토큰 조각 generator (상주 서버 SSE → 바이너리 stdout 순)
+
+    cancel(threading.Event) 가 켜지면 (barge-in) 서버 연결을 끊거나 바이너리를 바로 종료
+    """
+    if not LLM_AVAILABLE:
+        yield "멍멍! 🐶"
+        return
+    
+    server = get_server()
+    if server.running and not server.ready:
+        yield "아직 준비 중이에요... 🐕"  # 백그라운드 로딩 중 (바이너리로 모델 중복 로딩 방지)
+        return
+    if server.ready:
+        try:
+            yield from server.stream(prompt, max_tokens=max_tokens, cancel=cancel)
+            return
+        except BitNetBusy:
+            yield "잠깐만요, 생각중이에요... 🐕"
+            return
+        except BitNetUnavailable as e:
+            print(f"🤖 BitNet 서버 오류: {e} (바이너리로 재시도)")
+    
+    cmd = [
+        BITNET_BINARY, '-m', BITNET_MODEL_PATH,
+        '-p', prompt,
+        '-n', str(max_tokens), '-t', '4',
+        '-temp', '0.7', '-cnv'
+    ]
+    proc = None
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        deadline = time.time() + 10
+        fd = proc.stdout.fileno()
+        # 64바이트 경계에서 한글(3바이트)이 잘려도 다음 조각과 이어서 디코딩
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        while time.time() < deadline:
+            if cancel is not None and cancel.is_set():
+                break
+            # 출력이 없어도 0.1초마다 깨어나서 취소/시간 초과 확인
+            if not select.select([fd], [], [], 0.1)[0]:
+                continue
+            data = os.read(fd, 64)
+            if not data:
+                break
+            text = decoder.decode(data)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+    except Exception as e:
+        print(f"🤖 BitNet 오류: {e}")
+        yield "생각중... 🐕"
+    finally:
+        if proc and proc.poll() is None:
+            proc.kill()
+
+def bitnet_session_stream(user_line: str, cancel=None, meta=None):
+    """상주 서버가 준비됐으면 대화 세션으로 (새 턴만 계산), 아니면 한 턴짜리 프롬프트
+
+    세션 기록에는 상주 서버가 실제로 생성한 응답만 남김
+    (바쁨/준비중 같은 고정 대사나 바이너리 fallback 출력은 기록 안 함)
+    meta: dict 를 주면 상주 서버 응답이 끝까지 나왔을 때 meta["from_model"] = True
+    """
+    one_turn = f"{user_line}\n{chat_session.bot_tag}"
+    server = get_server()
+    if server.ready:
+        produced = False
+        try:
+            for frag in chat_session.stream(
+                    lambda prompt: server.stream(prompt, max_tokens=50, cancel=cancel), user_line):
+                produced = True
+                yield frag
+            if meta is not None and produced and not (cancel is not None and cancel.is_set()):
+                meta["from_model"] = True
+            return
+        except BitNetBusy:
+            yield "잠깐만요, 생각중이에요... 🐕"
+            return
+        except BitNetUnavailable as e:
+            if produced:
+                return   # 이미 말한 부분은 그대로 두고 끝냄
+            print(f"🤖 BitNet 서버 오류: {e} (바이너리로 재시도)")
+    # 바이너리는 대화 기록 없이 한 턴짜리 프롬프트만 (세션 prompt 를 통째로 넘기지 않음)
+    yield from bitnet_chat_stream(one_turn, cancel=cancel)
+
+def local_chat_stream(user_text: str, emotion: str, face_detected: bool, cancel=None, meta=None):
+    """local_chat 스트리밍 버전 - 완성된 문장/절 단위로 yield (cancel 켜지면 생성 중단)
+
+    meta: 실제 BitNet 응답이면 meta["from_model"] = True (응답 캐시 저장 여부)
+    """
+    if LLM_AVAILABLE and user_text.strip():
+        context = f"[{emotion}, face:{'O' if face_detected else 'X'}, {time.strftime('%H:%M')}]"
+        yield from sentence_chunks(bitnet_session_stream(f"{context} 주인: {user_text}", cancel, meta), max_chars=80)
+        gc.collect()  # 메모리 정리
+        return
+    
+    yield local_chat(user_text, emotion, face_detected)
+
 def local_chat(user_text: str, emotion: str, face_detected: bool) -> str:
     """로봇 대화 로직 (BitNet 우선 + Fallback)"""
     if not user_text.strip():
@@ -164,10 +304,12 @@ def local_chat(user_text: str, emotion: str, face_detected: bool) -> str:
     context = f"[{emotion}, face:{'O' if face_detected else 'X'}, {time.strftime('%H:%M')}]"
     
     if LLM_AVAILABLE:
-        prompt = f"{context} 주인: {user_text}\n친구 로봇 개:"
-        reply = bitnet_chat(prompt)
+        if get_server().ready:
+            reply = " ".join(sentence_chunks(bitnet_session_stream(f"{context} 주인: {user_text}"), max_chars=80))
+        else:
+            reply = bitnet_chat(f"{context} 주인: {user_text}\n{chat_session.bot_tag}")
         gc.collect()  # 메모리 정리
-        return reply
+        return reply or "좋은 하루! 🐾"
     
     # Fallback 응답 (BitNet 실패시)
     if face_detected:
@@ -185,67 +327,77 @@ def local_chat(user_text: str, emotion: str, face_detected: bool) -> str:
         }
         return responses.get(emotion, f"'{user_text}' 들었어요! 😄")
 
-def hardware_monitoring_loop(robot):
-    """얼굴 감지 백그라운드 스레드 (0.5초 주기)"""
-    count = 0
-    while robot.running:
-        face_detected, face_count = robot.detect_face()
-        robot.face_detected = face_detected
-        
-        count += 1
-        status = f"[📸 {count:4d}] 얼굴:{face_count} 꼬리:{'흔들림!' if robot.tail_running else '정지'}"
-        print(status, end='\r', flush=True)
-        time.sleep(0.5)  # fswebcam 속도 고려
-
 def main_loop():
     """메인 루프 - 얼굴감지 + 음성대화"""
     print("=" * 60)
     print("🚀 BitNet b1.58 반려로봇 v2.0 시작!")
-    print("📋 확인사항: fswebcam / USB카메라 / haarcascade.xml")
+    print("📋 확인사항: USB카메라(또는 CAMERA_BACKEND=picamera2) / 얼굴 감지 모델(FACE_DETECTOR / FACE_MODEL_DIR)")
     print("💾 메모리 모니터링: htop (MEM < 1.5GB 유지)")
     print("=" * 60)
     
+    # 모델 로딩은 백그라운드로 먼저 출발 (whisper / 마이크 / 표정 / 음성 / BitNet 병렬)
+    lazy_loader.preload()
+    
+    t0 = time.time()
     robot = RobotHardware()
     robot.running = True
     robot.start_camera()
+    lazy_loader.mark("hardware", time.time() - t0)
     
-    # 얼굴 감지 백그라운드 시작
-    monitor_thread = threading.Thread(target=hardware_monitoring_loop, args=(robot,), daemon=True)
-    monitor_thread.start()
+    # 고정 대사 / 인사 같은 캐시 응답은 음성까지 미리 합성 (음성 모델 로딩 끝나면, 디스크 캐시 재사용)
+    get_bank("lessac").render(background=True)
+    response_cache = get_cache(synthesize_pcm)
+    response_cache.warm()
     
-    print("🚀 로봇 활성화 완료! (Ctrl+C 종료)")
+    # 단계별 워커 파이프라인: 얼굴 감지/표정은 카메라 속도로, 대화는 말하는 동안에도 다음 말을 들음
+    state = SharedState(faces=(), face_detected=False, emotion="neutral")
+    
+    def detect(frame):
+        face_detected, _ = robot.detect_face(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        robot.face_detected = face_detected
+        return robot.last_faces
+    
+    def emotion(frame, faces):
+        # 표정 모델 아직 로딩 중이면 건너뜀 (state 는 neutral 유지)
+        return get_current_emotion(frame, faces) if emotion_model.ready else None
+    
+    pipeline = robot_pipeline(
+        state,
+        frames=robot.frames,
+        detect=detect,
+        emotion=emotion,
+        listen=lambda on_speech, playing: stt_listen(max_seconds=10, on_speech=on_speech,
+                                                     playing=playing),
+        chat=lambda text, ctx, cancel: local_chat_stream(text, ctx["emotion"], ctx["face_detected"], cancel, ctx),
+        synthesize=synthesize_pcm,
+        player=get_player(),
+        cache=response_cache,
+    )
+    pipeline.start()
+    
+    print("🚀 로봇 활성화 완료! (얼굴추적/꼬리 동작 중, 모델은 백그라운드 로딩) (Ctrl+C 종료)")
+    print("🎤 말해주세요... (말이 끝나면 바로 인식)")
+    lazy_loader.report()
+    lazy_loader.report_when_ready()
     
     try:
         while True:
-            print("\n" + "=" * 50 + "\n=== 새 대화 ===")
-            
-            status = f"[📸 얼굴]: {'O' if robot.face_detected else 'X'} [🐕 꼬리]: {'흔들림!' if robot.tail_running else '정지'}"
-            print(status)
-            
-            # 1. 감정 분석
-            emotion = get_current_emotion()
-            print(f"[😊 감정]: {emotion}")
-            
-            # 2. 음성 입력 (10초)
-            print("🎤 말해주세요... (10초 대기)")
-            text = stt_from_mic(seconds=10)
-            print(f"[💭 음성->텍스트]: '{text}'")
-            
-            # 3. BitNet 대화 생성
-            reply = local_chat(text, emotion, robot.face_detected)
-            print(f"[🤖 BitNet]: {reply}")
-            
-            # 4. TTS 출력
-            tts_play(reply)
-            
-            print("-" * 50)
-            time.sleep(1)  # 간격 조절
+            time.sleep(REPORT_INTERVAL)
+            snap = state.snapshot()
+            print(f"\n[📸 얼굴]: {'O' if snap['face_detected'] else 'X'} "
+                  f"[🐕 꼬리]: {'흔들림!' if robot.tail_running else '정지'} "
+                  f"[😊 감정]: {snap['emotion']} [📷 {robot.camera.fps:4.1f}fps]")
+            pipeline.report()
+            robot.face_tracker.report()
+            response_cache.report()
             
     except KeyboardInterrupt:
         print("\n\n👋 로봇 종료 신호 수신...")
     finally:
         robot.running = False
-        time.sleep(2)  # 정리 대기
+        pipeline.stop()
+        get_player().interrupt()
+        get_server().stop()
         robot.cleanup()
         print("✨ 프로그램 완전 종료!")
 
@@ -259,6 +411,7 @@ if __name__ == "__main__":
     finally:
         try:
             GPIO.cleanup()
-            servo.stop()
+            if servo is not None:
+                servo.stop()
         except:
             pass
\ No newline at end of file
@@ -1,8 +1,8 @@
 import cv2
 from picamera2 import Picamera2
+from face_tracker import FaceTracker
 
-cascade_path = "/home/sptcnl/haarcascade_frontalface_default.xml"
-face = cv2.CascadeClassifier(cascade_path)
+face = FaceTracker()   # FACE_DETECTOR=haar / lbp / ssd / yunet
 
 picam2 = Picamera2()
 config = picam2.create_preview_configuration(
@@ -16,7 +16,7 @@ while True:
     frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
 
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    faces = face.detectMultiScale(gray, 1.2, 5)
+    faces = face.update(gray)
 
     for (x, y, w, h) in faces:
         cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
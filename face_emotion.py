@@ -1,77 +1,60 @@
-# face_emotion.py (fswebcam 버전)
-import subprocess
-import cv2
-from transformers import AutoImageProcessor, AutoModelForImageClassification
-from PIL import Image
-import numpy as np
-import torch
+# face_emotion.py (공유 카메라 + 공유 표정 서비스 버전)
+import threading
 import time
-import os
+from camera_service import get_camera
+from emotion_service import get_service, largest_face
+from face_detector import create_detector
 
-DEVICE = "cpu"
+# 얼굴 박스를 안 넘겨주면 여기서 직접 감지 (FACE_DETECTOR 백엔드)
+# import 할 때가 아니라 처음 필요할 때 생성 (보통은 추적기가 찾은 박스를 넘겨줘서 안 씀)
+_detector = None
+_detector_lock = threading.Lock()
 
-# 표정 감지 모델 (첫 실행시 자동 다운로드)
-MODEL_NAME = "HardlyHumans/Facial-expression-detection"
+def get_detector():
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = create_detector()
+        return _detector
 
-processor = AutoImageProcessor.from_pretrained(MODEL_NAME)
-model = AutoModelForImageClassification.from_pretrained(MODEL_NAME).to(DEVICE)
-id2label = model.config.id2label
+def capture_frame():
+    """카메라 서비스에서 최신 프레임 (장치는 서비스가 독점)"""
+    _, frame = get_camera().read()
+    return frame
 
-def capture_with_fswebcam():
-    """fswebcam으로 이미지 캡처"""
-    temp_file = "/tmp/webcam_face.jpg"
-    
-    # fswebcam 명령어 실행 (저해상도, 빠른 캡처)
-    cmd = [
-        "fswebcam",
-        "--resolution", "320x240",
-        "--no-banner", 
-        "--save", temp_file
-    ]
-    
-    try:
-        subprocess.run(cmd, check=True, capture_output=True, timeout=3)
-        if os.path.exists(temp_file):
-            return temp_file
-        return None
-    except subprocess.TimeoutExpired:
-        return None
-    except subprocess.CalledProcessError:
-        return None
+def get_face_emotions(frame=None, faces=None):
+    """프레임의 얼굴마다 [(박스, 라벨, 확률), ...] - 한 번의 배치 추론"""
+    if frame is None:
+        frame = capture_frame()
+        if frame is None:
+            return []
+    if faces is None:
+        faces = get_detector()(frame)
+    results = get_service().classify_faces(frame, faces)
+    return [(tuple(box), label, conf) for box, (label, conf) in zip(faces, results)]
+
+def get_current_emotion(frame=None, faces=None):
+    """가장 큰 얼굴 crop 의 표정 (얼굴 없으면 neutral)
 
-def get_current_emotion():
-    """fswebcam으로 캡처한 이미지에서 표정 감지"""
+    frame/faces: 이미 감지한 프레임과 Haar 박스를 넘기면 감지를 다시 안 함
+    """
     try:
-        img_path = capture_with_fswebcam()
-        if not img_path:
-            return "error: fswebcam 캡처 실패"
-        
-        # 이미지 로드
-        img = Image.open(img_path).convert('RGB')
-        
-        # 모델 추론
-        inputs = processor(images=img, return_tensors="pt").to(DEVICE)
-        with torch.no_grad():
-            outputs = model(**inputs)
-            pred_id = int(torch.argmax(outputs.logits, dim=-1))
-            emotion = id2label[pred_id]
-        
-        # 임시파일 삭제
-        os.unlink(img_path)
-        
-        return emotion
+        emotions = get_face_emotions(frame, faces)
+        if not emotions:
+            return "neutral"
+        idx = largest_face([box for box, _, _ in emotions])
+        return emotions[idx][1]
         
     except Exception as e:
         return f"error: {str(e)}"
 
 if __name__ == "__main__":
-    print("fswebcam 표정 감지 테스트...")
-    print("실행 전 fswebcam 설치 필요: sudo apt install fswebcam")
+    print("표정 감지 테스트...")
     
     try:
         for i in range(5):
-            emotion = get_current_emotion()
-            print(f"[{i+1}/5] Emotion: {emotion}")
+            for box, label, conf in get_face_emotions():
+                print(f"[{i+1}/5] {box} Emotion: {label} ({conf:.2f})")
             time.sleep(1)  # 1초 대기
     except KeyboardInterrupt:
-        print("\n테스트 중단")
\ No newline at end of file
+        print("\n테스트 중단")
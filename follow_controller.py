@@ -0,0 +1,191 @@
+# follow_controller.py
+"""
+얼굴 따라가기 제어기 - 전진/좌회전/우회전 on-off 대신 연속적인 좌우 바퀴 속도
+- 비전(느림, 프레임마다): update(error_x, distance) 로 목표만 갱신
+- 제어 스레드(빠름, CONTROL_HZ 고정): PID → 차동 구동 → 가감속 제한 → drive(left, right)
+  · 조향: 얼굴 중심 오차(-1~1) PID → 좌우 바퀴 속도 차이
+  · 전진: 목표 거리와의 차이 PID (너무 가까우면 전진 0, 조향 오차가 크면 먼저 제자리 회전)
+  · 가속은 천천히, 감속은 빠르게 (MAX_ACCEL / MAX_DECEL)
+- 비전 결과가 TARGET_TIMEOUT 넘게 안 오면 (얼굴 놓침/비전 멈춤) 천천히 정지
+- drive(left, right): -100~100 (음수는 후진), 모터 드라이버 쪽에서 방향 핀 + PWM 으로 변환
+"""
+
+import threading
+import time
+
+CONTROL_HZ = 20
+MAX_SPEED = 60.0          # 바퀴 최대 duty (%)
+TARGET_DISTANCE_CM = 70.0 # 이 거리를 유지하려고 함
+STOP_DISTANCE_CM = 50.0   # 이보다 가까우면 전진 안 함 (제자리 회전만)
+MAX_ACCEL = 120.0         # %/초 - 출발/가속 부드럽게
+MAX_DECEL = 400.0         # %/초 - 멈출 때는 빠르게
+TARGET_TIMEOUT = 0.6      # 초 - 이보다 오래된 비전 결과는 무시
+DEAD_ZONE = 0.05          # 이 안의 조향 오차는 0 으로 (중앙 근처에서 떨림 방지)
+STEER_SIGN = -1.0         # 기존 test-momo.py 방향: 얼굴이 화면 왼쪽(error<0)이면 우회전
+
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+class PID:
+    def __init__(self, kp, ki=0.0, kd=0.0, out_limit=100.0, i_limit=None, d_filter=0.5):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.out_limit = out_limit
+        self.i_limit = i_limit if i_limit is not None else out_limit
+        self.d_filter = d_filter   # 미분항 저역 통과 (비전 노이즈가 바퀴로 바로 안 가게)
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.prev_error = None
+        self.derivative = 0.0
+
+    def update(self, error, dt):
+        if dt <= 0:
+            dt = 1e-3
+        # anti-windup: 적분항 자체를 제한
+        self.integral = clamp(self.integral + error * dt, -self.i_limit, self.i_limit)
+        if self.prev_error is not None:
+            raw = (error - self.prev_error) / dt
+            self.derivative += self.d_filter * (raw - self.derivative)
+        self.prev_error = error
+        out = self.kp * error + self.ki * self.integral + self.kd * self.derivative
+        return clamp(out, -self.out_limit, self.out_limit)
+
+
+class RateLimiter:
+    def __init__(self, accel=MAX_ACCEL, decel=MAX_DECEL):
+        self.accel = accel
+        self.decel = decel
+        self.value = 0.0
+
+    def step(self, target, dt):
+        # 0 에서 멀어지는 쪽은 가속 한도, 0 으로 가까워지는 쪽은 감속 한도
+        speeding_up = abs(target) > abs(self.value) and target * self.value >= 0
+        limit = (self.accel if speeding_up else self.decel) * dt
+        self.value += clamp(target - self.value, -limit, limit)
+        return self.value
+
+
+class FollowController:
+    def __init__(self, drive, hz=CONTROL_HZ, max_speed=MAX_SPEED,
+                 target_distance=TARGET_DISTANCE_CM, stop_distance=STOP_DISTANCE_CM):
+        self.drive = drive
+        self.period = 1.0 / hz
+        self.max_speed = max_speed
+        self.target_distance = target_distance
+        self.stop_distance = stop_distance
+        self.steer_pid = PID(kp=45.0, ki=5.0, kd=6.0, out_limit=max_speed, i_limit=2.0)
+        self.dist_pid = PID(kp=1.2, ki=0.1, kd=0.0, out_limit=max_speed, i_limit=50.0)
+        self.left = RateLimiter()
+        self.right = RateLimiter()
+
+        self._lock = threading.Lock()
+        self._error = 0.0
+        self._distance = None
+        self._seen = 0.0            # 마지막 비전 결과 시각
+        self.running = False
+        self.thread = None
+        self.steps = 0
+        self.overruns = 0
+        self.status = "정지"
+
+    # ==============================
+    # 비전 쪽 API
+    # ==============================
+    def update(self, error_x, distance_cm=None):
+        """얼굴 중심 오차 (-1 왼쪽 끝 ~ 1 오른쪽 끝) + 초음파 거리(cm)"""
+        with self._lock:
+            self._error = clamp(error_x, -1.0, 1.0)
+            self._distance = distance_cm
+            self._seen = time.monotonic()
+
+    def update_from_box(self, box, frame_width, distance_cm=None):
+        x, _, w, _ = box
+        half = frame_width / 2
+        self.update((x + w / 2 - half) / half, distance_cm)
+
+    def lose_target(self):
+        with self._lock:
+            self._seen = 0.0
+
+    # ==============================
+    # 제어 스레드
+    # ==============================
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="follow-controller", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.left.value = self.right.value = 0.0
+        self.drive(0.0, 0.0)
+
+    def _run(self):
+        next_t = time.monotonic()
+        last = next_t
+        while self.running:
+            now = time.monotonic()
+            try:
+                self.step(now - last)
+            except Exception as e:
+                print(f"\n⚠️ 주행 제어 오류: {e}")
+            last = now
+            next_t += self.period
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.overruns += 1       # 한 주기를 넘김 → 밀린 주기는 건너뛰고 다시 맞춤
+                next_t = time.monotonic()
+
+    def step(self, dt):
+        """제어 1주기: 목표 → 좌우 바퀴 속도 → drive"""
+        with self._lock:
+            error, distance, seen = self._error, self._distance, self._seen
+        self.steps += 1
+
+        if time.monotonic() - seen > TARGET_TIMEOUT:
+            self.steer_pid.reset()
+            self.dist_pid.reset()
+            target_left = target_right = 0.0
+            self.status = "얼굴없음"
+        else:
+            if abs(error) < DEAD_ZONE:
+                error = 0.0
+            steer = STEER_SIGN * self.steer_pid.update(error, dt)
+
+            if distance is None or distance <= self.stop_distance:
+                self.dist_pid.reset()
+                forward = 0.0
+                self.status = "가까움(회전만)" if distance is not None else "회전만"
+            else:
+                forward = clamp(self.dist_pid.update(distance - self.target_distance, dt), 0.0, self.max_speed)
+                forward *= max(0.0, 1.0 - abs(error) * 1.5)   # 옆에 있으면 먼저 돌고 나서 전진
+                self.status = "추적"
+
+            target_left, target_right = forward + steer, forward - steer
+            # 한쪽이 한도를 넘으면 비율 유지한 채 둘 다 줄임 (회전 반경 유지)
+            peak = max(abs(target_left), abs(target_right))
+            if peak > self.max_speed:
+                target_left *= self.max_speed / peak
+                target_right *= self.max_speed / peak
+
+        self.drive(self.left.step(target_left, dt), self.right.step(target_right, dt))
+
+    @property
+    def speeds(self):
+        return self.left.value, self.right.value
+
+    def report(self):
+        left, right = self.speeds
+        print(f"🛞 주행 제어: {self.status} L {left:+5.1f} R {right:+5.1f} "
+              f"({self.steps}주기, 주기 초과 {self.overruns})")
@@ -0,0 +1,105 @@
+# lazy_loader.py
+"""
+무거운 모델 지연 로딩 (lazy / background warm-up)
+- register(name, loader): 처음 get() 할 때 로드, 또는 preload() 로 백그라운드 병렬 로드
+- 백그라운드 로딩 중에 get() 하면 그 컴포넌트만 기다림 (나머지는 계속 동작)
+- 컴포넌트별 로딩 시간 기록 → report() 로 시작 시간 출력
+"""
+
+import threading
+import time
+
+_components = {}
+_timings = {}          # name → 초 (동기 단계 포함)
+_registry_lock = threading.Lock()
+_t_start = time.time()
+
+
+class LazyComponent:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.value = None
+        self.error = None
+        self._started = False
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _claim(self):
+        with self._lock:
+            if self._started:
+                return False
+            self._started = True
+            return True
+
+    def _load(self):
+        t0 = time.time()
+        try:
+            self.value = self.loader()
+        except Exception as e:
+            self.error = e
+            print(f"⚠️ {self.name} 로딩 실패: {e}")
+        finally:
+            _timings[self.name] = time.time() - t0
+            self._done.set()
+
+    def start(self):
+        """백그라운드 스레드에서 로딩 시작 (이미 시작했으면 무시)"""
+        if self._claim():
+            threading.Thread(target=self._load, name=f"load-{self.name}", daemon=True).start()
+
+    def get(self, timeout=None):
+        """로딩된 값 (아직이면 여기서 로드하거나 백그라운드 로딩을 기다림)"""
+        if self._claim():
+            self._load()
+        elif not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} 로딩 대기 시간 초과")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self.error is None
+
+
+def register(name, loader) -> LazyComponent:
+    """컴포넌트 등록 (같은 이름이면 기존 것 재사용)"""
+    with _registry_lock:
+        if name not in _components:
+            _components[name] = LazyComponent(name, loader)
+        return _components[name]
+
+
+def preload(*names):
+    """등록된 컴포넌트들을 병렬로 백그라운드 로딩 (이름 없으면 전부)"""
+    for name in names or list(_components):
+        _components[name].start()
+
+
+def mark(name, seconds):
+    """동기로 끝난 시작 단계 시간 기록 (GPIO, 카메라 등)"""
+    _timings[name] = seconds
+
+
+def report():
+    """컴포넌트별 시작 시간 출력"""
+    print("⏱️ 시작 시간 (컴포넌트별)")
+    for name, seconds in sorted(_timings.items(), key=lambda kv: kv[1]):
+        print(f"   {name:<12} {seconds:6.2f}s")
+    pending = [c.name for c in _components.values() if c._started and not c._done.is_set()]
+    if pending:
+        print(f"   로딩 중: {', '.join(pending)}")
+    print(f"   프로세스 시작 후 {time.time() - _t_start:.2f}s")
+
+
+def report_when_ready(timeout=120):
+    """백그라운드 로딩이 다 끝나면 report() (기다리는 동안 로봇은 계속 동작)"""
+    def wait_all():
+        deadline = time.time() + timeout
+        for c in list(_components.values()):
+            if c._started:
+                c._done.wait(max(0.0, deadline - time.time()))
+        report()
+
+    threading.Thread(target=wait_all, daemon=True).start()
@@ -0,0 +1,191 @@
+# phrase_bank.py
+"""
+고정 대사 음성 뱅크 - 자주 쓰는 대사는 한 번만 합성해서 PCM 으로 보관
+- 디스크 캐시: ~/.cache/momo/phrases/<음성>/<음성 해시>/<텍스트 해시>.npz
+- 음성 해시 = onnx 파일 크기/수정시각 + 설정(json) 내용 → 음성 모델이 바뀌면 자동으로 다시 합성
+  (예전 해시 폴더는 지우고, voice_registry 에 올라가 있던 예전 모델도 내려서 새 파일로 다시 로드)
+- 시작할 때 render() 로 미리 만들거나, 빌드 단계로: python phrase_bank.py [음성]
+- tts_piper.synthesize_pcm 이 먼저 여기서 찾음 → 뱅크에 있는 대사는 어디서 말하든 바로 재생
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from voice_registry import get_voice, evict, VOICES, DEFAULT_VOICE
+
+CACHE_DIR = os.path.expanduser("~/.cache/momo/phrases")
+VOICE_CHECK_INTERVAL = 30.0   # 음성 모델 바뀌었는지는 이 간격으로만 확인 (문장마다 stat/sha1 안 함)
+
+# 로봇이 매번 똑같이 하는 말 (test-momo.py / companion_robot.local_chat fallback)
+PHRASES = [
+    "안녕하세요! 얼굴을 찾아서 따라갈게요!",
+    "더 가까이 오세요!",
+    "따라갈게요!",
+    "너무 가까워요! 멈췄어요!",
+    "woof woof 🐶",
+    "멍멍! 🐶",
+    "좋은 하루! 🐾",
+    "생각중... 🐕",
+    "아직 준비 중이에요... 🐕",
+    "잠깐만요, 생각중이에요... 🐕",
+    "🐶 얼굴 봤어! 같이 놀자~ 😊",
+    "🐕 안녕하세요 주인님! 오늘도 화이팅! 💕",
+    "🥰 저도 주인님 사랑해요! 🐾",
+    "멋져요! 같이 뛰놀자! 🏃‍♂️",
+    "괜찮아요... 같이 산책 갈까요? 🥺",
+    "진정하세요... 숨 쉬세요~ 😌",
+    "네? 더 말씀해주세요! 🐶",
+]
+
+
+def _sha1(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def voice_hash(voice_name: str) -> str:
+    """음성 모델 지문 (파일이 바뀌면 값이 바뀜)"""
+    path = VOICES.get(voice_name, voice_name)
+    st = os.stat(path)
+    h = hashlib.sha1(f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}".encode())
+    try:
+        with open(path + ".json", "rb") as f:
+            h.update(f.read())
+    except OSError:
+        pass
+    return h.hexdigest()[:16]
+
+
+def text_hash(text: str) -> str:
+    return _sha1(text.strip().encode())[:16]
+
+
+class PhraseBank:
+    def __init__(self, voice_name=DEFAULT_VOICE, cache_dir=CACHE_DIR):
+        self.voice_name = voice_name
+        self.voice_dir = os.path.join(cache_dir, voice_name)
+        self.vhash = None
+        self._checked = 0.0            # 마지막 음성 해시 확인 시각
+        self._pcm = {}                 # 텍스트 해시 → (int16 PCM, sample_rate)
+        self._lock = threading.Lock()
+        self.check_voice(force=True)
+
+    @property
+    def dir(self):
+        return os.path.join(self.voice_dir, self.vhash)
+
+    def check_voice(self, force=False):
+        """음성 모델이 바뀌었으면 메모리/디스크 캐시 비우기 (VOICE_CHECK_INTERVAL 마다 한 번만)"""
+        now = time.monotonic()
+        if not force and now - self._checked < VOICE_CHECK_INTERVAL:
+            return
+        self._checked = now
+        try:
+            vhash = voice_hash(self.voice_name)
+        except OSError:
+            vhash = "missing"
+        if vhash == self.vhash:
+            return
+        with self._lock:
+            changed = self.vhash is not None
+            self.vhash = vhash
+            self._pcm.clear()
+            if os.path.isdir(self.voice_dir):
+                for old in os.listdir(self.voice_dir):
+                    if old != vhash:
+                        shutil.rmtree(os.path.join(self.voice_dir, old), ignore_errors=True)
+                        print(f"🗑️ 음성 모델 변경 → 예전 대사 캐시 삭제 ({self.voice_name}/{old})")
+            os.makedirs(self.dir, exist_ok=True)
+        if changed:
+            # 레지스트리의 PiperVoice 는 예전 모델 → 그대로 쓰면 새 해시 폴더에 예전 목소리가 저장됨
+            evict(self.voice_name)
+
+    def _synthesize(self, text):
+        voice = get_voice(self.voice_name)
+        chunks = [chunk.audio_int16_array for chunk in voice.synthesize(text)]
+        pcm = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16)
+        return pcm, voice.config.sample_rate
+
+    def lookup(self, text: str):
+        """메모리/디스크에 있으면 (pcm, sample_rate), 없으면 None (합성 안 함)"""
+        key = text_hash(text)
+        with self._lock:
+            cached = self._pcm.get(key)
+        if cached is not None:
+            return cached
+        path = os.path.join(self.dir, key + ".npz")
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            cached = (data["pcm"], int(data["rate"]))
+        with self._lock:
+            self._pcm[key] = cached
+        return cached
+
+    def get(self, text: str):
+        """대사 PCM (없으면 합성해서 뱅크에 추가)"""
+        self.check_voice()
+        cached = self.lookup(text)
+        if cached is not None:
+            return cached
+        pcm, rate = self._synthesize(text)
+        key = text_hash(text)
+        tmp = os.path.join(self.dir, key + ".tmp.npz")
+        np.savez(tmp, pcm=pcm, rate=rate)
+        os.replace(tmp, os.path.join(self.dir, key + ".npz"))   # 반쯤 쓴 파일이 안 보이게
+        with self._lock:
+            self._pcm[key] = (pcm, rate)
+        return pcm, rate
+
+    def render(self, phrases=PHRASES, background=False):
+        """대사 목록을 미리 합성 (이미 있으면 디스크에서 읽기만)"""
+        def run():
+            for text in phrases:
+                try:
+                    self.get(text)
+                except Exception as e:
+                    print(f"⚠️ 대사 합성 실패 ({text}): {e}")
+
+        if background:
+            t = threading.Thread(target=run, name=f"phrase-bank-{self.voice_name}", daemon=True)
+            t.start()
+            return t
+        run()
+        return None
+
+
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+def get_bank(voice_name: str = DEFAULT_VOICE) -> PhraseBank:
+    """음성별 대사 뱅크 (프로세스 전체 공유)"""
+    with _banks_lock:
+        if voice_name not in _banks:
+            _banks[voice_name] = PhraseBank(voice_name)
+        return _banks[voice_name]
+
+
+def lookup(voice_name: str, text: str):
+    """이미 만들어 둔 뱅크에서만 찾기 (뱅크 없으면 None)"""
+    bank = _banks.get(voice_name)
+    if bank is None:
+        return None
+    bank.check_voice()
+    return bank.lookup(text)
+
+
+if __name__ == "__main__":
+    # 빌드 단계: python phrase_bank.py [음성 ...]
+    import sys
+    import time
+
+    for name in sys.argv[1:] or [DEFAULT_VOICE]:
+        t0 = time.time()
+        bank = get_bank(name)
+        bank.render()
+        print(f"✅ {name}: 대사 {len(PHRASES)}개 ({time.time() - t0:.1f}초) → {bank.dir}")
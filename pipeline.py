@@ -0,0 +1,387 @@
+# pipeline.py
+"""
+이벤트 기반 파이프라인 - 단계마다 전용 워커 스레드 + 단계 사이는 크기 제한 큐
+  capture → detect → emotion          (카메라: 최신 프레임만, 밀리면 오래된 것 버림)
+  listen → think → speak              (대화: 말하는 동안에도 다음 발화를 듣고 있음)
+- 단계 사이 상태(얼굴/감정/거리 등)는 SharedState 로 공유 (락 + 스냅샷)
+- 단계별 처리 시간(p50/p95), 처리/버림/에러 수, 큐 길이 → report()
+- barge-in: 로봇이 생각/말하는 중에 사용자가 말을 시작하면 그 턴을 취소
+  (LLM 생성 중단, 대기 중인 절 버림, 재생 중인 소리 즉시 정지) → 새 발화가 바로 다음 턴
+  재생 중에는 listen 에 playing() 을 넘겨서 로봇 자기 목소리로는 안 끊기게 (더 강한 기준)
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+ECHO_TAIL = 0.3   # 재생이 끝난 뒤에도 이만큼은 스피커 소리(장치 버퍼/잔향)가 들어온다고 봄
+
+
+class SharedState:
+    """여러 단계가 같이 보는 로봇 상태 (쓰기는 update, 읽기는 snapshot/get)"""
+
+    def __init__(self, **initial):
+        self._lock = threading.Lock()
+        self._values = dict(initial)
+
+    def update(self, **values):
+        with self._lock:
+            self._values.update(values)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._values.get(key, default)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+
+class BoundedQueue:
+    """크기 제한 큐 - 가득 차면 기다리거나(block) 가장 오래된 것을 버림(drop_oldest)"""
+
+    def __init__(self, name, maxsize=1, drop_oldest=False):
+        self.name = name
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+        self._q = queue.Queue(maxsize=maxsize)
+
+    def put(self, item, running=lambda: True):
+        if self.drop_oldest:
+            while True:
+                try:
+                    self._q.put_nowait(item)
+                    return True
+                except queue.Full:
+                    try:
+                        self._q.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        # 뒤 단계가 밀려 있으면 앞 단계도 기다림 (back-pressure)
+        while running():
+            try:
+                self._q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, timeout=0.2):
+        return self._q.get(timeout=timeout)
+
+    def clear(self):
+        while True:
+            try:
+                self._q.get_nowait()
+            except queue.Empty:
+                return
+
+    def qsize(self):
+        return self._q.qsize()
+
+
+class StageMetrics:
+    def __init__(self, name, window=200):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=window)   # 초
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.latencies.append(seconds)
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            lat = np.array(self.latencies) * 1000 if self.latencies else np.zeros(1)
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "p50_ms": float(np.percentile(lat, 50)),
+                "p95_ms": float(np.percentile(lat, 95)),
+            }
+
+
+class Stage:
+    """워커 1개: inbox 에서 꺼내 fn(item) 실행 → 결과를 outbox 로
+
+    - inbox 없음: 소스 단계 (fn() 을 계속 호출)
+    - fn 이 None 리턴: 다음 단계로 안 보냄
+    - fn 이 generator: 나오는 대로 하나씩 보냄 (LLM 절 단위 스트리밍)
+    처리 시간은 fn 계산 시간만 (뒤 큐를 기다린 시간 제외)
+    """
+
+    def __init__(self, pipeline, name, fn, inbox=None, outbox=None):
+        self.pipeline = pipeline
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.metrics = StageMetrics(name)
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self.thread.start()
+
+    def _emit(self, item):
+        if self.outbox is not None and item is not None:
+            self.outbox.put(item, lambda: self.pipeline.running)
+
+    def _run(self):
+        while self.pipeline.running:
+            if self.inbox is not None:
+                try:
+                    item = self.inbox.get()
+                except queue.Empty:
+                    continue
+                call = lambda: self.fn(item)
+            else:
+                call = self.fn
+
+            busy = 0.0
+            try:
+                t0 = time.perf_counter()
+                result = call()
+                busy += time.perf_counter() - t0
+                if hasattr(result, "__next__"):
+                    while True:
+                        t0 = time.perf_counter()
+                        try:
+                            out = next(result)
+                        except StopIteration:
+                            busy += time.perf_counter() - t0
+                            break
+                        busy += time.perf_counter() - t0
+                        self._emit(out)
+                else:
+                    self._emit(result)
+                if result is not None:
+                    self.metrics.record(busy)
+            except Exception as e:
+                self.metrics.error()
+                print(f"\n⚠️ [{self.name}] 단계 오류: {e}")
+                time.sleep(0.1)
+
+
+class Pipeline:
+    def __init__(self):
+        self.running = False
+        self.queues = {}
+        self.stages = []
+        self.turn_latencies = deque(maxlen=50)   # 말 끝 → 첫 소리 (초)
+        self.barge_ins = 0
+
+    def queue(self, name, maxsize=1, drop_oldest=False) -> BoundedQueue:
+        self.queues[name] = BoundedQueue(name, maxsize, drop_oldest)
+        return self.queues[name]
+
+    def stage(self, name, fn, inbox=None, outbox=None) -> Stage:
+        stage = Stage(self, name, fn, inbox, outbox)
+        self.stages.append(stage)
+        return stage
+
+    def start(self):
+        self.running = True
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self, timeout=1.0):
+        self.running = False
+        for stage in self.stages:
+            if stage.thread is not None:
+                stage.thread.join(timeout=timeout)
+
+    def report(self):
+        print("\n⏱️ 파이프라인 단계별 지표")
+        for stage in self.stages:
+            s = stage.metrics.summary()
+            inbox = stage.inbox
+            queue_info = f"큐 {inbox.qsize()} 버림 {inbox.dropped}" if inbox is not None else "소스"
+            print(f"   {stage.name:<8} {s['count']:5d}회  p50 {s['p50_ms']:7.1f}ms  "
+                  f"p95 {s['p95_ms']:7.1f}ms  에러 {s['errors']}  ({queue_info})")
+        if self.turn_latencies:
+            lat = np.array(self.turn_latencies) * 1000
+            print(f"   {'turn':<8} 말 끝 → 첫 소리 p50 {np.percentile(lat, 50):7.1f}ms  "
+                  f"p95 {np.percentile(lat, 95):7.1f}ms")
+        if self.barge_ins:
+            print(f"   {'barge-in':<8} {self.barge_ins:5d}회")
+
+
+class Utterance:
+    """listen → think: 인식된 말 + 말이 끝난 시각 (+ 이 턴 취소 신호)"""
+
+    def __init__(self, text, t_end):
+        self.text = text
+        self.t_end = t_end
+        self.cancelled = threading.Event()
+
+
+class Speech:
+    """think → speak: 읽을 절 (또는 미리 합성한 PCM) + 같은 턴 표시"""
+
+    def __init__(self, turn, text=None, audio=None, first=False):
+        self.turn = turn
+        self.text = text
+        self.audio = audio
+        self.first = first
+
+
+def robot_pipeline(state, frames, detect, emotion, listen, chat, synthesize, player,
+                   cache=None, emotion_interval=0.5):
+    """로봇 대화 파이프라인 조립
+
+    state      : SharedState (faces / face_detected / emotion 을 여기에 씀)
+    frames     : camera.subscribe() - 새 BGR 프레임
+    detect     : frame → 얼굴 박스 (꼬리/모터 제어 등은 여기서)
+    emotion    : (frame, faces) → 감정 라벨 (준비 안 됐으면 None)
+    listen     : (on_speech, playing) → (텍스트, 말 끝 시각) 또는 None (VAD 끝점 + STT)
+                 말이 시작되면 on_speech() 를 불러줘야 barge-in 이 됨
+                 playing() 이 True 인 동안 들린 소리는 발화로 돌려주면 안 됨 (로봇 자기 목소리)
+                 - 끼어들기로 판정된 말만 예외 (에코 제거가 생길 때까지는 마이크를 막는 셈)
+    chat       : (텍스트, 상태 스냅샷, 취소 Event) → 절 generator (Event 켜지면 생성 중단)
+                 응답이 실제 모델 출력이면 스냅샷에 ctx["from_model"] = True 로 표시
+                 (바쁨/준비중 같은 고정 대사, 오류 응답은 표시 안 함 → 캐시에 안 넣음)
+    synthesize : 텍스트 → (pcm, sample_rate)
+    player     : AudioPlayer (재생은 플레이어 스레드가 하고 speak 는 합성까지)
+    cache      : ResponseCache (있으면 think 에서 먼저 확인)
+    """
+    p = Pipeline()
+    detect_q = p.queue("detect", maxsize=1, drop_oldest=True)
+    emotion_q = p.queue("emotion", maxsize=1, drop_oldest=True)
+    think_q = p.queue("think", maxsize=2)
+    speak_q = p.queue("speak", maxsize=4)
+    last_emotion = [0.0]
+    current = [None]             # 지금 처리 중인 턴 (Utterance)
+    thinking = [False]
+    speaking = [False]
+    last_playing = [0.0]
+    speak_lock = threading.Lock()   # 취소 확인 ~ 재생 큐에 넣기 사이에 끼어들기 방지
+
+    def capture_stage():
+        return frames.next(timeout=0.5)
+
+    def detect_stage(frame):
+        faces = detect(frame)
+        state.update(faces=faces, face_detected=len(faces) > 0)
+        return (frame, faces) if len(faces) > 0 else None
+
+    def emotion_stage(item):
+        # 표정은 천천히 바뀜 → emotion_interval 마다 한 번만 분류
+        if time.time() - last_emotion[0] < emotion_interval:
+            return None
+        last_emotion[0] = time.time()
+        label = emotion(*item)
+        if label:
+            state.update(emotion=label)
+        return label
+
+    def barge_in():
+        """사용자가 말을 시작함 → 로봇이 생각/말하는 중이면 그 턴 취소"""
+        turn = current[0]
+        if turn is None or turn.cancelled.is_set():
+            return
+        if not (thinking[0] or speaking[0] or speak_q.qsize() or player.busy):
+            return
+        with speak_lock:
+            turn.cancelled.set()
+            think_q.clear()      # 밀려 있던 예전 발화도 새 발화로 대체
+            speak_q.clear()
+            player.interrupt()
+        p.barge_ins += 1
+        print("\n[✋ 끼어들기]: 하던 말 멈추고 듣는 중...")
+
+    def playing():
+        """로봇 소리가 나오는 중 (재생 직후 ECHO_TAIL 까지 포함)"""
+        if player.busy:
+            last_playing[0] = time.time()
+            return True
+        return time.time() - last_playing[0] < ECHO_TAIL
+
+    def listen_stage():
+        interrupted = [False]
+
+        def on_speech():
+            interrupted[0] = True
+            barge_in()
+
+        heard = listen(on_speech, playing)
+        if not heard or not heard[0].strip():
+            return None
+        if playing() and not interrupted[0]:
+            # 재생 중에 끝난 발화인데 끼어들기도 아님 → 로봇 자기 목소리를 받아 적은 것
+            print(f"\n[🔇 재생 중 소리 무시]: '{heard[0]}'")
+            return None
+        print(f"\n[💭 음성->텍스트]: '{heard[0]}'")
+        return Utterance(*heard)
+
+    def think_stage(utt):
+        current[0] = utt
+        thinking[0] = True
+        try:
+            yield from respond(utt)
+        finally:
+            thinking[0] = False
+
+    def respond(utt):
+        ctx = state.snapshot()
+        emotion_label = ctx.get("emotion", "neutral")
+        cached = cache.lookup(utt.text, emotion_label) if cache is not None else None
+        if cached is not None:
+            print(f"[🗂️ 캐시]: {cached.reply}")
+            yield Speech(utt, cached.reply, cache.audio(cached), first=True)
+            return
+        parts = []
+        chunks = chat(utt.text, ctx, utt.cancelled)
+        try:
+            for chunk in chunks:
+                if utt.cancelled.is_set():
+                    break
+                yield Speech(utt, chunk, first=not parts)
+                parts.append(chunk)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()      # 생성 중이던 LLM 요청 / 바이너리 정리
+        reply = " ".join(parts)
+        if utt.cancelled.is_set():
+            print(f"[🤖 로봇 (끊김)]: {reply}")
+            return           # 중간에 끊긴 응답은 캐시에 안 넣음
+        print(f"[🤖 로봇]: {reply}")
+        # 생성이 끝난 뒤에 판단 (시작 전 서버 상태가 아니라 실제로 모델이 답했는지)
+        if cache is not None and ctx.get("from_model"):
+            cache.put(utt.text, emotion_label, reply)
+
+    def speak_stage(speech):
+        if speech.turn.cancelled.is_set():
+            return None
+        speaking[0] = True
+        try:
+            audio = speech.audio or synthesize(speech.text)
+        finally:
+            speaking[0] = False
+        with speak_lock:
+            if speech.turn.cancelled.is_set():   # 합성하는 사이에 끼어들었으면 버림
+                return None
+            player.play(*audio)
+        if speech.first:
+            p.turn_latencies.append(time.time() - speech.turn.t_end)
+        return speech
+
+    p.stage("capture", capture_stage, outbox=detect_q)
+    p.stage("detect", detect_stage, detect_q, emotion_q)
+    p.stage("emotion", emotion_stage, emotion_q)
+    p.stage("listen", listen_stage, outbox=think_q)
+    p.stage("think", think_stage, think_q, speak_q)
+    p.stage("speak", speak_stage, speak_q)
+    return p
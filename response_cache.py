@@ -0,0 +1,197 @@
+# response_cache.py
+"""
+응답 캐시 - LLM 앞단에서 자주 나오는 말은 바로 대답
+- 키: 정규화한 텍스트 + 감정 (공백/문장부호/이모지/늘어진 글자 제거, 소문자)
+- 고정 인텐트(인사, 애정 표현 등): 만료 없음, 시작할 때 음성까지 미리 합성
+- LLM 응답: TTL + LRU (같은 말을 같은 감정으로 또 하면 LLM 건너뜀)
+- 선택적 fuzzy 매칭 (difflib 유사도) - "안녕하세여" 같은 STT 오타도 히트
+  (길이가 비슷한 4글자 이상 키끼리만, 부정 표현 "안/못/싫/not" 이 다르면 매칭 안 함)
+- 히트한 응답은 합성해 둔 PCM 재사용 → TTS 도 건너뜀
+- hits / misses / 히트율은 stats() / report() 로 확인
+"""
+
+import difflib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+TTL_SECONDS = 600
+MAX_ENTRIES = 128
+MAX_KEY_CHARS = 30        # 이보다 긴 말은 다시 나올 일이 거의 없어서 캐시 안 함
+FUZZY_RATIO = 0.8         # None 이면 fuzzy 매칭 끔
+FUZZY_MIN_CHARS = 4       # 이보다 짧은 말은 fuzzy 안 함 ("he" → "hey", "하이킹" → "하이" 방지)
+FUZZY_LENGTH_RATIO = 0.8  # 길이가 비슷한 키끼리만 비교
+
+# companion_robot.local_chat 규칙 기반 응답과 같은 대사
+INTENTS = {
+    "greeting": (["안녕", "안녕하세요", "안녕 모모", "하이", "hi", "hello", "hey"],
+                 "🐕 안녕하세요 주인님! 오늘도 화이팅! 💕"),
+    "love": (["사랑해", "좋아해", "귀여워", "너무 귀여워", "사랑해 모모"],
+             "🥰 저도 주인님 사랑해요! 🐾"),
+}
+
+_NOISE = re.compile(r"[^\w가-힣]+")
+_REPEAT = re.compile(r"(.)\1{2,}")
+# 정규화한 텍스트 기준 부정 표현 ("don't" → "don t")
+_NEGATION = re.compile(r"(?:^| )(?:안|못|not|no|never|dont|cannot)(?: |$)|싫|않|\wn t(?: |$)")
+
+
+def normalize(text: str) -> str:
+    """캐시 키용 정규화 ("안녕~~!!" / "안녕 " / "안녕" → "안녕")"""
+    text = _NOISE.sub(" ", text.lower()).strip()
+    text = _REPEAT.sub(r"\1", text)
+    return " ".join(text.split())
+
+
+def negated(key: str) -> bool:
+    """정규화한 키에 부정 표현이 있는지 ("너무 안 귀여워" 가 "너무 귀여워" 로 매칭되면 안 됨)"""
+    return _NEGATION.search(key) is not None
+
+
+class CacheEntry:
+    def __init__(self, reply, intent=None, ttl=None):
+        self.reply = reply
+        self.intent = intent
+        self.expires = time.time() + ttl if ttl else None
+        self.hits = 0
+        self.audio = None        # (int16 PCM, sample_rate) - 처음 읽을 때 / warm() 때 합성
+
+    @property
+    def expired(self):
+        return self.expires is not None and time.time() > self.expires
+
+
+class ResponseCache:
+    def __init__(self, synthesize=None, ttl=TTL_SECONDS, max_entries=MAX_ENTRIES,
+                 fuzzy=FUZZY_RATIO, intents=INTENTS):
+        self.synthesize = synthesize   # text → (pcm, sample_rate), 없으면 음성 캐시 안 함
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.fuzzy = fuzzy
+        self._entries = OrderedDict()  # (정규화 텍스트, 감정) → CacheEntry
+        self._intents = {}             # 정규화 문구 → CacheEntry (만료/LRU 없음)
+        self._lock = threading.Lock()
+        self.stats_counts = {"hits": 0, "intent_hits": 0, "fuzzy_hits": 0,
+                             "misses": 0, "expired": 0, "evicted": 0}
+        for name, (phrases, reply) in intents.items():
+            entry = CacheEntry(reply, intent=name)
+            for phrase in phrases:
+                self._intents[normalize(phrase)] = entry
+
+    # ==============================
+    # 조회 / 저장
+    # ==============================
+    def _fuzzy_find(self, key, candidates):
+        """오타 정도만 허용 - 길이가 비슷하고 충분히 긴 키, 부정 여부가 같은 키끼리만"""
+        if not self.fuzzy or len(key) < FUZZY_MIN_CHARS:
+            return None
+        neg = negated(key)
+        candidates = [c for c in candidates
+                      if len(c) >= FUZZY_MIN_CHARS
+                      and min(len(c), len(key)) / max(len(c), len(key)) >= FUZZY_LENGTH_RATIO
+                      and negated(c) == neg]
+        best = difflib.get_close_matches(key, candidates, n=1, cutoff=self.fuzzy)
+        return best[0] if best else None
+
+    def lookup(self, text: str, emotion: str = None):
+        """캐시된 CacheEntry (없으면 None) - 인텐트 → 정확히 일치 → fuzzy 순"""
+        key = normalize(text)
+        if not key:
+            return None
+        with self._lock:
+            entry = self._intents.get(key)
+            if entry is not None:
+                return self._hit(entry, "intent_hits")
+
+            entry = self._entries.get((key, emotion))
+            if entry is not None and entry.expired:
+                del self._entries[(key, emotion)]
+                self.stats_counts["expired"] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end((key, emotion))
+                return self._hit(entry)
+
+            match = self._fuzzy_find(key, list(self._intents))
+            if match is not None:
+                return self._hit(self._intents[match], "fuzzy_hits")
+            same_emotion = [k for (k, e) in self._entries if e == emotion]
+            match = self._fuzzy_find(key, same_emotion)
+            if match is not None and not self._entries[(match, emotion)].expired:
+                self._entries.move_to_end((match, emotion))
+                return self._hit(self._entries[(match, emotion)], "fuzzy_hits")
+
+            self.stats_counts["misses"] += 1
+            return None
+
+    def _hit(self, entry, counter="hits"):
+        entry.hits += 1
+        self.stats_counts[counter] += 1
+        return entry
+
+    def put(self, text: str, emotion: str, reply: str):
+        """LLM 응답 저장 (짧은 말만, TTL 지나면 만료)"""
+        key = normalize(text)
+        if not key or not reply or len(key) > MAX_KEY_CHARS or key in self._intents:
+            return
+        with self._lock:
+            self._entries[(key, emotion)] = CacheEntry(reply, ttl=self.ttl)
+            self._entries.move_to_end((key, emotion))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats_counts["evicted"] += 1
+
+    # ==============================
+    # 미리 합성한 음성
+    # ==============================
+    def audio(self, entry):
+        """응답 PCM (처음이면 합성해서 보관) → (pcm, sample_rate) 또는 None"""
+        if entry.audio is None and self.synthesize is not None:
+            entry.audio = self.synthesize(entry.reply)
+        return entry.audio
+
+    def warm(self, background=True):
+        """고정 인텐트 응답 음성을 미리 합성 (첫 히트부터 TTS 없이 바로 재생)"""
+        def run():
+            for entry in {id(e): e for e in self._intents.values()}.values():
+                try:
+                    self.audio(entry)
+                except Exception as e:
+                    print(f"⚠️ 응답 음성 미리 합성 실패: {e}")
+
+        if background:
+            threading.Thread(target=run, name="response-cache-warm", daemon=True).start()
+        else:
+            run()
+
+    # ==============================
+    # 지표
+    # ==============================
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.stats_counts)
+            counts["entries"] = len(self._entries)
+        hits = counts["hits"] + counts["intent_hits"] + counts["fuzzy_hits"]   # 히트마다 한 곳에만 셈
+        total = hits + counts["misses"]
+        counts["hit_rate"] = hits / total if total else 0.0
+        return counts
+
+    def report(self):
+        s = self.stats()
+        print(f"🗂️ 응답 캐시: 히트율 {s['hit_rate'] * 100:.0f}% "
+              f"(인텐트 {s['intent_hits']}, 캐시 {s['hits']}, fuzzy {s['fuzzy_hits']}, "
+              f"미스 {s['misses']}) 항목 {s['entries']}개")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache(synthesize=None) -> ResponseCache:
+    """프로세스 전체에서 공유하는 응답 캐시"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(synthesize)
+        return _cache
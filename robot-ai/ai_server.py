@@ -1,39 +1,208 @@
-import socket, json
-from emotion import get_current_emotion
+import asyncio, json, threading
+from concurrent.futures import ThreadPoolExecutor
+import protocol
+from protocol import read_frame_async, encode_frame
+from emotion import get_face_emotion
 from stt import stt_from_mic
 from tts import tts_play
-from llm import local_chat
+from llm import local_chat, local_chat_stream
+from llm_backend import get_backend as get_llm_backend
+from voice_registry import preload as preload_voices
 
 HOST = "0.0.0.0"
 PORT = 5000
+# 요청 1개 최대 처리 시간 (초)
+# 시간 초과 / 연결 끊김으로 코루틴을 취소해도 executor 스레드의 작업은 멈추지 않음
+# → LLM 은 cancel 이벤트로 알려서 다음 토큰에서 멈추게 함 (그때까지는 LLM executor 를 계속 차지)
+#   감정 추론은 짧아서 그냥 끝까지 돌고 결과만 버림
+REQUEST_TIMEOUT = 20.0
+READ_TIMEOUT = 5.0
+IDLE_TIMEOUT = 60.0      # 이 시간 동안 프레임(요청/PING) 없으면 연결 정리
+TTS_QUEUE_SIZE = 4
 
-sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-sock.bind((HOST, PORT))
-sock.listen(1)
+# 모델별 전용 executor (LLM 은 동시에 하나만, 감정/TTS 는 따로)
+llm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
+emotion_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emotion")
+tts_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
 
-print("🤖 robot-ai 서버 시작")
+tts_queue = None
 
-while True:
-    conn, addr = sock.accept()
-    print("연결:", addr)
 
-    data = conn.recv(4096).decode()
-    req = json.loads(data)
+async def process(req):
+    """감정 + LLM 추론 (executor 에서 실행, 이벤트 루프는 안 막힘)"""
+    loop = asyncio.get_running_loop()
+    cancel = threading.Event()
+    try:
+        emotion = await loop.run_in_executor(emotion_executor, get_face_emotion, req.get("face"))
+        reply = await loop.run_in_executor(
+            llm_executor,
+            local_chat,
+            req.get("text", ""),
+            emotion,
+            req.get("face_detected", False),
+            req.get("distance", 999),
+            cancel,
+        )
+    finally:
+        cancel.set()   # 취소(시간 초과 / 연결 끊김)됐으면 LLM 스레드도 다음 토큰에서 멈춤
+    return {
+        "emotion": emotion,
+        "reply": reply
+    }
+
+
+async def tts_worker():
+    """응답 경로와 분리된 TTS - 큐에 쌓인 대사를 순서대로 읽음"""
+    loop = asyncio.get_running_loop()
+    while True:
+        reply = await tts_queue.get()
+        try:
+            await loop.run_in_executor(tts_executor, tts_play, reply)
+        except Exception as e:
+            print("⚠️ TTS 실패:", e)
+
+
+def speak_later(reply):
+    try:
+        tts_queue.put_nowait(reply)
+    except asyncio.QueueFull:
+        print("⚠️ TTS 큐 가득 참, 대사 생략:", reply)
 
-    # AI 처리
-    emotion = get_current_emotion()
-    reply = local_chat(
-        req.get("text", ""),
-        emotion,
-        req.get("face_detected", False),
-        req.get("distance", 999)
-    )
 
-    res = {
+async def process_stream(req, send_partial):
+    """감정 + LLM 스트리밍 - 절이 하나 나올 때마다 send_partial(절)"""
+    loop = asyncio.get_running_loop()
+    emotion = await loop.run_in_executor(emotion_executor, get_face_emotion, req.get("face"))
+    chunks = asyncio.Queue()
+    cancel = threading.Event()
+
+    def generate():
+        try:
+            for chunk in local_chat_stream(
+                req.get("text", ""), emotion,
+                req.get("face_detected", False), req.get("distance", 999), cancel,
+            ):
+                loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+        finally:
+            loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+    gen = loop.run_in_executor(llm_executor, generate)
+    parts = []
+    try:
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                break
+            parts.append(chunk)
+            await send_partial({"emotion": emotion, "chunk": chunk})
+        await gen
+    finally:
+        cancel.set()   # 시간 초과 / 연결 끊김 / 전송 실패 → LLM 스레드도 다음 토큰에서 멈춤
+    return {
         "emotion": emotion,
-        "reply": reply
+        "reply": " ".join(parts)
     }
 
-    conn.send(json.dumps(res).encode())
-    tts_play(reply)
-    conn.close()
\ No newline at end of file
+
+class Connection:
+    """연결 1개 - 요청 ID 별로 동시에 처리 (multiplexing)"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.addr = writer.get_extra_info("peername")
+        self.write_lock = asyncio.Lock()
+        self.tasks = {}
+
+    async def send(self, ftype, req_id, obj=None):
+        async with self.write_lock:
+            self.writer.write(encode_frame(ftype, req_id, obj))
+            await self.writer.drain()
+
+    async def run_request(self, req_id, req):
+        try:
+            if req.get("stream"):
+                send_partial = lambda obj: self.send(protocol.PARTIAL, req_id, obj)
+                res = await asyncio.wait_for(process_stream(req, send_partial), REQUEST_TIMEOUT)
+            else:
+                res = await asyncio.wait_for(process(req), REQUEST_TIMEOUT)
+            await self.send(protocol.RESPONSE, req_id, res)
+            if res.get("reply") and req.get("speak", True):
+                speak_later(res["reply"])
+        except asyncio.TimeoutError:
+            await self.send(protocol.ERROR, req_id, {"error": "timeout"})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self.send(protocol.ERROR, req_id, {"error": str(e)})
+        finally:
+            self.tasks.pop(req_id, None)
+
+    async def serve(self, first):
+        header = first
+        while True:
+            ftype, req_id, obj = await asyncio.wait_for(
+                read_frame_async(self.reader, header), IDLE_TIMEOUT
+            )
+            header = None
+            if ftype == protocol.REQUEST:
+                self.tasks[req_id] = asyncio.create_task(self.run_request(req_id, obj or {}))
+            elif ftype == protocol.PING:
+                await self.send(protocol.PONG, req_id)
+
+    def cancel_all(self):
+        # 연결이 끊기면 처리 중이던 요청 모두 취소
+        for task in list(self.tasks.values()):
+            task.cancel()
+
+
+async def handle_legacy(reader, writer, first):
+    """예전 클라이언트: JSON 한 덩어리 보내고 JSON 한 덩어리 받음"""
+    data = first + await asyncio.wait_for(reader.read(4096), READ_TIMEOUT)
+    req = json.loads(data.decode())
+    res = await asyncio.wait_for(process(req), REQUEST_TIMEOUT)
+    writer.write(json.dumps(res).encode())
+    await writer.drain()
+    if res.get("reply"):
+        speak_later(res["reply"])
+
+
+async def handle(reader, writer):
+    conn = Connection(reader, writer)
+    print("연결:", conn.addr)
+    try:
+        first = await asyncio.wait_for(reader.read(1), IDLE_TIMEOUT)
+        if not first:
+            return
+        if first == b"{":
+            await handle_legacy(reader, writer, first)
+        else:
+            await conn.serve(first)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    except (asyncio.TimeoutError, json.JSONDecodeError, protocol.ProtocolError) as e:
+        print("⚠️ 요청 처리 실패:", conn.addr, e)
+    finally:
+        conn.cancel_all()
+        writer.close()
+        print("연결 종료:", conn.addr)
+
+
+async def main():
+    global tts_queue
+    tts_queue = asyncio.Queue(maxsize=TTS_QUEUE_SIZE)
+    asyncio.create_task(tts_worker())
+
+    server = await asyncio.start_server(handle, HOST, PORT)
+    print("🤖 robot-ai 서버 시작 (asyncio, 프레임 프로토콜 + 예전 JSON 호환)")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    preload_voices("amy")
+    get_llm_backend()   # 첫 요청이 모델 로딩을 기다리지 않게 미리 로드
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("👋 robot-ai 서버 종료")
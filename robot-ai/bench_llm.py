@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+LLM 백엔드 CPU 성능 벤치마크 (local_chat 과 같은 프롬프트/생성 길이)
+- legacy      : 예전 설정 (fp16 + bitsandbytes 8bit) - CPU 에서 로딩 실패하면 실패로 표시
+- int8-nocache: torch 동적 int8, prefix KV cache 없이
+- int8        : torch 동적 int8 + prefix KV cache
+- gguf        : llama.cpp GGUF
+- int8-session: int8 + 대화 세션 KV 유지 (턴마다 새 토큰만 계산, 기록이 쌓이는 멀티턴)
+
+사용법: python bench_llm.py [반복횟수] [백엔드 ...]
+"""
+
+import sys
+import time
+
+from transformers import AutoTokenizer
+
+import llm_backend
+from chat_session import KvChatSession
+from llm import build_prompt, build_user_line
+
+PROMPTS = [
+    ("hello momo!", "happy", True, 0.5),
+    ("what are you doing?", "neutral", True, 1.2),
+    ("I am a bit sad today", "sad", True, 0.8),
+    ("let's play", "surprise", False, None),
+]
+MAX_NEW_TOKENS = 30
+
+VARIANTS = {
+    "legacy": lambda: llm_backend.LegacyBackend(),
+    "int8-nocache": lambda: llm_backend.TorchInt8Backend(use_prefix_cache=False),
+    "int8": lambda: llm_backend.TorchInt8Backend(),
+    "gguf": lambda: llm_backend.GgufBackend(),
+    "int8-session": lambda: llm_backend.TorchInt8Backend(),
+}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(name, n, tokenizer):
+    t0 = time.perf_counter()
+    try:
+        backend = VARIANTS[name]()
+    except Exception as e:
+        print(f"  {name:<13} 로딩 실패: {e}")
+        return
+    load_s = time.perf_counter() - t0
+
+    session = None
+    if name.endswith("-session"):
+        session = KvChatSession(backend, prefix=llm_backend.SYSTEM_PREFIX)
+
+    first_ms, tok_s = [], []
+    for i in range(n):
+        t0 = time.perf_counter()
+        if session is not None:
+            fragments = session.stream(build_user_line(*PROMPTS[i % len(PROMPTS)]), MAX_NEW_TOKENS, 0.8)
+        else:
+            fragments = backend.stream(build_prompt(*PROMPTS[i % len(PROMPTS)]), MAX_NEW_TOKENS, 0.8)
+        t_first = None
+        text = ""
+        for frag in fragments:
+            if t_first is None and frag:
+                t_first = time.perf_counter()
+            text += frag
+        total = time.perf_counter() - t0
+        tokens = len(tokenizer(text).input_ids) if text else 0
+        first_ms.append(((t_first or time.perf_counter()) - t0) * 1000)
+        tok_s.append(tokens / total if total > 0 else 0.0)
+
+    print(f"  {name:<13} 로딩 {load_s:5.1f}s  첫 토큰 p50 {percentile(first_ms, 50):7.1f}ms  "
+          f"p95 {percentile(first_ms, 95):7.1f}ms  {sum(tok_s) / len(tok_s):6.1f} tok/s")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    names = sys.argv[2:] or list(VARIANTS)
+    tokenizer = AutoTokenizer.from_pretrained(llm_backend.MODEL_NAME)
+
+    print(f"🧪 LLM 벤치마크: 반복 {n}회, 최대 {MAX_NEW_TOKENS} 토큰, 스레드 {llm_backend.LLM_THREADS}")
+    for name in names:
+        run(name, n, tokenizer)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,12 @@
 import random
 
 try:
-    from transformers import AutoImageProcessor, AutoModelForImageClassification
-    import torch
     from PIL import Image
+    import numpy as np
+    import cv2
+    from emotion_service import get_service
+    from protocol import unpack_bytes
 
-    MODEL_NAME = "HardlyHumans/Facial-expression-detection"
-    processor = AutoImageProcessor.from_pretrained(MODEL_NAME)
-    model = AutoModelForImageClassification.from_pretrained(MODEL_NAME)
     EMOTION_AVAILABLE = True
 except Exception as e:
     print("⚠️ Emotion 모델 로드 실패:", e)
@@ -16,6 +15,17 @@ except Exception as e:
 
 EMOTIONS = ["happy", "sad", "neutral", "angry", "surprise"]
 
+def get_emotions(images) -> list:
+    """얼굴 crop 이미지(경로 또는 RGB 배열) 여러 장 → [(라벨, 확률), ...] 배치 추론"""
+    if not EMOTION_AVAILABLE or not images:
+        return []
+
+    rgb = [
+        np.asarray(Image.open(img).convert("RGB")) if isinstance(img, str) else img
+        for img in images
+    ]
+    return [(label.lower(), conf) for label, conf in get_service().classify(rgb)]
+
 def get_current_emotion(image_path: str = None) -> str:
     """
     image_path: 얼굴 이미지 파일 경로 (없으면 랜덤/중립 fallback)
@@ -24,12 +34,28 @@ def get_current_emotion(image_path: str = None) -> str:
         return random.choice(EMOTIONS)
 
     try:
-        img = Image.open(image_path).convert("RGB")
-        inputs = processor(images=img, return_tensors="pt")
-        with torch.no_grad():
-            outputs = model(**inputs)
-        pred = outputs.logits.argmax(-1).item()
-        return model.config.id2label[pred].lower()
+        return get_emotions([image_path])[0][0]
+    except Exception as e:
+        print("⚠️ Emotion 추론 실패:", e)
+        return "neutral"
+
+def decode_face(face: dict):
+    """robot-core 가 보낸 얼굴 crop → RGB 배열"""
+    data = unpack_bytes(face["data"])
+    if face.get("format") == "gray":
+        h, w = face["shape"]
+        gray = np.frombuffer(data, dtype=np.uint8).reshape(h, w)
+        return cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+    bgr = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+def get_face_emotion(face: dict = None) -> str:
+    """원격 얼굴 crop 의 감정 (crop 없으면 기존 fallback)"""
+    if not EMOTION_AVAILABLE or not face:
+        return get_current_emotion()
+
+    try:
+        return get_emotions([decode_face(face)])[0][0]
     except Exception as e:
         print("⚠️ Emotion 추론 실패:", e)
-        return "neutral"
\ No newline at end of file
+        return "neutral"
@@ -0,0 +1,270 @@
+# emotion_service.py
+"""
+표정 분류 서비스 - 모델은 프로세스당 한 번만 로드
+- Haar 얼굴 박스로 잘라낸 얼굴 crop 만 분류 (전체 프레임 X)
+- 여러 얼굴/프레임을 한 번의 forward 로 배치 추론
+- 얼굴마다 (라벨, 확률) 리턴
+- 백엔드: torch (fp32) / onnx (int8 양자화, EMOTION_BACKEND=onnx)
+"""
+
+import json
+import os
+import threading
+
+import cv2
+import numpy as np
+
+MODEL_NAME = "HardlyHumans/Facial-expression-detection"
+DEVICE = "cpu"
+EMOTION_BACKEND = os.environ.get("EMOTION_BACKEND", "torch")   # "torch" / "onnx"
+ONNX_CACHE_DIR = os.path.expanduser("~/.cache/momo/emotion")
+ONNX_THREADS = 4
+FACE_MARGIN = 0.2   # 얼굴 박스 주변 여유 (턱/이마 포함)
+MAX_BATCH = 8
+
+
+def crop_faces(frame, boxes, margin=FACE_MARGIN):
+    """BGR 프레임 + (x, y, w, h) 박스들 → RGB 얼굴 crop 리스트"""
+    h_img, w_img = frame.shape[:2]
+    crops = []
+    for (x, y, w, h) in boxes:
+        mx, my = int(w * margin), int(h * margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(w_img, x + w + mx), min(h_img, y + h + my)
+        crop = frame[y0:y1, x0:x1]
+        if crop.ndim == 2:
+            crop = cv2.cvtColor(crop, cv2.COLOR_GRAY2RGB)
+        else:
+            crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        crops.append(crop)
+    return crops
+
+
+class TorchBackend:
+    """transformers + PyTorch fp32 (기존 방식)"""
+    name = "torch"
+
+    def __init__(self, model_name=MODEL_NAME):
+        from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+        self.processor = AutoImageProcessor.from_pretrained(model_name)
+        self.model = AutoModelForImageClassification.from_pretrained(model_name).to(DEVICE)
+        self.model.eval()
+        self.id2label = self.model.config.id2label
+
+    def predict(self, images):
+        """이미지 배치 → 확률 (N, num_labels) numpy"""
+        import torch
+
+        inputs = self.processor(images=images, return_tensors="pt").to(DEVICE)
+        with torch.no_grad():
+            probs = torch.softmax(self.model(**inputs).logits, dim=-1)
+        return probs.numpy()
+
+
+class OnnxBackend:
+    """ONNX Runtime + 동적 int8 양자화 (torch 없이 추론)
+
+    처음 한 번만 PyTorch 모델을 ONNX 로 내보내고 int8 로 양자화해서 디스크에 캐시,
+    그 다음부터는 onnxruntime 만 사용 (Piper 가 이미 onnxruntime 을 씀)
+    전처리(크기/mean/std)도 내보낼 때 같이 저장 → 추론은 cv2/numpy 로 (transformers/torch import 없음)
+    """
+    name = "onnx"
+
+    def __init__(self, model_name=MODEL_NAME, cache_dir=ONNX_CACHE_DIR, threads=ONNX_THREADS):
+        import onnxruntime as ort
+
+        int8_path, labels_path, preprocess_path = self.export(model_name, cache_dir)
+        with open(labels_path) as f:
+            self.id2label = {int(k): v for k, v in json.load(f).items()}
+        with open(preprocess_path) as f:
+            pre = json.load(f)
+        self.input_size = (pre["width"], pre["height"])
+        self.rescale = pre["rescale_factor"]
+        self.mean = np.array(pre["image_mean"], dtype=np.float32)
+        self.std = np.array(pre["image_std"], dtype=np.float32)
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(int8_path, opts, providers=["CPUExecutionProvider"])
+
+    @staticmethod
+    def export(model_name=MODEL_NAME, cache_dir=ONNX_CACHE_DIR):
+        """ONNX 내보내기 + int8 양자화 (캐시 있으면 건너뜀) → (int8 경로, 라벨 경로, 전처리 경로)"""
+        base = os.path.join(cache_dir, model_name.replace("/", "__"))
+        fp32_path, int8_path, labels_path = base + ".onnx", base + ".int8.onnx", base + ".labels.json"
+        preprocess_path = base + ".preprocess.json"
+        if os.path.exists(int8_path) and os.path.exists(labels_path):
+            if not os.path.exists(preprocess_path):
+                OnnxBackend.export_preprocess(model_name, preprocess_path)   # 예전 캐시
+            return int8_path, labels_path, preprocess_path
+
+        import torch
+        from transformers import AutoModelForImageClassification
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        os.makedirs(cache_dir, exist_ok=True)
+        print("🔧 표정 모델 ONNX 내보내기 + int8 양자화 (최초 1회)...")
+        model = AutoModelForImageClassification.from_pretrained(model_name).eval()
+        model.config.return_dict = False
+        size = model.config.image_size if hasattr(model.config, "image_size") else 224
+        dummy = torch.zeros(1, 3, size, size)
+        torch.onnx.export(
+            model, (dummy,), fp32_path,
+            input_names=["pixel_values"], output_names=["logits"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=17,
+        )
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        os.remove(fp32_path)
+        with open(labels_path, "w") as f:
+            json.dump({int(k): v for k, v in model.config.id2label.items()}, f)
+        OnnxBackend.export_preprocess(model_name, preprocess_path)
+        return int8_path, labels_path, preprocess_path
+
+    @staticmethod
+    def export_preprocess(model_name, path):
+        """AutoImageProcessor 설정 중 추론에 필요한 값만 json 으로 (내보낼 때 한 번만)"""
+        from transformers import AutoImageProcessor
+
+        processor = AutoImageProcessor.from_pretrained(model_name)
+        size = processor.size
+        height = size.get("height", size.get("shortest_edge", 224))
+        width = size.get("width", size.get("shortest_edge", 224))
+        pre = {
+            "height": height,
+            "width": width,
+            "rescale_factor": processor.rescale_factor if processor.do_rescale else 1.0,
+            "image_mean": list(processor.image_mean) if processor.do_normalize else [0.0, 0.0, 0.0],
+            "image_std": list(processor.image_std) if processor.do_normalize else [1.0, 1.0, 1.0],
+        }
+        with open(path, "w") as f:
+            json.dump(pre, f)
+
+    def preprocess(self, images):
+        """RGB 이미지 리스트 → (N, 3, H, W) float32 (resize → rescale → normalize)"""
+        batch = np.stack([
+            cv2.resize(np.asarray(img), self.input_size, interpolation=cv2.INTER_LINEAR)
+            for img in images
+        ]).astype(np.float32)
+        batch = (batch * self.rescale - self.mean) / self.std
+        return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+    def predict(self, images):
+        logits = self.session.run(["logits"], {"pixel_values": self.preprocess(images)})[0]
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+
+BACKENDS = {
+    "torch": TorchBackend,
+    "onnx": OnnxBackend,
+}
+
+
+class EmotionService:
+    def __init__(self, model_name=MODEL_NAME, max_batch=MAX_BATCH, backend=EMOTION_BACKEND):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.backend_name = backend
+        self.backend = None
+        self.id2label = None
+        self._load_lock = threading.Lock()
+        self._infer_lock = threading.Lock()
+
+    def load(self):
+        """모델 로드 (처음 한 번만, 여러 스레드가 동시에 불러도 안전)"""
+        with self._load_lock:
+            if self.backend is not None:
+                return
+            print(f"📦 표정 모델 로딩 중... ({self.backend_name})")
+            self.backend = BACKENDS[self.backend_name](self.model_name)
+            self.id2label = self.backend.id2label
+
+    def classify(self, images):
+        """RGB 이미지(numpy 또는 PIL) 리스트 → [(라벨, 확률), ...] 배치 추론"""
+        if not images:
+            return []
+        self.load()
+
+        results = []
+        with self._infer_lock:
+            for i in range(0, len(images), self.max_batch):
+                probs = self.backend.predict(images[i:i + self.max_batch])
+                pred = probs.argmax(axis=-1)
+                results.extend(
+                    (self.id2label[int(p)], float(probs[j, p])) for j, p in enumerate(pred)
+                )
+        return results
+
+    def classify_faces(self, frame, boxes, margin=FACE_MARGIN):
+        """BGR 프레임 + Haar 박스 → 얼굴마다 (라벨, 확률)"""
+        if frame is None or len(boxes) == 0:
+            return []
+        return self.classify(crop_faces(frame, boxes, margin))
+
+    def classify_frames(self, frames_and_boxes, margin=FACE_MARGIN):
+        """여러 프레임의 얼굴들을 한 번에 → 프레임별 [(라벨, 확률), ...]"""
+        crops, counts = [], []
+        for frame, boxes in frames_and_boxes:
+            faces = crop_faces(frame, boxes, margin) if frame is not None else []
+            crops.extend(faces)
+            counts.append(len(faces))
+        flat = self.classify(crops)
+        out, pos = [], 0
+        for n in counts:
+            out.append(flat[pos:pos + n])
+            pos += n
+        return out
+
+
+def largest_face(boxes):
+    """박스 중 가장 큰 얼굴의 인덱스 (없으면 None)"""
+    if len(boxes) == 0:
+        return None
+    return int(np.argmax([w * h for (_, _, w, h) in boxes]))
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> EmotionService:
+    """프로세스 전체에서 공유하는 표정 서비스"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmotionService()
+        return _service
+
+
+def check_parity(images, min_agreement=0.95):
+    """PyTorch fp32 vs ONNX int8 정확도 비교 → (top-1 일치율, 최대 확률 차이)"""
+    torch_backend = TorchBackend()
+    onnx_backend = OnnxBackend()
+    p_torch = np.concatenate([torch_backend.predict(images[i:i + MAX_BATCH])
+                              for i in range(0, len(images), MAX_BATCH)])
+    p_onnx = np.concatenate([onnx_backend.predict(images[i:i + MAX_BATCH])
+                             for i in range(0, len(images), MAX_BATCH)])
+    agreement = float((p_torch.argmax(-1) == p_onnx.argmax(-1)).mean())
+    max_diff = float(np.abs(p_torch - p_onnx).max())
+    print(f"📊 top-1 일치율: {agreement * 100:.1f}% ({len(images)}장), 최대 확률 차이: {max_diff:.3f}")
+    if agreement < min_agreement:
+        print(f"⚠️ 일치율이 기준({min_agreement * 100:.0f}%)보다 낮음 - torch 백엔드 유지 권장")
+    return agreement, max_diff
+
+
+if __name__ == "__main__":
+    # 사용법: python emotion_service.py <얼굴 이미지 폴더>
+    import sys
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else "."
+    paths = [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+             if f.lower().endswith((".jpg", ".jpeg", ".png"))]
+    images = [cv2.cvtColor(cv2.imread(p), cv2.COLOR_BGR2RGB) for p in paths]
+    if not images:
+        print("이미지 없음")
+    else:
+        OnnxBackend.export()
+        check_parity(images)
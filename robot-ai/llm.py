@@ -1,26 +1,43 @@
-from transformers import pipeline, AutoModelForCausalLM, AutoTokenizer
-import torch
-
-# 모델 로드 (8bit 양자화 적용)
-model_name = "gpt2"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForCausalLM.from_pretrained(
-    model_name,
-    torch_dtype=torch.float16,
-    quantization_config={"load_in_8bit": True},  # bitsandbytes 자동 적용
-    device_map="auto"
-)
-
-chat_pipeline = pipeline(
-    "text-generation",
-    model=model,
-    tokenizer=tokenizer,
-)
-
-def local_chat(user_text, emotion=None, face_detected=False, distance=None):
-    if not user_text:
-        return "woof woof"
+import threading
+from llm_stream import sentence_chunks
+from llm_backend import get_backend, SYSTEM_PREFIX
+from chat_session import ChatSession, KvChatSession
+
+# CPU 백엔드 (LLM_BACKEND=int8 / gguf / legacy) - 처음 쓸 때 한 번만 로드
+# 대화는 세션 1개에 이어서 쌓음 → 새 턴의 토큰만 계산
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            backend = get_backend()
+            if hasattr(backend, "stream_state"):
+                _session = KvChatSession(backend, prefix=SYSTEM_PREFIX, bot_tag="Robot:")
+            else:
+                _session = ChatSession(prefix=SYSTEM_PREFIX, bot_tag="Robot:")
+        return _session
 
+def reset_session():
+    """대화 기록 비우기 (다음 턴은 고정 prefix 부터)"""
+    get_session().reset()
+
+def chat_stream(user_line, max_new_tokens=30, temperature=0.8, cancel=None):
+    """세션에 사용자 줄 1개 추가 → 응답 토큰 조각
+
+    cancel(threading.Event): 켜지면 다음 토큰에서 생성 중단 (이미 켜져 있으면 시작도 안 함)
+    """
+    if cancel is not None and cancel.is_set():
+        return iter(())
+    session = get_session()
+    if isinstance(session, KvChatSession):
+        return session.stream(user_line, max_new_tokens, temperature, cancel=cancel)
+    backend = get_backend()
+    return session.stream(
+        lambda prompt: backend.stream(prompt, max_new_tokens, temperature, cancel=cancel), user_line)
+
+def build_user_line(user_text, emotion=None, face_detected=False, distance=None):
     # 간결한 컨텍스트로 변경
     context_parts = []
     if emotion:
@@ -31,13 +48,35 @@ def local_chat(user_text, emotion=None, face_detected=False, distance=None):
         context_parts.append(f"distance={distance:.1f}m")
 
     context = ", ".join(context_parts)
-    prompt = f"[{context}] User: {user_text}\nRobot:"
-    
-    res = chat_pipeline(
-        prompt,
+    return f"[{context}] User: {user_text}"
+
+def build_prompt(user_text, emotion=None, face_detected=False, distance=None):
+    """기록 없는 한 턴짜리 프롬프트 (고정 prefix 는 KV cache 재사용)"""
+    return f"{SYSTEM_PREFIX}{build_user_line(user_text, emotion, face_detected, distance)}\nRobot:"
+
+def local_chat(user_text, emotion=None, face_detected=False, distance=None, cancel=None):
+    if not user_text:
+        return "woof woof"
+
+    user_line = build_user_line(user_text, emotion, face_detected, distance)
+    reply = "".join(chat_stream(
+        user_line,
         max_new_tokens=30,    # 짧게 생성
         temperature=0.8,      # 약간의 랜덤성 추가
-        do_sample=True,
-        pad_token_id=tokenizer.eos_token_id
-    )
-    return res[0]["generated_text"].split("Robot:")[-1].strip()
\ No newline at end of file
+        cancel=cancel,
+    ))
+    return reply.strip()
+
+def local_chat_stream(user_text, emotion=None, face_detected=False, distance=None, cancel=None):
+    """local_chat 스트리밍 버전 - 완성된 문장/절 단위로 yield"""
+    if not user_text:
+        yield "woof woof"
+        return
+
+    user_line = build_user_line(user_text, emotion, face_detected, distance)
+    yield from sentence_chunks(chat_stream(
+        user_line,
+        max_new_tokens=30,
+        temperature=0.8,
+        cancel=cancel,
+    ))
@@ -0,0 +1,221 @@
+# llm_backend.py
+"""
+CPU 전용 LLM 백엔드 - 모델은 한 번만 로드
+- int8  : gpt2 fp32 → torch 동적 int8 양자화 (bitsandbytes / GPU 없이 CPU 에서 동작)
+- gguf  : llama.cpp (llama-cpp-python) 로 GGUF 양자화 모델 실행
+- legacy: 예전 설정 (fp16 + bitsandbytes 8bit + device_map=auto) - 벤치마크 비교용
+모든 프롬프트는 고정된 SYSTEM_PREFIX 로 시작 → 그 부분의 KV cache 는 한 번만 계산해서 재사용
+stream(..., cancel=threading.Event) - 이벤트가 켜지면 다음 토큰에서 생성 중단 (요청 시간 초과 / 연결 끊김)
+"""
+
+import copy
+import os
+import threading
+
+MODEL_NAME = "gpt2"
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "int8")   # "int8" / "gguf" / "legacy"
+# llama.cpp 의 convert_hf_to_gguf.py 로 gpt2 를 변환 후 llama-quantize 로 Q8_0
+GGUF_MODEL = os.environ.get("LLM_GGUF", os.path.expanduser("~/robot/robot-ai/models/gpt2.Q8_0.gguf"))
+LLM_THREADS = 4
+N_CTX = 512
+TOP_K = 50
+
+# 매 요청마다 똑같이 붙는 앞부분 (여기까지의 KV cache 를 재사용)
+SYSTEM_PREFIX = "Momo is a small, friendly robot dog. Momo answers in one short, cheerful sentence.\n"
+
+
+def conv1d_to_linear(model):
+    """gpt2 의 Conv1D 레이어를 nn.Linear 로 교체 (동적 양자화는 nn.Linear 만 지원)"""
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    for module in list(model.modules()):
+        for child_name, child in list(module.named_children()):
+            if isinstance(child, Conv1D):
+                n_in, n_out = child.weight.shape
+                linear = torch.nn.Linear(n_in, n_out)
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(module, child_name, linear)
+    return model
+
+
+class LlmBackend:
+    name = "base"
+
+    def stream(self, prompt: str, max_new_tokens: int = 30, temperature: float = 0.8, cancel=None):
+        """프롬프트 뒤에 이어질 텍스트를 토큰 조각 단위로 yield (cancel 이 켜지면 중단)"""
+        raise NotImplementedError
+
+    def generate(self, prompt: str, max_new_tokens: int = 30, temperature: float = 0.8) -> str:
+        return "".join(self.stream(prompt, max_new_tokens, temperature))
+
+
+class KvState:
+    """대화 1개의 KV cache (past_key_values) + 그 길이 + 아직 계산 안 한 토큰"""
+
+    def __init__(self):
+        self.past = None
+        self.length = 0
+        self.pending = []
+
+
+class TorchInt8Backend(LlmBackend):
+    """transformers gpt2 + torch 동적 int8 양자화 + prefix KV cache"""
+    name = "int8"
+
+    def __init__(self, model_name=MODEL_NAME, threads=LLM_THREADS, use_prefix_cache=True):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        print("📦 LLM 로딩 중... (int8)")
+        torch.set_num_threads(threads)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+        model = conv1d_to_linear(model.eval())
+        self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.n_positions = self.model.config.n_positions
+        self.eos_id = self.tokenizer.eos_token_id
+
+        self.prefix_ids = self.tokenizer(SYSTEM_PREFIX, return_tensors="pt").input_ids
+        self.prefix_past = None
+        if use_prefix_cache:
+            with torch.no_grad():
+                self.prefix_past = self.model(self.prefix_ids, use_cache=True).past_key_values
+
+    def new_state(self, with_prefix=True) -> "KvState":
+        """SYSTEM_PREFIX 까지 계산된 KV 상태 (캐시 복사본 - 모델이 캐시를 제자리에서 늘리므로)"""
+        state = KvState()
+        if with_prefix:
+            if self.prefix_past is not None:
+                state.past = copy.deepcopy(self.prefix_past)
+                state.length = self.prefix_ids.shape[1]
+            else:
+                state.pending = self.prefix_ids[0].tolist()
+        return state
+
+    def prefill(self, state, text):
+        """state 뒤에 text 토큰을 이어서 계산 → 마지막 위치 logits"""
+        import torch
+
+        ids = state.pending + self.tokenizer(text).input_ids
+        state.pending = []
+        if not ids:
+            return None
+        with torch.no_grad():
+            out = self.model(torch.tensor([ids]), past_key_values=state.past, use_cache=True)
+        state.past = out.past_key_values
+        state.length += len(ids)
+        return out.logits[0, -1]
+
+    def stream_state(self, state, text, max_new_tokens=30, temperature=0.8, cancel=None):
+        """state 에 text 를 이어 붙이고 생성 - 생성한 토큰도 state 에 계속 쌓임"""
+        import torch
+
+        logits = self.prefill(state, text)
+        generated = []
+        out_text = ""
+        with torch.no_grad():
+            for _ in range(max_new_tokens):
+                if cancel is not None and cancel.is_set():
+                    break   # 남은 KV 는 그대로 (다음 턴에 이어서 씀)
+                top = torch.topk(logits / max(temperature, 1e-5), TOP_K)
+                token = int(top.indices[torch.multinomial(torch.softmax(top.values, -1), 1)])
+                if token == self.eos_id:
+                    break
+                generated.append(token)
+                state.pending = [token]   # 아직 KV 에 안 들어감 (여기서 끊겨도 다음 턴에 계산)
+
+                # 토큰 여러 개가 모여야 글자가 되는 경우가 있어 전체 decode 후 새로 생긴 부분만
+                new_text = self.tokenizer.decode(generated, skip_special_tokens=True)
+                if not new_text.endswith("\ufffd"):
+                    yield new_text[len(out_text):]
+                    out_text = new_text
+                if len(generated) == max_new_tokens:
+                    break   # 마지막 토큰은 다음 턴 prefill 때 같이 계산
+
+                out = self.model(torch.tensor([[token]]), past_key_values=state.past, use_cache=True)
+                state.past = out.past_key_values
+                state.length += 1
+                state.pending = []
+                logits = out.logits[0, -1]
+
+    def stream(self, prompt, max_new_tokens=30, temperature=0.8, cancel=None):
+        # 고정 prefix 로 시작하면 prefix KV 를 재사용하고 뒷부분만 계산
+        with_prefix = prompt.startswith(SYSTEM_PREFIX)
+        state = self.new_state(with_prefix)
+        text = prompt[len(SYSTEM_PREFIX):] if with_prefix else prompt
+        keep = self.n_positions - state.length - len(state.pending) - max_new_tokens
+        ids = self.tokenizer(text).input_ids[-keep:]
+        yield from self.stream_state(state, self.tokenizer.decode(ids), max_new_tokens, temperature, cancel)
+
+
+class GgufBackend(LlmBackend):
+    """llama.cpp GGUF (Q8_0 / Q4_K 등) - 같은 앞부분 토큰은 llama.cpp 가 KV 를 그대로 재사용"""
+    name = "gguf"
+
+    def __init__(self, model_path=GGUF_MODEL, threads=LLM_THREADS, n_ctx=N_CTX):
+        from llama_cpp import Llama, LlamaRAMCache
+
+        print(f"📦 LLM 로딩 중... (gguf: {model_path})")
+        self.llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=threads, verbose=False)
+        # 다른 프롬프트를 돌린 뒤에도 prefix 상태를 다시 꺼내 쓸 수 있게 RAM 캐시
+        self.llm.set_cache(LlamaRAMCache(capacity_bytes=64 << 20))
+        self.llm(SYSTEM_PREFIX, max_tokens=1)
+
+    def stream(self, prompt, max_new_tokens=30, temperature=0.8, cancel=None):
+        outputs = self.llm(prompt, max_tokens=max_new_tokens, temperature=temperature,
+                           top_k=TOP_K, stream=True)
+        try:
+            for out in outputs:
+                if cancel is not None and cancel.is_set():
+                    break
+                yield out["choices"][0]["text"]
+        finally:
+            outputs.close()   # llama.cpp 쪽 생성 루프도 여기서 멈춤
+
+
+class LegacyBackend(LlmBackend):
+    """예전 llm.py 설정 그대로 (CPU 에서는 bitsandbytes 미지원이거나 느림 - 비교용)"""
+    name = "legacy"
+
+    def __init__(self, model_name=MODEL_NAME):
+        import torch
+        from transformers import pipeline, AutoModelForCausalLM, AutoTokenizer
+
+        print("📦 LLM 로딩 중... (legacy fp16 + 8bit)")
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForCausalLM.from_pretrained(
+            model_name,
+            torch_dtype=torch.float16,
+            quantization_config={"load_in_8bit": True},
+            device_map="auto"
+        )
+        self.chat_pipeline = pipeline("text-generation", model=model, tokenizer=tokenizer)
+
+    def stream(self, prompt, max_new_tokens=30, temperature=0.8, cancel=None):
+        from llm_stream import stream_pipeline
+
+        yield from stream_pipeline(
+            self.chat_pipeline, prompt, cancel=cancel,
+            max_new_tokens=max_new_tokens, temperature=temperature, do_sample=True,
+        )
+
+
+BACKENDS = {
+    "int8": TorchInt8Backend,
+    "gguf": GgufBackend,
+    "legacy": LegacyBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: str = None) -> LlmBackend:
+    """이름으로 백엔드 선택 (한 번 만든 백엔드는 계속 재사용)"""
+    name = name or LLM_BACKEND
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
@@ -0,0 +1,89 @@
+# llm_stream.py
+"""
+LLM 스트리밍 유틸
+- stream_pipeline: transformers text-generation 파이프라인 → 토큰 조각 generator
+- sentence_chunks: 토큰 조각을 문장/절 단위로 묶어서 TTS 에 바로 넘김
+"""
+
+import re
+import threading
+
+# 문장 끝 (. ! ? … 뒤에 공백, 。 줄바꿈) → 바로 자름
+# 뒤에 공백이 와야 끝으로 봄 → "3.5" / "1,000" 같은 숫자 사이에서는 안 자름
+# (버퍼 끝에 있는 "." 은 다음 조각을 보고 판단, 응답이 끝나면 남은 부분은 그대로 나감)
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+|[。\n]+\s*")
+# 절 끝 (, ; : 뒤에 공백, ，) → 버퍼가 충분히 길 때만 자름
+CLAUSE_END = re.compile(r"[,;:]\s+|，\s*")
+
+
+def stream_pipeline(chat_pipeline, prompt: str, cancel=None, **gen_kwargs):
+    """transformers 파이프라인 생성을 별도 스레드에서 돌리고 새 텍스트만 yield
+
+    cancel(threading.Event) 가 켜지거나 generator 를 닫으면 다음 토큰에서 generate 중단
+    (안 그러면 생성 스레드가 max_new_tokens 까지 CPU 를 계속 씀)
+    """
+    from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+    stop = threading.Event()
+
+    class _Stop(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return stop.is_set() or (cancel is not None and cancel.is_set())
+
+    tokenizer = chat_pipeline.tokenizer
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    inputs = tokenizer(prompt, return_tensors="pt")
+    gen_kwargs.setdefault("pad_token_id", tokenizer.eos_token_id)
+    criteria = StoppingCriteriaList(gen_kwargs.pop("stopping_criteria", None) or [])
+    criteria.append(_Stop())
+    gen_kwargs["stopping_criteria"] = criteria
+
+    worker = threading.Thread(
+        target=chat_pipeline.model.generate,
+        kwargs=dict(**inputs, streamer=streamer, **gen_kwargs),
+        daemon=True,
+    )
+    worker.start()
+    try:
+        for text in streamer:
+            if cancel is not None and cancel.is_set():
+                break
+            if text:
+                yield text
+    finally:
+        stop.set()     # 중간에 닫혀도 (barge-in / 시간 초과) 생성 스레드를 멈춤
+        worker.join(timeout=0.1)
+
+
+def sentence_chunks(fragments, min_clause_chars: int = 12, max_chars: int = None):
+    """토큰 조각 → 완성된 문장/절 단위 문자열
+
+    max_chars: 전체 응답 길이 제한 (기존 reply[:80] 같은 자르기)
+    """
+    buf = ""
+    total = 0
+    for frag in fragments:
+        buf += frag
+        while True:
+            m = SENTENCE_END.search(buf)
+            if not m:
+                m = next((c for c in CLAUSE_END.finditer(buf)
+                          if c.end() >= min_clause_chars), None)
+            if not m:
+                break
+            chunk, buf = buf[:m.end()].strip(), buf[m.end():]
+            if not chunk:
+                continue
+            if max_chars is not None and total + len(chunk) > max_chars:
+                chunk = chunk[:max_chars - total]
+                if chunk:
+                    yield chunk
+                return
+            total += len(chunk)
+            yield chunk
+    tail = buf.strip()
+    if tail:
+        if max_chars is not None:
+            tail = tail[:max_chars - total]
+        if tail:
+            yield tail
@@ -0,0 +1,107 @@
+# protocol.py
+"""
+robot-core ↔ robot-ai 프레임 프로토콜
+- 프레임 = 10바이트 헤더 + payload
+  헤더: payload 길이(u32) | 타입(u8) | 플래그(u8) | 요청 ID(u32)  (network byte order)
+- payload: msgpack (설치돼 있으면) 또는 compact JSON, 플래그로 구분 → 양쪽 설치 여부가 달라도 OK
+- 요청 ID 로 한 연결에 여러 요청을 동시에(multiplexing), 응답은 PARTIAL 여러 개 + RESPONSE 로 스트리밍
+"""
+
+import base64
+import json
+import struct
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+HEADER = struct.Struct("!IBBI")
+MAX_FRAME = 16 * 1024 * 1024
+
+# 프레임 타입
+REQUEST = 1
+RESPONSE = 2     # 최종 응답 (요청 종료)
+PARTIAL = 3      # 스트리밍 중간 조각
+ERROR = 4        # 에러 (요청 종료)
+PING = 5
+PONG = 6
+
+FLAG_MSGPACK = 0x01
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_payload(obj):
+    if MSGPACK_AVAILABLE:
+        return msgpack.packb(obj, use_bin_type=True), FLAG_MSGPACK
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode(), 0
+
+
+def decode_payload(data, flags):
+    if not data:
+        return None
+    if flags & FLAG_MSGPACK:
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data.decode())
+
+
+def pack_bytes(data: bytes):
+    """바이너리 필드 (얼굴 이미지 등) - msgpack 이면 그대로, JSON 이면 base64 문자열"""
+    return data if MSGPACK_AVAILABLE else base64.b64encode(data).decode()
+
+
+def unpack_bytes(value) -> bytes:
+    return base64.b64decode(value) if isinstance(value, str) else bytes(value)
+
+
+def encode_frame(ftype, req_id, obj=None) -> bytes:
+    payload, flags = encode_payload(obj) if obj is not None else (b"", 0)
+    return HEADER.pack(len(payload), ftype, flags, req_id) + payload
+
+
+def parse_header(header):
+    length, ftype, flags, req_id = HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f"프레임이 너무 큼: {length} bytes")
+    return length, ftype, flags, req_id
+
+
+# ==============================
+# 블로킹 소켓 (robot-core)
+# ==============================
+def recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    pos = 0
+    while pos < n:
+        got = sock.recv_into(view[pos:], n - pos)
+        if got == 0:
+            raise ConnectionError("연결 끊김")
+        pos += got
+    return bytes(buf)
+
+
+def read_frame(sock):
+    """소켓에서 프레임 1개 → (타입, 요청 ID, 객체)"""
+    length, ftype, flags, req_id = parse_header(recv_exact(sock, HEADER.size))
+    payload = recv_exact(sock, length) if length else b""
+    return ftype, req_id, decode_payload(payload, flags)
+
+
+def send_frame(sock, ftype, req_id, obj=None):
+    sock.sendall(encode_frame(ftype, req_id, obj))
+
+
+# ==============================
+# asyncio 스트림 (robot-ai)
+# ==============================
+async def read_frame_async(reader, header=None):
+    """StreamReader 에서 프레임 1개 (header: 이미 읽은 헤더 앞부분)"""
+    header = (header or b"") + await reader.readexactly(HEADER.size - len(header or b""))
+    length, ftype, flags, req_id = parse_header(header)
+    payload = await reader.readexactly(length) if length else b""
+    return ftype, req_id, decode_payload(payload, flags)
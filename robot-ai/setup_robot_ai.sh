@@ -73,5 +73,8 @@ pip install \
   requests \
   Pillow \
 
+# (선택) GGUF 백엔드: LLM_BACKEND=gguf
+# pip install llama-cpp-python
+
 echo "✅ Robot-AI 설치 완료!"
 echo "👉 source .venv/bin/activate"
\ No newline at end of file
@@ -1,43 +1,38 @@
 # stt.py
 import subprocess
-import uuid
-import os
 
-WHISPER_BIN = "/home/sptcnl/whisper.cpp/main"
-WHISPER_MODEL = "/home/sptcnl/whisper.cpp/models/ggml-base.bin"
+import numpy as np
 
-def stt_from_mic(seconds: int = 5) -> str:
-    wav_file = f"/tmp/rec_{uuid.uuid4().hex}.wav"
+from stt_backend import get_backend, RATE
 
-    try:
-        # 녹음 (arecord)
-        subprocess.run([
-            "arecord",
-            "-d", str(seconds),
-            "-f", "cd",
-            "-t", "wav",
-            wav_file
-        ], check=True)
+def record_pcm(seconds: int = 5) -> np.ndarray:
+    """arecord → stdout(raw int16) → numpy (임시 wav 파일 없음)"""
+    result = subprocess.run([
+        "arecord",
+        "-q",
+        "-d", str(seconds),
+        "-f", "S16_LE",
+        "-r", str(RATE),
+        "-c", "1",
+        "-t", "raw",
+    ], check=True, capture_output=True)
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+def transcribe_segments(pcm: np.ndarray, language: str = "ko", backend: str = None) -> list:
+    """PCM → 타임스탬프 포함 Segment 리스트 (상주 백엔드 사용)"""
+    return get_backend(backend).transcribe(pcm, language=language)
 
-        # whisper.cpp 실행
-        result = subprocess.run(
-            [
-                WHISPER_BIN,
-                "-m", WHISPER_MODEL,
-                "-f", wav_file,
-                "-l", "ko"
-            ],
-            capture_output=True,
-            text=True
-        )
+def transcribe_pcm(pcm: np.ndarray, language: str = "ko", backend: str = None) -> str:
+    segments = transcribe_segments(pcm, language, backend)
+    return " ".join(seg.text for seg in segments).strip()
 
-        output = result.stdout.strip()
-        return output.split("]")[-1].strip()
+def stt_from_mic(seconds: int = 5) -> str:
+    try:
+        pcm = record_pcm(seconds)
+        if pcm.size == 0:
+            return ""
+        return transcribe_pcm(pcm)
 
     except Exception as e:
         print("⚠️ STT 실패:", e)
         return ""
-
-    finally:
-        if os.path.exists(wav_file):
-            os.remove(wav_file)
\ No newline at end of file
@@ -0,0 +1,178 @@
+# stt_backend.py
+"""
+상주(resident) STT 백엔드 - 모델은 한 번만 로드
+- whispercpp: whisper.cpp server 를 장기 실행 서브프로세스로 띄워두고 HTTP 로 PCM 전달
+- faster: faster-whisper 를 프로세스 안에서 직접 실행
+둘 다 transcribe(pcm) → [Segment(start, end, text), ...] 같은 인터페이스
+"""
+
+import io
+import json
+import os
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+import wave
+from collections import namedtuple
+
+import numpy as np
+
+WHISPER_SERVER_BIN = "/home/sptcnl/whisper.cpp/server"
+WHISPER_MODEL = "/home/sptcnl/whisper.cpp/models/ggml-base.bin"
+WHISPER_HOST = "127.0.0.1"
+WHISPER_PORT = 8910
+
+FASTER_MODEL_NAME = "base"
+FASTER_COMPUTE_TYPE = "int8"
+
+RATE = 16000
+DEFAULT_BACKEND = os.environ.get("STT_BACKEND", "whispercpp")
+
+Segment = namedtuple("Segment", ["start", "end", "text"])
+
+
+def to_int16(pcm: np.ndarray) -> np.ndarray:
+    if pcm.dtype == np.int16:
+        return pcm
+    return (np.clip(pcm, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def to_float32(pcm: np.ndarray) -> np.ndarray:
+    if pcm.dtype == np.float32:
+        return pcm
+    return pcm.astype(np.float32) / 32768.0
+
+
+def pcm_to_wav_bytes(pcm: np.ndarray) -> bytes:
+    """int16 PCM → 메모리 WAV 바이트"""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(to_int16(pcm).tobytes())
+    return buf.getvalue()
+
+
+class SttBackend:
+    name = "base"
+
+    def transcribe(self, pcm: np.ndarray, language: str = "ko") -> list:
+        """16kHz mono PCM (int16 또는 float32) → Segment 리스트"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class WhisperCppServerBackend(SttBackend):
+    """whisper.cpp server 상주 프로세스 (ggml 모델 1회 로딩)"""
+    name = "whispercpp"
+
+    def __init__(self, binary=WHISPER_SERVER_BIN, model_path=WHISPER_MODEL,
+                 host=WHISPER_HOST, port=WHISPER_PORT, startup_timeout=30.0):
+        self.binary = binary
+        self.model_path = model_path
+        self.base_url = f"http://{host}:{port}"
+        self.host = host
+        self.port = port
+        self.startup_timeout = startup_timeout
+        self.proc = None
+        self._lock = threading.Lock()
+
+    def _ensure_running(self):
+        """서버가 없거나 죽었으면 (재)시작 후 준비될 때까지 대기"""
+        with self._lock:
+            if self.proc and self.proc.poll() is None:
+                return
+            print(f"🗣️ whisper.cpp 서버 시작: {self.base_url}")
+            self.proc = subprocess.Popen(
+                [self.binary, "-m", self.model_path,
+                 "--host", self.host, "--port", str(self.port)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            deadline = time.time() + self.startup_timeout
+            while time.time() < deadline:
+                if self.proc.poll() is not None:
+                    raise RuntimeError("whisper.cpp 서버 시작 실패")
+                try:
+                    urllib.request.urlopen(self.base_url, timeout=1).close()
+                    return
+                except (urllib.error.URLError, OSError):
+                    time.sleep(0.2)
+            raise RuntimeError("whisper.cpp 서버 응답 없음")
+
+    def transcribe(self, pcm, language="ko"):
+        self._ensure_running()
+        boundary = uuid.uuid4().hex
+        fields = {"response_format": "verbose_json", "language": language, "temperature": "0.0"}
+
+        body = io.BytesIO()
+        for key, value in fields.items():
+            body.write(f"--{boundary}\r\nContent-Disposition: form-data; name=\"{key}\"\r\n\r\n{value}\r\n".encode())
+        body.write(f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"audio.wav\"\r\n"
+                   f"Content-Type: audio/wav\r\n\r\n".encode())
+        body.write(pcm_to_wav_bytes(pcm))
+        body.write(f"\r\n--{boundary}--\r\n".encode())
+
+        req = urllib.request.Request(
+            f"{self.base_url}/inference",
+            data=body.getvalue(),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+        with urllib.request.urlopen(req, timeout=60) as res:
+            result = json.loads(res.read().decode())
+
+        return [
+            Segment(float(seg.get("start", 0.0)), float(seg.get("end", 0.0)), seg.get("text", "").strip())
+            for seg in result.get("segments", [])
+        ]
+
+    def close(self):
+        with self._lock:
+            if self.proc and self.proc.poll() is None:
+                self.proc.terminate()
+                self.proc.wait(timeout=5)
+            self.proc = None
+
+
+class FasterWhisperBackend(SttBackend):
+    """faster-whisper 프로세스 내 실행"""
+    name = "faster"
+
+    def __init__(self, model_name=FASTER_MODEL_NAME, compute_type=FASTER_COMPUTE_TYPE):
+        from faster_whisper import WhisperModel
+
+        print("📦 faster-whisper 모델 로딩 중...")
+        self.model = WhisperModel(model_name, device="cpu", compute_type=compute_type)
+
+    def transcribe(self, pcm, language="ko"):
+        segments, _ = self.model.transcribe(
+            to_float32(pcm),
+            beam_size=5,
+            vad_filter=True,
+            language=language,
+            condition_on_previous_text=False,
+        )
+        return [Segment(seg.start, seg.end, seg.text.strip()) for seg in segments]
+
+
+BACKENDS = {
+    "whispercpp": WhisperCppServerBackend,
+    "faster": FasterWhisperBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: str = None) -> SttBackend:
+    """이름으로 백엔드 선택 (한 번 만든 백엔드는 계속 재사용)"""
+    name = name or DEFAULT_BACKEND
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
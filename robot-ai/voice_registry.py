@@ -0,0 +1,116 @@
+# voice_registry.py
+"""
+Piper 음성 레지스트리
+- 음성(onnx)마다 한 번만 로드해서 모든 스레드가 공유
+- 시작할 때 미리 로드(preload) 하거나 첫 사용시 로드(lazy)
+- 여러 음성 (lessac / amy / 한국어 kss) 지원, 메모리 상한 넘으면 LRU 제거
+- 모델 파일이 바뀌면 evict(name) → 다음 get_voice 가 새 파일로 다시 로드
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from piper import PiperVoice
+
+VOICES = {
+    "lessac": "en_US-lessac-medium.onnx",
+    "amy": "en_US-amy-medium.onnx",
+    "kss": "models/ko/ko_KR-kss-medium.onnx",
+}
+DEFAULT_VOICE = "lessac"
+
+# onnx 파일 크기 기준 메모리 상한 (세션 오버헤드 포함 대략 x1.5)
+MEMORY_CAP_MB = 300
+MEMORY_FACTOR = 1.5
+
+_voices = OrderedDict()   # name → (PiperVoice, 예상 MB)
+_lock = threading.Lock()
+_loading = {}             # name → Event (동시에 같은 음성 로드 방지)
+
+
+def _resolve(name):
+    return VOICES.get(name, name)
+
+
+def _estimate_mb(path):
+    try:
+        return os.path.getsize(path) / (1024 * 1024) * MEMORY_FACTOR
+    except OSError:
+        return 0.0
+
+
+def _evict(keep):
+    """메모리 상한 넘으면 가장 오래 안 쓴 음성부터 제거 (keep 제외)"""
+    total = sum(mb for _, mb in _voices.values())
+    for name in list(_voices):
+        if total <= MEMORY_CAP_MB:
+            break
+        if name == keep:
+            continue
+        _, mb = _voices.pop(name)
+        total -= mb
+        print(f"🗑️ 음성 언로드: {name} ({mb:.0f}MB)")
+
+
+def get_voice(name: str = DEFAULT_VOICE) -> PiperVoice:
+    """음성 가져오기 (없으면 로드, 있으면 캐시 재사용)"""
+    while True:
+        with _lock:
+            if name in _voices:
+                _voices.move_to_end(name)
+                return _voices[name][0]
+            event = _loading.get(name)
+            if event is None:
+                event = _loading[name] = threading.Event()
+                break
+        # 다른 스레드가 로드 중 → 끝나면 다시 확인
+        event.wait()
+
+    try:
+        path = _resolve(name)
+        t0 = time.time()
+        voice = PiperVoice.load(path)
+        print(f"🔊 음성 로드: {name} ({time.time() - t0:.1f}초)")
+        with _lock:
+            _voices[name] = (voice, _estimate_mb(path))
+            _evict(keep=name)
+        return voice
+    finally:
+        with _lock:
+            _loading.pop(name, None)
+        event.set()
+
+
+def evict(name: str) -> bool:
+    """로드해 둔 음성 내리기 → 내렸으면 True (다음 get_voice 때 파일에서 다시 로드)"""
+    with _lock:
+        entry = _voices.pop(name, None)
+    if entry is not None:
+        print(f"🗑️ 음성 언로드: {name} (모델 변경)")
+    return entry is not None
+
+
+def preload(*names, background: bool = True):
+    """시작할 때 음성 미리 로드 (background=True 면 스레드로)"""
+    names = names or (DEFAULT_VOICE,)
+
+    def load_all():
+        for name in names:
+            try:
+                get_voice(name)
+            except Exception as e:
+                print(f"⚠️ 음성 로드 실패 ({name}): {e}")
+
+    if background:
+        t = threading.Thread(target=load_all, daemon=True)
+        t.start()
+        return t
+    load_all()
+    return None
+
+
+def loaded_voices():
+    with _lock:
+        return list(_voices)
@@ -1,9 +1,311 @@
 import socket, json
+import asyncio
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import protocol
 
 AI_HOST = "robot-ai"
 AI_PORT = 5000
+CONNECT_TIMEOUT = 3.0
+REQUEST_TIMEOUT = 20.0
+POOL_SIZE = 2
+HEARTBEAT_INTERVAL = 10.0   # 서버 IDLE_TIMEOUT(60s) 보다 짧게
+HEARTBEAT_TIMEOUT = 3.0
+RECONNECT_BACKOFF = (0.2, 0.5, 1.0, 2.0, 5.0)
+
+
+class RequestNotSent(ConnectionError):
+    """요청 프레임을 다 보내기 전에 실패 → 서버는 이 요청을 모름 (다른 연결로 다시 보내도 안전)"""
+
+
+class AIConnection:
+    """robot-ai 연결 1개 - 요청 ID 로 여러 요청을 동시에 보내고 응답을 나눠 받음"""
+
+    def __init__(self, host=AI_HOST, port=AI_PORT, timeout=CONNECT_TIMEOUT, family=None):
+        if family is None:
+            self.sock = socket.create_connection((host, port), timeout=timeout)
+        else:
+            # 이미 DNS 풀린 주소로 바로 연결
+            self.sock = socket.socket(family, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect((host, port))
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.ids = itertools.count(1)
+        self.pending = {}              # 요청 ID → 응답 프레임 큐
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        self.closed = False
+        self.last_used = time.time()
+        self.reader = threading.Thread(target=self._read_loop, daemon=True)
+        self.reader.start()
+
+    def _read_loop(self):
+        try:
+            while True:
+                ftype, req_id, obj = protocol.read_frame(self.sock)
+                with self.lock:
+                    q = self.pending.get(req_id)
+                if q is not None:
+                    q.put((ftype, obj))
+        except (ConnectionError, OSError, protocol.ProtocolError) as e:
+            self.closed = True
+            with self.lock:
+                waiting = list(self.pending.values())
+            for q in waiting:
+                q.put((protocol.ERROR, {"error": f"연결 끊김: {e}"}))
+
+    def _send_request(self, req, ftype=protocol.REQUEST):
+        if self.closed:
+            raise RequestNotSent("연결 끊김 (보내기 전)")
+        req_id = next(self.ids)
+        q = queue.Queue()
+        with self.lock:
+            self.pending[req_id] = q
+        try:
+            with self.send_lock:
+                protocol.send_frame(self.sock, ftype, req_id, req)
+        except OSError as e:
+            # 프레임이 다 안 갔으면 서버는 잘린 프레임으로 보고 처리 안 함
+            self.closed = True
+            with self.lock:
+                self.pending.pop(req_id, None)
+            raise RequestNotSent(f"요청 전송 실패: {e}") from e
+        self.last_used = time.time()
+        return req_id, q
+
+    @property
+    def in_flight(self):
+        with self.lock:
+            return len(self.pending)
+
+    def ping(self, timeout=HEARTBEAT_TIMEOUT):
+        """PING → PONG 왕복 시간 (초), 실패하면 예외"""
+        t0 = time.time()
+        req_id, q = self._send_request(None, protocol.PING)
+        try:
+            ftype, obj = q.get(timeout=timeout)
+            if ftype != protocol.PONG:
+                raise ConnectionError((obj or {}).get("error", "PING 실패"))
+            return time.time() - t0
+        finally:
+            with self.lock:
+                self.pending.pop(req_id, None)
+
+    def request_stream(self, req, timeout=REQUEST_TIMEOUT):
+        """요청 1개 → PARTIAL 조각들을 yield, 마지막에 RESPONSE 객체 yield"""
+        req_id, q = self._send_request(dict(req, stream=True))
+        try:
+            while True:
+                ftype, obj = q.get(timeout=timeout)
+                if ftype == protocol.PARTIAL:
+                    yield obj
+                elif ftype == protocol.RESPONSE:
+                    yield obj
+                    return
+                else:
+                    raise ConnectionError((obj or {}).get("error", "AI 서버 오류"))
+        finally:
+            with self.lock:
+                self.pending.pop(req_id, None)
+
+    def request(self, req, timeout=REQUEST_TIMEOUT):
+        """요청 1개 → 최종 응답 객체"""
+        req_id, q = self._send_request(req)
+        try:
+            while True:
+                ftype, obj = q.get(timeout=timeout)
+                if ftype == protocol.RESPONSE:
+                    return obj
+                if ftype == protocol.ERROR:
+                    raise ConnectionError((obj or {}).get("error", "AI 서버 오류"))
+        finally:
+            with self.lock:
+                self.pending.pop(req_id, None)
+
+    def close(self):
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class AIClient:
+    """robot-ai 상주 클라이언트
+    - 연결 풀 (연결마다 multiplexing, 가장 한가한 연결 사용)
+    - DNS 는 한 번만 풀고 캐시 (연결 실패시에만 다시 풂)
+    - 연결 끊기면 백오프 재연결, 하트비트(PING)로 죽은 연결 정리
+    """
+
+    def __init__(self, host=AI_HOST, port=AI_PORT, pool_size=POOL_SIZE,
+                 connect_timeout=CONNECT_TIMEOUT, request_timeout=REQUEST_TIMEOUT,
+                 heartbeat_interval=HEARTBEAT_INTERVAL):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.pool = []
+        self.lock = threading.Lock()
+        self.addr = None
+        self.failures = 0
+        self.running = True
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ai")
+        self.heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        self.heartbeat.start()
+
+    def _resolve(self):
+        if self.addr is None:
+            family, _, _, _, sockaddr = socket.getaddrinfo(
+                self.host, self.port, type=socket.SOCK_STREAM)[0]
+            self.addr = (family, sockaddr[0])
+        return self.addr
+
+    def _connect(self):
+        """새 연결 (실패하면 백오프 후 재시도, 최대 len(RECONNECT_BACKOFF) 번)"""
+        last_error = None
+        for delay in (0,) + RECONNECT_BACKOFF:
+            if delay:
+                time.sleep(delay)
+            try:
+                family, ip = self._resolve()
+                conn = AIConnection(ip, self.port, self.connect_timeout, family)
+                self.failures = 0
+                return conn
+            except OSError as e:
+                last_error = e
+                self.addr = None   # IP 가 바뀌었을 수 있으니 다음엔 다시 풂
+                self.failures += 1
+                print(f"⚠️ robot-ai 연결 실패 ({e}), {delay}s 후 재시도")
+        raise ConnectionError(f"robot-ai 연결 불가: {last_error}")
+
+    def _get_conn(self):
+        with self.lock:
+            self.pool = [c for c in self.pool if not c.closed]
+            idle = min(self.pool, key=lambda c: c.in_flight, default=None)
+            if idle is not None and (idle.in_flight == 0 or len(self.pool) >= self.pool_size):
+                return idle
+        conn = self._connect()
+        with self.lock:
+            self.pool.append(conn)
+        return conn
+
+    def _drop(self, conn):
+        conn.close()
+        with self.lock:
+            if conn in self.pool:
+                self.pool.remove(conn)
+
+    def _heartbeat_loop(self):
+        while self.running:
+            time.sleep(self.heartbeat_interval)
+            with self.lock:
+                conns = list(self.pool)
+            for conn in conns:
+                if conn.closed:
+                    continue
+                if conn.in_flight == 0 and time.time() - conn.last_used > self.heartbeat_interval / 2:
+                    try:
+                        conn.ping()
+                    except (ConnectionError, OSError, queue.Empty):
+                        print("💔 robot-ai 하트비트 실패, 연결 정리")
+                        self._drop(conn)
+
+    def request(self, req, retries=1):
+        """요청 1개 → 응답 (보내기도 전에 연결이 끊겨 있었으면 재연결 후 한 번 더)
+
+        보낸 뒤에 끊기면 재시도 안 하고 ConnectionError - 서버가 이미 받아서 처리했을 수 있음
+        (대화 기록이 두 번 쌓이거나 TTS 가 두 번 나오지 않게)
+        """
+        for attempt in range(retries + 1):
+            conn = self._get_conn()
+            try:
+                return conn.request(req, timeout=self.request_timeout)
+            except queue.Empty:
+                raise TimeoutError("robot-ai 응답 시간 초과")
+            except RequestNotSent:
+                self._drop(conn)
+                if attempt == retries:
+                    raise
+            except (ConnectionError, OSError):
+                if conn.closed:
+                    self._drop(conn)
+                raise  # 서버가 돌려준 에러 / 보낸 뒤 연결 끊김 → 재시도 안 함
+
+    def request_stream(self, req):
+        conn = self._get_conn()
+        try:
+            yield from conn.request_stream(req, timeout=self.request_timeout)
+        except queue.Empty:
+            raise TimeoutError("robot-ai 응답 시간 초과")
+        finally:
+            if conn.closed:
+                self._drop(conn)
+
+    def submit(self, req):
+        """백그라운드로 요청 → concurrent.futures.Future (그동안 얼굴 감지 등 계속)"""
+        return self.executor.submit(self.request, req)
+
+    async def request_async(self, req):
+        """asyncio 버전"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.request, req)
+
+    def close(self):
+        self.running = False
+        with self.lock:
+            conns, self.pool = self.pool, []
+        for conn in conns:
+            conn.close()
+        self.executor.shutdown(wait=False)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> AIClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AIClient()
+        return _client
+
+
+def make_request(text, face_detected, distance, face=None):
+    req = {
+        "text": text,
+        "face_detected": face_detected,
+        "distance": distance
+    }
+    if face is not None:
+        req["face"] = face   # RobotHardware.face_crop() 결과 → robot-ai 에서 감정 분석
+    return req
+
+
+def ask_ai(text, face_detected, distance, face=None):
+    return get_client().request(make_request(text, face_detected, distance, face))
+
+
+def ask_ai_async(text, face_detected, distance, face=None):
+    """Future 리턴 - future.done() 확인하면서 다른 일 계속 가능"""
+    return get_client().submit(make_request(text, face_detected, distance, face))
+
+
+def ask_ai_stream(text, face_detected, distance, face=None):
+    """절 단위 스트리밍 응답: {"chunk": ...} 조각들, 마지막에 {"emotion", "reply"}"""
+    yield from get_client().request_stream(make_request(text, face_detected, distance, face))
+
 
-def ask_ai(text, face_detected, distance):
+def ask_ai_legacy(text, face_detected, distance):
+    """예전 방식 (JSON 한 번 send / recv(4096) 한 번) - 벤치마크 비교용"""
     req = {
         "text": text,
         "face_detected": face_detected,
@@ -17,4 +319,4 @@ def ask_ai(text, face_detected, distance):
     res = sock.recv(4096).decode()
     sock.close()
 
-    return json.loads(res)
\ No newline at end of file
+    return json.loads(res)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+robot-core ↔ robot-ai 프로토콜 왕복 지연 벤치마크 (추론 없이 에코 서버로 통신만 측정)
+- legacy : 요청마다 새 연결 + JSON send / recv(4096) 한 번 (예전 방식)
+- framed : 요청마다 새 연결 + 길이 prefix 프레임
+- framed-keepalive : 연결 1개 재사용
+- framed-mux : 연결 1개에 여러 요청 동시 (multiplexing)
+
+사용법: python bench_protocol.py [반복횟수]
+"""
+
+import json
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import protocol
+import ai_client
+from ai_client import AIConnection
+
+HOST = "127.0.0.1"
+SIZES = [64, 2 * 1024, 16 * 1024, 64 * 1024]
+
+
+def legacy_echo_server(sock):
+    while True:
+        conn, _ = sock.accept()
+        try:
+            data = conn.recv(4096).decode()
+            req = json.loads(data)
+            conn.send(json.dumps({"emotion": "neutral", "reply": req["text"]}).encode())
+        except Exception:
+            pass
+        finally:
+            conn.close()
+
+
+def framed_echo_server(sock):
+    def serve(conn):
+        lock = threading.Lock()
+        try:
+            while True:
+                ftype, req_id, obj = protocol.read_frame(conn)
+                if ftype == protocol.REQUEST:
+                    with lock:
+                        protocol.send_frame(conn, protocol.RESPONSE, req_id,
+                                            {"emotion": "neutral", "reply": obj["text"]})
+                elif ftype == protocol.PING:
+                    with lock:
+                        protocol.send_frame(conn, protocol.PONG, req_id)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    while True:
+        conn, _ = sock.accept()
+        threading.Thread(target=serve, args=(conn,), daemon=True).start()
+
+
+def start_server(target):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, 0))
+    sock.listen(64)
+    threading.Thread(target=target, args=(sock,), daemon=True).start()
+    return sock.getsockname()[1]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(name, fn, text, n):
+    times, failures = [], 0
+    for _ in range(n):
+        t0 = time.perf_counter()
+        try:
+            res = fn(text)
+            if res.get("reply") != text:
+                failures += 1
+        except Exception:
+            failures += 1
+        times.append((time.perf_counter() - t0) * 1000)
+    print(f"  {name:<18} p50 {percentile(times, 50):7.3f}ms  p95 {percentile(times, 95):7.3f}ms  실패 {failures}/{n}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    legacy_port = start_server(legacy_echo_server)
+    framed_port = start_server(framed_echo_server)
+    ai_client.AI_HOST = HOST
+
+    def legacy(text):
+        ai_client.AI_PORT = legacy_port
+        return ai_client.ask_ai_legacy(text, True, 50.0)
+
+    def framed(text):
+        conn = AIConnection(HOST, framed_port)
+        try:
+            return conn.request({"text": text, "face_detected": True, "distance": 50.0})
+        finally:
+            conn.close()
+
+    keepalive = AIConnection(HOST, framed_port)
+
+    def framed_keepalive(text):
+        return keepalive.request({"text": text, "face_detected": True, "distance": 50.0})
+
+    print(f"msgpack: {'O' if protocol.MSGPACK_AVAILABLE else 'X (compact JSON)'}, 반복 {n}회")
+    for size in SIZES:
+        text = "x" * size
+        print(f"\n📦 payload {size} bytes")
+        run("legacy", legacy, text, n)
+        run("framed", framed, text, n)
+        run("framed-keepalive", framed_keepalive, text, n)
+
+        # 연결 1개에 8개씩 동시에
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(framed_keepalive, [text] * n))
+        ok = sum(r.get("reply") == text for r in results)
+        print(f"  {'framed-mux x8':<18} 평균 {(time.perf_counter() - t0) * 1000 / n:7.3f}ms/요청  성공 {ok}/{n}")
+
+    keepalive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# camera_service.py
+"""
+카메라 캡처 서비스 - /dev/video0 는 이 스레드 하나만 연다
+- 최신 프레임은 더블 버퍼로 보관: 캡처 스레드는 다음 프레임을 따로 받고,
+  다 받으면 (seq, frame) 튜플을 통째로 교체 (락 없이 원자적 교체)
+- 얼굴 감지 / 감정 / 디버그 화면은 같은 프레임을 복사 없이 읽기 전용으로 공유
+- 소비자마다 필요한 크기(축소본, 흑백)를 요청하면 프레임당 한 번만 만들어서 공유
+"""
+
+import os
+import threading
+import time
+
+import cv2
+
+CAMERA_BACKEND = os.environ.get("CAMERA_BACKEND", "opencv")   # "opencv" / "picamera2"
+CAMERA_INDEX = 0
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+FRAME_FPS = 30
+
+
+class OpenCVBackend:
+    """USB 카메라 (V4L2) - cv2.VideoCapture"""
+
+    def __init__(self, device=CAMERA_INDEX, width=FRAME_WIDTH, height=FRAME_HEIGHT, fps=FRAME_FPS):
+        self.cap = cv2.VideoCapture(device, cv2.CAP_V4L2)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # 오래된 프레임 쌓이지 않게
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        """BGR 프레임 1장 (실패시 None)"""
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def release(self):
+        self.cap.release()
+
+
+class Picamera2Backend:
+    """CSI 카메라 - picamera2 (face.py 와 같은 설정)"""
+
+    def __init__(self, width=FRAME_WIDTH, height=FRAME_HEIGHT, fps=FRAME_FPS, **_):
+        from picamera2 import Picamera2
+
+        self.picam2 = Picamera2()
+        config = self.picam2.create_video_configuration(
+            main={"size": (width, height), "format": "RGB888"},
+            controls={"FrameRate": fps},
+            buffer_count=2,
+        )
+        self.picam2.configure(config)
+        self.picam2.start()
+
+    def is_opened(self):
+        return True
+
+    def read(self):
+        frame = self.picam2.capture_array()          # RGB
+        return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+
+    def release(self):
+        self.picam2.stop()
+
+
+BACKENDS = {
+    "opencv": OpenCVBackend,
+    "picamera2": Picamera2Backend,
+}
+
+
+class FrameSubscriber:
+    """소비자 1개 - 자기 크기/색 설정으로 새 프레임만 받음"""
+
+    def __init__(self, camera, size=None, gray=False):
+        self.camera = camera
+        self.size = size
+        self.gray = gray
+        self.last_seq = 0
+
+    def next(self, timeout=1.0):
+        """마지막으로 본 것보다 새 프레임이 나올 때까지 대기 → 프레임 (없으면 None)"""
+        if not self.camera.wait_frame(self.last_seq, timeout):
+            return None
+        seq, frame = self.camera.read(self.size, self.gray)
+        self.last_seq = seq
+        return frame
+
+    def latest(self):
+        """기다리지 않고 현재 최신 프레임"""
+        seq, frame = self.camera.read(self.size, self.gray)
+        self.last_seq = seq
+        return frame
+
+
+class CameraService:
+    def __init__(self, backend=CAMERA_BACKEND, **backend_kwargs):
+        self.backend_name = backend
+        self.backend_kwargs = backend_kwargs
+        self.backend = None
+        self.running = False
+        self.thread = None
+        self.fps = 0.0
+
+        self._front = (0, None)          # (seq, frame) - 통째로 교체
+        self._views = {}                 # (seq, size, gray) → 축소/흑백 뷰
+        self._new_frame = threading.Condition()
+
+    def start(self):
+        if self.running:
+            return self.backend is not None and self.backend.is_opened()
+        self.backend = BACKENDS[self.backend_name](**self.backend_kwargs)
+        if not self.backend.is_opened():
+            print("❌ 카메라 열기 실패! (/dev/video* 확인)")
+            return False
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        print(f"📷 카메라 서비스 시작 ({self.backend_name})")
+        return True
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=1.0)
+        if self.backend:
+            self.backend.release()
+            self.backend = None
+
+    def _run(self):
+        seq = 0
+        t_last = time.time()
+        while self.running:
+            frame = self.backend.read()   # back buffer (아직 아무도 못 봄)
+            if frame is None:
+                time.sleep(0.01)
+                continue
+            frame.flags.writeable = False  # 공유 프레임은 읽기 전용
+            seq += 1
+            self._front = (seq, frame)     # swap: 참조 교체 1번 (원자적)
+            self._views = {}
+
+            now = time.time()
+            self.fps = 0.9 * self.fps + 0.1 / max(now - t_last, 1e-3)
+            t_last = now
+
+            with self._new_frame:
+                self._new_frame.notify_all()
+
+    # ==============================
+    # 소비자 API
+    # ==============================
+    def read(self, size=None, gray=False):
+        """최신 프레임 (seq, frame) - size=(w, h) 면 축소본, gray=True 면 흑백"""
+        seq, frame = self._front
+        if frame is None or (size is None and not gray):
+            return seq, frame
+
+        views = self._views
+        key = (seq, size, gray)
+        view = views.get(key)
+        if view is None:
+            view = frame
+            if size is not None:
+                view = cv2.resize(view, size, interpolation=cv2.INTER_AREA)
+            if gray:
+                view = cv2.cvtColor(view, cv2.COLOR_BGR2GRAY)
+            view.flags.writeable = False
+            views[key] = view
+        return seq, view
+
+    def wait_frame(self, last_seq, timeout=1.0):
+        """last_seq 보다 새 프레임이 생길 때까지 대기"""
+        with self._new_frame:
+            return self._new_frame.wait_for(lambda: self._front[0] > last_seq, timeout)
+
+    def subscribe(self, size=None, gray=False) -> FrameSubscriber:
+        return FrameSubscriber(self, size, gray)
+
+
+_camera = None
+_camera_lock = threading.Lock()
+
+
+def get_camera(backend=CAMERA_BACKEND, **backend_kwargs) -> CameraService:
+    """프로세스 전체에서 카메라를 공유 (최초 호출시 장치 열고 캡처 시작)"""
+    global _camera
+    with _camera_lock:
+        if _camera is None:
+            _camera = CameraService(backend, **backend_kwargs)
+        _camera.start()
+        return _camera
+
+
+if __name__ == "__main__":
+    # 디버그 화면: 원본과 320x240 흑백 뷰를 같이 구독
+    cam = get_camera()
+    full = cam.subscribe()
+    small = cam.subscribe(size=(320, 240), gray=True)
+    try:
+        while True:
+            frame = full.next()
+            if frame is None:
+                continue
+            cv2.imshow("camera", frame)
+            cv2.imshow("camera 320x240 gray", small.latest())
+            print(f"FPS: {cam.fps:5.1f}", end="\r")
+            if cv2.waitKey(1) & 0xFF == 27:  # ESC
+                break
+    finally:
+        cam.stop()
+        cv2.destroyAllWindows()
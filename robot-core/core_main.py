@@ -1,5 +1,5 @@
 from hardware import RobotHardware
-from ai_client import ask_ai
+from ai_client import ask_ai_async, get_client
 import time
 
 robot = RobotHardware()
@@ -12,12 +12,21 @@ try:
         print("🎤 말해줘")
         text = input("> ")  # 테스트용 (STT는 ai쪽)
 
-        ai_res = ask_ai(text, face, dist)
+        # AI 요청은 백그라운드로, 응답 올 때까지 얼굴 감지/추종 계속
+        # 얼굴 crop(JPEG) 을 같이 보내서 robot-ai 에서 실제 감정 분석
+        future = ask_ai_async(text, robot.face_detected, robot.current_distance, robot.face_crop())
+        while not future.done():
+            robot.detect_face()
 
-        print("😊 감정:", ai_res["emotion"])
-        print("🤖 말:", ai_res["reply"])
+        try:
+            ai_res = future.result()
+            print("😊 감정:", ai_res["emotion"])
+            print("🤖 말:", ai_res["reply"])
+        except Exception as e:
+            print("⚠️ AI 요청 실패:", e)
 
         time.sleep(1)
 
 except KeyboardInterrupt:
-    robot.cleanup()
\ No newline at end of file
+    get_client().close()
+    robot.cleanup()
@@ -0,0 +1,168 @@
+# face_detector.py
+"""
+얼굴 감지 백엔드 모음 - 같은 인터페이스(FaceDetector)로 바꿔 끼움
+- haar  : Haar cascade (기존 방식)
+- lbp   : LBP cascade (Haar 보다 빠름, 정확도는 조금 낮음)
+- ssd   : OpenCV DNN res10 SSD (Caffe)
+- yunet : OpenCV FaceDetectorYN (YuNet ONNX, OpenCV 4.8+)
+- 백엔드 선택은 FACE_DETECTOR 환경변수, 모델 위치는 FACE_MODEL_DIR
+- 공통 옵션: scale (입력 축소 비율, 0.5 면 320x240 에서 감지), threads (OpenCV 스레드 수)
+- 결과는 원본 좌표의 (n, 4) [x, y, w, h] int32 배열 (detectMultiScale 과 같은 모양)
+- 보드별로 어떤 백엔드가 빠르고 쓸만한지는 bench_face.py 로 비교
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+FACE_DETECTOR = os.environ.get("FACE_DETECTOR", "haar")   # "haar" / "lbp" / "ssd" / "yunet"
+MODEL_DIR = os.environ.get("FACE_MODEL_DIR", "/home/sptcnl")
+FACE_SCALE = float(os.environ.get("FACE_SCALE", "1.0"))
+FACE_THREADS = int(os.environ.get("FACE_THREADS", "0"))   # 0 이면 OpenCV 기본값
+
+HAAR_CASCADE = os.path.join(MODEL_DIR, "haarcascade_frontalface_default.xml")
+LBP_CASCADE = os.path.join(MODEL_DIR, "lbpcascade_frontalface_improved.xml")
+SSD_PROTOTXT = os.path.join(MODEL_DIR, "deploy.prototxt")
+SSD_WEIGHTS = os.path.join(MODEL_DIR, "res10_300x300_ssd_iter_140000.caffemodel")
+YUNET_MODEL = os.path.join(MODEL_DIR, "face_detection_yunet_2023mar.onnx")
+SCORE_THRESHOLD = 0.6
+
+
+class FaceDetector:
+    """이미지(흑백 또는 BGR) → 얼굴 박스
+
+    min_size / max_size: 원본 픽셀 기준 얼굴 크기 제한 (ROI 추적에서 씀)
+    """
+    name = "base"
+    color = False        # True 면 BGR 입력이 필요 (흑백이 오면 3채널로 바꿔서 넣음)
+
+    def __init__(self, scale=FACE_SCALE, threads=FACE_THREADS):
+        self.scale = scale
+        self.threads = threads
+        if threads:
+            cv2.setNumThreads(threads)   # OpenCV 전역 설정 (cascade / dnn 공통)
+
+    def __call__(self, image, min_size=None, max_size=None):
+        return self.detect(image, min_size, max_size)
+
+    def detect(self, image, min_size=None, max_size=None):
+        if self.color and image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif not self.color and image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if self.scale != 1.0:
+            image = cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        small_min = int(min_size * self.scale) if min_size else None
+        small_max = int(max_size * self.scale) if max_size else None
+
+        boxes = np.asarray(self._detect(image, small_min, small_max), dtype=np.float32).reshape(-1, 4)
+        if len(boxes) and (small_min or small_max):
+            size = np.maximum(boxes[:, 2], boxes[:, 3])
+            keep = np.ones(len(boxes), dtype=bool)
+            if small_min:
+                keep &= size >= small_min
+            if small_max:
+                keep &= size <= small_max
+            boxes = boxes[keep]
+        return np.rint(boxes / self.scale).astype(np.int32)
+
+    def _detect(self, image, min_size, max_size):
+        raise NotImplementedError
+
+
+class CascadeDetector(FaceDetector):
+    def __init__(self, cascade_path, scale=FACE_SCALE, threads=FACE_THREADS,
+                 scale_factor=1.2, min_neighbors=5):
+        super().__init__(scale, threads)
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            # 예전처럼 시작은 되게 (얼굴만 못 찾음) - 경로는 FACE_MODEL_DIR 확인
+            print(f"⚠️ cascade 파일 없음: {cascade_path} (얼굴 감지 안 됨)")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+
+    def _detect(self, image, min_size, max_size):
+        if self.cascade.empty():
+            return ()
+        kwargs = {}
+        if min_size:
+            kwargs["minSize"] = (min_size, min_size)
+        if max_size:
+            kwargs["maxSize"] = (max_size, max_size)
+        return self.cascade.detectMultiScale(image, self.scale_factor, self.min_neighbors, **kwargs)
+
+
+class HaarDetector(CascadeDetector):
+    name = "haar"
+
+    def __init__(self, cascade_path=HAAR_CASCADE, **kwargs):
+        super().__init__(cascade_path, **kwargs)
+
+
+class LbpDetector(CascadeDetector):
+    name = "lbp"
+
+    def __init__(self, cascade_path=LBP_CASCADE, **kwargs):
+        super().__init__(cascade_path, **kwargs)
+
+
+class SsdDetector(FaceDetector):
+    """res10 SSD - 300x300 고정 입력 (scale 은 그 전에 원본을 줄이는 비율)"""
+    name = "ssd"
+    color = True
+
+    def __init__(self, prototxt=SSD_PROTOTXT, weights=SSD_WEIGHTS, scale=FACE_SCALE,
+                 threads=FACE_THREADS, score_threshold=SCORE_THRESHOLD, input_size=300):
+        super().__init__(scale, threads)
+        self.net = cv2.dnn.readNetFromCaffe(prototxt, weights)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.score_threshold = score_threshold
+        self.input_size = input_size
+
+    def _detect(self, image, min_size, max_size):
+        h, w = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, (self.input_size, self.input_size),
+                                     (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        out = self.net.forward()[0, 0]                       # (N, 7): _, _, score, x0, y0, x1, y1
+        out = out[out[:, 2] >= self.score_threshold]
+        corners = np.clip(out[:, 3:7], 0.0, 1.0) * np.array([w, h, w, h], dtype=np.float32)
+        return np.column_stack([corners[:, :2], corners[:, 2:] - corners[:, :2]])
+
+
+class YuNetDetector(FaceDetector):
+    name = "yunet"
+    color = True
+
+    def __init__(self, model_path=YUNET_MODEL, scale=FACE_SCALE, threads=FACE_THREADS,
+                 score_threshold=SCORE_THRESHOLD):
+        super().__init__(scale, threads)
+        self.net = cv2.FaceDetectorYN.create(model_path, "", (320, 320), score_threshold)
+        self._size = None
+
+    def _detect(self, image, min_size, max_size):
+        size = (image.shape[1], image.shape[0])
+        if size != self._size:
+            self.net.setInputSize(size)                      # 입력 크기가 바뀔 때만 (ROI 는 매번 다름)
+            self._size = size
+        _, faces = self.net.detect(image)
+        if faces is None:
+            return ()
+        return faces[:, :4]
+
+
+BACKENDS = {
+    "haar": HaarDetector,
+    "lbp": LbpDetector,
+    "ssd": SsdDetector,
+    "yunet": YuNetDetector,
+}
+
+
+def create_detector(name=FACE_DETECTOR, **kwargs) -> FaceDetector:
+    """이름으로 감지기 생성 (scale / threads 등은 kwargs 로)"""
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 얼굴 감지 백엔드: {name} (가능: {', '.join(BACKENDS)})")
+    return BACKENDS[name](**kwargs)
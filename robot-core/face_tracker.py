@@ -0,0 +1,208 @@
+# face_tracker.py
+"""
+얼굴 감지 + 추적 - 매 프레임 640x480 전체를 Haar 로 훑지 않음
+- 전체 프레임 감지는 detect_every 프레임마다 한 번, 또는 얼굴을 놓쳤을 때만
+- 그 사이에는 마지막 박스 주변(ROI)만, 비슷한 크기(min/maxSize)로만 감지 → 몇 배 빠름
+- ROI 에서도 못 찾으면 (옵션) 축소 흑백 영상에서 템플릿 상관(correlation) 추적으로 위치만 따라감
+- 박스는 지수 이동 평균으로 부드럽게 (모터/꼬리 제어가 덜 흔들림)
+- 잠깐 놓친 얼굴은 max_misses 프레임까지 마지막 위치 유지 (얼굴 있음/없음 깜빡임 방지)
+- 결과는 detectMultiScale 과 같은 (n, 4) [x, y, w, h] 배열
+- 감지기는 face_detector 백엔드 (FACE_DETECTOR=haar / lbp / ssd / yunet)
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+from face_detector import create_detector
+
+DETECT_EVERY = 10        # 이 프레임마다 전체 프레임 감지 (새 얼굴 찾기)
+ROI_MARGIN = 0.5         # ROI = 마지막 박스 + 박스 크기 × margin (사방)
+SIZE_RANGE = (0.7, 1.4)  # ROI 안에서는 마지막 크기의 이 배율 범위만 탐색
+SMOOTHING = 0.5          # 새 박스 가중치 (1.0 이면 스무딩 안 함)
+MAX_MISSES = 3           # 이만큼 연속으로 못 찾으면 추적 해제
+MAX_FACES = 3
+MATCH_IOU = 0.3          # 전체 감지 결과를 기존 추적과 같은 얼굴로 볼 최소 IoU
+TRACKER_SCALE = 0.5      # 상관 추적용 축소 비율
+TRACKER_MIN_SCORE = 0.6  # 이보다 낮으면 추적 실패로 봄
+
+
+def iou_matrix(a, b):
+    """박스 배열 a(n,4) × b(m,4) → IoU (n,m) - 반복문 없이 한 번에"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    ax2, ay2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    bx2, by2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    iw = np.clip(np.minimum(ax2[:, None], bx2) - np.maximum(a[:, None, 0], b[:, 0]), 0, None)
+    ih = np.clip(np.minimum(ay2[:, None], by2) - np.maximum(a[:, None, 1], b[:, 1]), 0, None)
+    inter = iw * ih
+    union = (a[:, 2] * a[:, 3])[:, None] + b[:, 2] * b[:, 3] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+class Track:
+    def __init__(self, box):
+        self.box = np.asarray(box, dtype=np.float32)   # 스무딩된 [x, y, w, h]
+        self.misses = 0
+        self.template = None                           # 상관 추적용 축소 얼굴 패치
+
+    def smooth(self, box, alpha):
+        box = np.asarray(box, dtype=np.float32)
+        if iou_matrix(self.box, box)[0, 0] < MATCH_IOU:
+            self.box = box                             # 크게 움직였으면 바로 따라감
+        else:
+            self.box += alpha * (box - self.box)
+        self.misses = 0
+
+
+class FaceTracker:
+    def __init__(self, detector=None, detect_every=DETECT_EVERY, roi_margin=ROI_MARGIN,
+                 smoothing=SMOOTHING, max_misses=MAX_MISSES, max_faces=MAX_FACES,
+                 correlation=True):
+        self.detector = detector or create_detector()
+        self.detect_every = detect_every
+        self.roi_margin = roi_margin
+        self.smoothing = smoothing
+        self.max_misses = max_misses
+        self.max_faces = max_faces
+        self.correlation = correlation
+        self.tracks = []
+        self.frame_idx = 0
+        self.counts = {"full": 0, "roi": 0, "roi_hits": 0, "correlation": 0, "lost": 0}
+        self._lock = threading.Lock()
+
+    # ==============================
+    # 외부 API
+    # ==============================
+    def update(self, gray):
+        """흑백 프레임 1장 → 스무딩된 얼굴 박스 (n, 4) int32"""
+        with self._lock:
+            self.frame_idx += 1
+            need_full = (not self.tracks
+                         or self.frame_idx % self.detect_every == 0
+                         or any(t.misses > 0 for t in self.tracks))
+            if need_full:
+                self._full_detect(gray)
+            else:
+                for track in self.tracks:
+                    self._roi_detect(gray, track)
+            self._drop_lost()
+            return self.boxes()
+
+    def boxes(self):
+        if not self.tracks:
+            return np.empty((0, 4), dtype=np.int32)
+        return np.rint([t.box for t in self.tracks]).astype(np.int32)
+
+    def reset(self):
+        with self._lock:
+            self.tracks = []
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        counts["frames"] = self.frame_idx
+        counts["roi_hit_rate"] = counts["roi_hits"] / counts["roi"] if counts["roi"] else 0.0
+        return counts
+
+    def report(self):
+        s = self.stats()
+        print(f"👀 얼굴 추적: {s['frames']}프레임 중 전체 감지 {s['full']}회, "
+              f"ROI {s['roi']}회 (적중 {s['roi_hit_rate'] * 100:.0f}%), "
+              f"상관 추적 {s['correlation']}회, 놓침 {s['lost']}회")
+
+    # ==============================
+    # 감지 / 추적
+    # ==============================
+    def _full_detect(self, gray):
+        self.counts["full"] += 1
+        found = self.detector(gray)
+        if len(found) > self.max_faces:
+            found = found[np.argsort(-found[:, 2] * found[:, 3])[:self.max_faces]]
+
+        matched = set()
+        if self.tracks and len(found):
+            ious = iou_matrix([t.box for t in self.tracks], found)
+            # IoU 큰 쌍부터 1:1 매칭
+            for ti, fi in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+                if ious[ti, fi] < MATCH_IOU:
+                    break
+                if fi in matched or self.tracks[ti].misses < 0:
+                    continue
+                self.tracks[ti].smooth(found[fi], self.smoothing)
+                self.tracks[ti].misses = -1               # 이번 프레임에 매칭됨 표시
+                matched.add(fi)
+        for track in self.tracks:
+            if track.misses < 0:
+                track.misses = 0
+                self._remember(gray, track)
+            elif not self._correlate(gray, track):
+                track.misses += 1
+        for fi, box in enumerate(found):
+            if fi not in matched and len(self.tracks) < self.max_faces:
+                track = Track(box)
+                self._remember(gray, track)
+                self.tracks.append(track)
+
+    def _roi(self, gray, box, margin):
+        x, y, w, h = box
+        mx, my = w * margin, h * margin
+        x0, y0 = int(max(0, x - mx)), int(max(0, y - my))
+        x1, y1 = int(min(gray.shape[1], x + w + mx)), int(min(gray.shape[0], y + h + my))
+        return x0, y0, x1, y1
+
+    def _roi_detect(self, gray, track):
+        self.counts["roi"] += 1
+        x0, y0, x1, y1 = self._roi(gray, track.box, self.roi_margin)
+        size = max(track.box[2], track.box[3])
+        found = self.detector(gray[y0:y1, x0:x1],
+                              min_size=int(size * SIZE_RANGE[0]),
+                              max_size=int(size * SIZE_RANGE[1]))
+        if len(found):
+            self.counts["roi_hits"] += 1
+            found = found + np.array([x0, y0, 0, 0], dtype=np.int32)
+            # 직전 박스와 가장 많이 겹치는 것
+            best = found[int(np.argmax(iou_matrix(track.box, found)[0]))]
+            track.smooth(best, self.smoothing)
+            self._remember(gray, track)
+        elif not self._correlate(gray, track):
+            track.misses += 1
+
+    def _drop_lost(self):
+        alive = [t for t in self.tracks if t.misses <= self.max_misses]
+        self.counts["lost"] += len(self.tracks) - len(alive)
+        self.tracks = alive
+
+    # ==============================
+    # 축소 영상 템플릿 상관 추적
+    # ==============================
+    def _remember(self, gray, track):
+        if not self.correlation:
+            return
+        x, y, w, h = np.rint(track.box).astype(int)
+        patch = gray[max(0, y):y + h, max(0, x):x + w]
+        if patch.size == 0:
+            return
+        track.template = cv2.resize(patch, None, fx=TRACKER_SCALE, fy=TRACKER_SCALE,
+                                    interpolation=cv2.INTER_AREA)
+
+    def _correlate(self, gray, track):
+        """감지가 실패했을 때 템플릿 상관으로 위치만 갱신 → 성공하면 True (misses 는 하나 늘림)"""
+        if not self.correlation or track.template is None:
+            return False
+        x0, y0, x1, y1 = self._roi(gray, track.box, self.roi_margin)
+        region = cv2.resize(gray[y0:y1, x0:x1], None, fx=TRACKER_SCALE, fy=TRACKER_SCALE,
+                            interpolation=cv2.INTER_AREA)
+        th, tw = track.template.shape[:2]
+        if region.shape[0] < th or region.shape[1] < tw:
+            return False
+        _, score, _, (mx, my) = cv2.minMaxLoc(
+            cv2.matchTemplate(region, track.template, cv2.TM_CCOEFF_NORMED))
+        if score < TRACKER_MIN_SCORE:
+            return False
+        self.counts["correlation"] += 1
+        track.box[0] = x0 + mx / TRACKER_SCALE
+        track.box[1] = y0 + my / TRACKER_SCALE
+        track.misses += 1      # 감지로 확인된 건 아니므로 계속되면 결국 전체 감지/해제
+        return True
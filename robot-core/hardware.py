@@ -2,17 +2,23 @@ import cv2
 import time
 from gpiozero import DistanceSensor
 import RPi.GPIO as GPIO
+from camera_service import get_camera
+from face_tracker import FaceTracker
+from protocol import pack_bytes
+
+# 원격 감정 분석용 얼굴 crop (모델 입력이 224라 그 이하로 충분)
+FACE_CROP_SIZE = 112
+FACE_JPEG_QUALITY = 80
 
 class RobotHardware:
     def __init__(self):
         # ========= 카메라 (USB) =========
-        self.cascade_path = "/home/sptcnl/haarcascade_frontalface_default.xml"
-        self.face_cascade = cv2.CascadeClassifier(self.cascade_path)
+        # 전체 프레임 감지는 가끔만, 그 사이엔 마지막 얼굴 주변만 탐색
+        self.face_tracker = FaceTracker()   # 감지 백엔드는 FACE_DETECTOR
 
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        # 카메라 장치는 캡처 서비스 스레드가 독점, 여기서는 흑백 뷰만 구독
+        self.camera = get_camera()
+        self.face_view = self.camera.subscribe(gray=True)
 
         # ========= 거리 센서 =========
         self.distance_sensor = DistanceSensor(echo=21, trigger=4)
@@ -40,6 +46,7 @@ class RobotHardware:
         self.current_speed = 40
         self.current_distance = 0.0
         self.face_detected = False
+        self.last_faces = ()
 
         self.stop()
 
@@ -47,19 +54,18 @@ class RobotHardware:
     # 카메라
     # ==============================
     def start_camera(self):
-        ret, _ = self.cap.read()
-        if ret:
+        if self.camera.wait_frame(0, timeout=2.0):
             print("📷 USB 카메라 준비 완료")
         else:
             print("❌ USB 카메라 인식 실패")
 
     def detect_face(self):
-        ret, frame = self.cap.read()
-        if not ret:
+        gray = self.face_view.next(timeout=0.5)
+        if gray is None:
             return False, 0.0, 0
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.2, 5)
+        faces = self.face_tracker.update(gray)
+        self.last_faces = faces
 
         distance = self.distance_sensor.distance * 100
         self.current_distance = distance
@@ -78,6 +84,31 @@ class RobotHardware:
 
         return self.face_detected, distance, len(faces)
 
+    def face_crop(self, fmt="jpeg", size=FACE_CROP_SIZE, margin=0.2):
+        """가장 큰 얼굴을 잘라서 작게 압축 → {"format", "data", ...} (얼굴 없으면 None)
+
+        fmt="jpeg": 컬러 JPEG (~3-5KB), fmt="gray": 흑백 raw (size² bytes)
+        """
+        if len(self.last_faces) == 0:
+            return None
+        _, frame = self.camera.read()
+        if frame is None:
+            return None
+
+        x, y, w, h = max(self.last_faces, key=lambda r: r[2] * r[3])
+        mx, my = int(w * margin), int(h * margin)
+        crop = frame[max(0, y - my):y + h + my, max(0, x - mx):x + w + mx]
+        crop = cv2.resize(crop, (size, size), interpolation=cv2.INTER_AREA)
+
+        if fmt == "gray":
+            gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+            return {"format": "gray", "shape": [size, size], "data": pack_bytes(gray.tobytes())}
+
+        ok, jpeg = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, FACE_JPEG_QUALITY])
+        if not ok:
+            return None
+        return {"format": "jpeg", "data": pack_bytes(jpeg.tobytes())}
+
     # ==============================
     # 모터 제어
     # ==============================
@@ -125,8 +156,7 @@ class RobotHardware:
     def cleanup(self):
         print("🧹 하드웨어 정리 중...")
         self.stop()
-        if self.cap:
-            self.cap.release()
+        self.camera.stop()
         self.left_pwm.stop()
         self.right_pwm.stop()
         cv2.destroyAllWindows()
@@ -1,11 +1,12 @@
 # stt_whispercpp.py (2025 최신 안정화 버전)
-import tempfile
+import numpy as np
 import pyaudio
-import wave
 import time
-import os
+import threading
+from collections import deque
 
-from faster_whisper import WhisperModel
+from vad import VoiceActivityDetector, SpeechEndpointer, EchoGate
+import lazy_loader
 
 # Whisper 모델 설정
 WHISPER_MODEL_NAME = "base"  # "base.en", "small", "small.en" 등으로 교체 가능
@@ -17,24 +18,157 @@ FORMAT = pyaudio.paInt16
 CHANNELS = 1
 RATE = 16000
 RECORD_SECONDS = 4
+BARGE_IN_MS = 300    # 이만큼 말해야 끼어들기로 봄 (기침/짧은 잡음 무시)
+# 로봇이 말하는 중에는 스피커 소리가 마이크로 들어옴 → 더 길고, 에코 레벨보다 확실히 큰 말소리만
+BARGE_IN_PLAYBACK_MS = 600
+BARGE_IN_ECHO_RATIO = 2.0
 
-# PyAudio 초기화
-p = pyaudio.PyAudio()
-stream = p.open(format=FORMAT, channels=CHANNELS, rate=RATE,
-                input=True, frames_per_buffer=CHUNK)
+def _open_mic():
+    """PyAudio 초기화 (import 시점이 아니라 처음 쓸 때)"""
+    p = pyaudio.PyAudio()
+    stream = p.open(format=FORMAT, channels=CHANNELS, rate=RATE,
+                    input=True, frames_per_buffer=CHUNK)
+    return p, stream
 
-# faster-whisper 모델 로드 (한 번만)
-print("📦 faster-whisper 모델 로딩 중...")
-model = WhisperModel(
-    WHISPER_MODEL_NAME,
-    device=DEVICE,
-    compute_type=COMPUTE_TYPE,
-)
+def _load_whisper():
+    """faster-whisper 모델 로드 (한 번만)"""
+    from faster_whisper import WhisperModel
+
+    print("📦 faster-whisper 모델 로딩 중...")
+    return WhisperModel(
+        WHISPER_MODEL_NAME,
+        device=DEVICE,
+        compute_type=COMPUTE_TYPE,
+    )
+
+mic = lazy_loader.register("mic", _open_mic)
+whisper = lazy_loader.register("whisper", _load_whisper)
+
+class MicReader:
+    """이미 열린 PyAudio stream 을 계속 읽어서 링버퍼에 쌓는 스레드"""
+
+    def __init__(self, stream, ring_seconds=30):
+        self.stream = stream
+        self.frames = deque(maxlen=int(RATE / CHUNK * ring_seconds))
+        self.count = 0           # 지금까지 읽은 전체 프레임 수
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def _run(self):
+        while self.running:
+            try:
+                data = self.stream.read(CHUNK, exception_on_overflow=False)
+            except Exception as e:
+                print(f"❌ 마이크 읽기 오류: {e}")
+                time.sleep(0.1)
+                continue
+            with self.cond:
+                self.frames.append(data)
+                self.count += 1
+                self.cond.notify_all()
+
+    @property
+    def position(self):
+        with self.cond:
+            return self.count
+
+    def read(self, pos, timeout=1.0):
+        """pos 번째 프레임 읽기 → (frame, 다음 pos), 시간 초과시 (None, pos)"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.count > pos, timeout):
+                return None, pos
+            oldest = self.count - len(self.frames)
+            pos = max(pos, oldest)  # 너무 늦게 읽어서 밀려난 프레임은 건너뜀
+            return self.frames[pos - oldest], pos + 1
+
+
+_mic_reader = None
+
+def get_mic_reader():
+    global _mic_reader
+    if _mic_reader is None:
+        _mic_reader = MicReader(mic.get()[1])
+    _mic_reader.start()
+    return _mic_reader
+
+def listen_utterance(max_seconds=10, wait_seconds=10, end_silence_ms=700,
+                     on_speech=None, barge_in_ms=BARGE_IN_MS, playing=None):
+    """말이 시작될 때까지 기다렸다가(최대 wait_seconds) 말이 끝나면 바로 프레임 리턴
+
+    고정 녹음창 대신 VAD 로 끝점을 찾아서 짧은 말은 짧게 끝남
+    on_speech: 말소리가 barge_in_ms 이상 쌓이면 (발화가 끝나기 전에) 한 번 호출 → barge-in
+    playing: 로봇 소리가 나오는 중인지 (callable) - 그동안 들린 소리는 발화로 안 받고
+             EchoGate 를 넘으면 (사람이 끼어듦) on_speech 후 그 말부터 발화로 받음
+    """
+    reader = get_mic_reader()
+    frame_ms = CHUNK * 1000 / RATE
+    vad = VoiceActivityDetector(rate=RATE)
+    gate = EchoGate(vad, frame_ms, onset_ms=BARGE_IN_PLAYBACK_MS, ratio=BARGE_IN_ECHO_RATIO)
+    endpointer = SpeechEndpointer(
+        vad,
+        frame_ms=frame_ms,
+        end_silence_ms=end_silence_ms,
+        max_speech_ms=max_seconds * 1000,
+    )
+    pos = reader.position
+    deadline = time.time() + wait_seconds
+    fired = False
+    while True:
+        frame, pos = reader.read(pos)
+        if frame is not None:
+            frames = None
+            if playing is not None and not fired and playing():
+                # 재생 중: 끼어들기 전까지는 발화로 안 받음 (로봇 자기 목소리를 받아 적지 않게)
+                endpointer.reset()
+                if gate.feed(frame):
+                    fired = True
+                    if on_speech:
+                        on_speech()
+                    for f in gate.recent:    # 끼어든 말 앞부분부터 발화로
+                        frames = endpointer.feed(f)
+            else:
+                frames = endpointer.feed(frame)
+                if not fired and (frames or endpointer.voiced * frame_ms >= barge_in_ms):
+                    fired = True
+                    if on_speech:
+                        on_speech()
+            if frames:
+                print(f"🗣️ 발화 감지: {len(frames) * CHUNK / RATE:.1f}초")
+                return frames
+        if not endpointer.triggered and time.time() > deadline:
+            return None
+
+def frames_to_float32(frames):
+    """int16 PCM 프레임 리스트 → faster-whisper 용 float32 배열 [-1, 1]
+
+    b"".join 없이 프레임마다 np.frombuffer(복사 없는 view) 로 읽어서
+    미리 잡아둔 float32 배열에 바로 변환해 넣음 (int16→float32 변환 1회만)
+    """
+    total = sum(len(f) for f in frames) // 2
+    audio = np.empty(total, dtype=np.float32)
+    pos = 0
+    for f in frames:
+        pcm = np.frombuffer(f, dtype=np.int16)
+        np.multiply(pcm, 1.0 / 32768.0, out=audio[pos:pos + pcm.size], casting="unsafe")
+        pos += pcm.size
+    return audio
 
 def record_audio(seconds=RECORD_SECONDS):
     print(f"[녹음 시작] {seconds}초 동안 말하세요...")
     frames = []
     
+    p, stream = mic.get()
     print("📡 PyAudio 입력 장치 확인 중...")
     print(f"기본 입력 장치: {p.get_default_input_device_info()}")
     
@@ -48,38 +182,24 @@ def record_audio(seconds=RECORD_SECONDS):
         print(f"❌ 녹음 중 오류: {e}")
         return None
     
-    print(f"📊 총 {len(frames)} 프레임 수집됨 ({len(b''.join(frames))} bytes)")
+    print(f"📊 총 {len(frames)} 프레임 수집됨 ({sum(len(f) for f in frames)} bytes)")
     
     if not frames:
         print("⚠️ 녹음 데이터 없음!")
         return None
     
-    try:
-        tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        print(f"💾 임시파일 생성: {tmp.name}")
-        
-        with wave.open(tmp.name, 'wb') as wf:
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(p.get_sample_size(FORMAT))
-            wf.setframerate(RATE)
-            wf.writeframes(b"".join(frames))
-        
-        print(f"✅ WAV 파일 생성 완료: {tmp.name} ({os.path.getsize(tmp.name)} bytes)")
-        return tmp.name
-        
-    except Exception as e:
-        print(f"❌ WAV 저장 실패: {e}")
-        if 'tmp' in locals():
-            os.unlink(tmp.name)
-        return None
+    audio = frames_to_float32(frames)
+    print(f"✅ 메모리 오디오 준비 완료: {audio.size} samples (디스크 안 거침)")
+    return audio
 
-def run_whisper_faster(wav_path):
+def run_whisper_faster(audio):
     """
-    faster-whisper로 WAV 파일을 바로 읽어 텍스트 추출
+    faster-whisper로 메모리 오디오(16kHz float32 numpy)를 바로 인식해서 텍스트 추출
+    (WAV 파일 경로도 그대로 받음)
     """
     # language="en" / "ko" 로 고정하고 싶으면 지정, 자동감지는 language=None
-    segments, info = model.transcribe(
-        wav_path,
+    segments, info = whisper.get().transcribe(
+        audio,
         beam_size=5,
         vad_filter=True,       # 침묵 부분 자동 제거
         language=None,         # "en" 또는 "ko"로 고정 가능
@@ -100,31 +220,60 @@ def run_whisper_faster(wav_path):
 def stt_from_mic(seconds=RECORD_SECONDS):
     """전체 파이프라인: 녹음 → faster-whisper → 텍스트 리턴"""
     try:
-        wav = record_audio(seconds)
-        if not wav:
+        audio = record_audio(seconds)
+        if audio is None:
             return "❌ 녹음 실패"
 
         print("🔄 faster-whisper 인식 중…")
-        text = run_whisper_faster(wav)
+        return run_whisper_faster(audio)
+
+    except Exception as e:
+        return f"❌ 오류 발생: {e}"
+
+def stt_from_mic_stream(max_seconds=10, wait_seconds=10):
+    """스트리밍 파이프라인: 마이크 링버퍼 → VAD 끝점 → faster-whisper → 텍스트
 
-        os.unlink(wav)
-        return text
+    말이 끝나는 순간 바로 인식 시작 (두 단어면 10초가 아니라 ~1초)
+    """
+    try:
+        frames = listen_utterance(max_seconds, wait_seconds)
+        if not frames:
+            return ""
+
+        print("🔄 faster-whisper 인식 중…")
+        return run_whisper_faster(frames_to_float32(frames))
 
     except Exception as e:
         return f"❌ 오류 발생: {e}"
 
+def stt_listen(max_seconds=10, wait_seconds=2, on_speech=None, playing=None):
+    """파이프라인 listen 단계용: 발화 1개 → (텍스트, 말 끝 시각), 조용하면 None
+
+    wait_seconds 를 짧게 두고 반복 호출 (그 사이에 종료 신호 확인 가능)
+    on_speech: 말이 시작되면 바로 호출 (로봇이 말하는 중이면 끊기)
+    playing: 로봇 소리가 나오는 중인지 (그동안은 끼어든 말만 받고 나머지는 버림)
+    """
+    frames = listen_utterance(max_seconds, wait_seconds, on_speech=on_speech, playing=playing)
+    if not frames:
+        return None
+    t_end = time.time()
+    return run_whisper_faster(frames_to_float32(frames)), t_end
+
 if __name__ == "__main__":
     try:
         print("🎤 faster-whisper STT (라즈베리파이 최적화) 시작!")
 
         while True:
-            text = stt_from_mic(4)
+            text = stt_from_mic_stream(max_seconds=10)
             print(f"[결과]: {text}")
-            time.sleep(1)
 
     except Exception as e:
         print(f"프로그램 초기화 실패: {e}")
     finally:
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
\ No newline at end of file
+        if _mic_reader:
+            _mic_reader.stop()
+        if mic.ready:
+            p, stream = mic.get()
+            stream.stop_stream()
+            stream.close()
+            p.terminate()
\ No newline at end of file
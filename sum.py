@@ -2,8 +2,15 @@ import cv2
 from gpiozero import DistanceSensor
 import RPi.GPIO as GPIO
 from face_emotion import get_current_emotion  # 기존 emotion 모듈 사용
-from stt_whispercpp import stt_from_mic
-from tts_piper import tts_play
+from stt_whispercpp import stt_listen
+from camera_service import get_camera
+from face_tracker import FaceTracker
+from follow_controller import FollowController
+from emotion_service import largest_face
+from tts_piper import synthesize_pcm
+from audio_output import get_player
+from pipeline import SharedState, robot_pipeline
+from llm_stream import stream_pipeline, sentence_chunks
 import random, re, time
 import threading
 
@@ -20,12 +27,10 @@ except:
 class RobotHardware:
     def __init__(self):
         # Face detection - USB 카메라로 변경
-        self.cascade_path = "/home/sptcnl/haarcascade_frontalface_default.xml"
-        self.face_cascade = cv2.CascadeClassifier(self.cascade_path)
-        self.cap = cv2.VideoCapture(0)  # USB 카메라 (0번 포트)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        self.face_tracker = FaceTracker()  # ROI 추적 + 가끔 전체 감지
+        self.camera = get_camera()  # 공유 카메라 서비스 (USB 0번 포트 독점)
+        self.face_view = self.camera.subscribe(gray=True)
+        self.frames = self.camera.subscribe()
         
         # Distance sensor
         self.distance_sensor = DistanceSensor(echo=21, trigger=4)
@@ -50,37 +55,37 @@ class RobotHardware:
         self.current_speed = 50
         self.current_distance = 0
         self.face_detected = False
+        self.last_faces = ()
         self.running = False
         
+        # 주행 제어: 얼굴 위치/거리 → 좌우 바퀴 속도 (PID, 비전과 별도 스레드 20Hz)
+        self.follower = FollowController(self.drive)
+        
     def start_camera(self):
         """USB 카메라 시작 확인"""
-        ret, test_frame = self.cap.read()
-        if ret:
+        if self.camera.wait_frame(0, timeout=2.0):
             print("📷 USB 카메라 연결 성공!")
         else:
             print("❌ USB 카메라 연결 실패! 꽂혀있는지 확인하세요")
     
-    def detect_face(self):
-        """얼굴 감지 및 거리 측정 - USB 카메라"""
-        ret, frame = self.cap.read()
-        if not ret:
+    def detect_face(self, gray=None):
+        """얼굴 감지 및 거리 측정 - USB 카메라 (gray 를 안 주면 새 프레임 대기)"""
+        if gray is None:
+            gray = self.face_view.next(timeout=0.5)
+        if gray is None:
             return False, 0, 0
         
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.2, 5)
+        faces = self.face_tracker.update(gray)
+        self.last_faces = faces
         distance = self.distance_sensor.distance * 100
         
-        # 얼굴이 감지되면 전진
+        # 얼굴이 감지되면 제어기 목표 갱신 (실제 바퀴 속도는 제어 스레드가)
         if len(faces) > 0:
-            if not self.is_moving:
-                self.forward()
-                self.set_speed(min(self.current_speed, 40))  # 안전 속도
-                self.is_moving = True
+            box = faces[largest_face(faces)]
+            self.follower.update_from_box(box, gray.shape[1], distance)
             return True, distance, len(faces)
         else:
-            if self.is_moving:
-                self.stop()
-                self.is_moving = False
+            self.follower.lose_target()
             return False, distance, 0
     
     # 모터 제어 함수들 (변경 없음)
@@ -111,10 +116,20 @@ class RobotHardware:
         self.left_pwm.ChangeDutyCycle(speed)
         self.right_pwm.ChangeDutyCycle(speed)
     
+    def drive(self, left, right):
+        """좌우 바퀴 속도 -100~100 (음수는 후진) - 주행 제어기가 호출"""
+        GPIO.output(self.left_in3, GPIO.HIGH if left > 0 else GPIO.LOW)
+        GPIO.output(self.left_in4, GPIO.HIGH if left < 0 else GPIO.LOW)
+        GPIO.output(self.right_in3, GPIO.HIGH if right > 0 else GPIO.LOW)
+        GPIO.output(self.right_in4, GPIO.HIGH if right < 0 else GPIO.LOW)
+        self.left_pwm.ChangeDutyCycle(min(100, abs(left)))
+        self.right_pwm.ChangeDutyCycle(min(100, abs(right)))
+        self.is_moving = left != 0 or right != 0
+    
     def cleanup(self):
+        self.follower.stop()
         self.stop()
-        if self.cap:
-            self.cap.release()
+        self.camera.stop()
         self.left_pwm.stop()
         self.right_pwm.stop()
         cv2.destroyAllWindows()
@@ -144,58 +159,79 @@ def local_chat(user_text: str, emotion: str, face_detected: bool, distance: floa
         responses = {"happy": "멋져요! 🐾", "sad": "괜찮아요.. 🥺", "neutral": "네? 🐶"}
         return responses.get(emotion, f"{user_text} 들었어요!")
 
-def hardware_monitoring_loop(robot):
-    """백그라운드에서 하드웨어 모니터링"""
-    count = 0
-    while robot.running:
-        face_detected, distance, face_count = robot.detect_face()
-        robot.current_distance = distance
-        robot.face_detected = face_detected
-        
-        count += 1
-        print(f"[📏 {count:4d}] 거리:{distance:5.1f}cm 얼굴:{face_count}", end='\r')
-        time.sleep(0.1)
+def local_chat_stream(user_text: str, emotion: str, face_detected: bool, distance: float, cancel=None):
+    """local_chat 스트리밍 버전 - 완성된 문장/절 단위로 yield (cancel 켜지면 생성 중단)"""
+    if LLM_AVAILABLE and user_text:
+        context = f"emotion:{emotion}, face:{'near' if face_detected and distance<100 else 'far'}, distance:{distance:.1f}cm"
+        prompt = f"[{context}] User: {user_text}\nRobot (friendly companion robot):"
+        spoken = False
+        try:
+            for chunk in sentence_chunks(
+                stream_pipeline(chat_pipeline, prompt, cancel=cancel, max_new_tokens=40, do_sample=True),
+                max_chars=100,
+            ):
+                spoken = True
+                yield chunk
+            return
+        except Exception:
+            if spoken:
+                return
+    
+    yield local_chat(user_text, emotion, face_detected, distance)
 
 def main_loop():
     robot = RobotHardware()
     robot.running = True
     robot.start_camera()
+    robot.follower.start()
     
-    # 하드웨어 모니터링 스레드 시작
-    monitor_thread = threading.Thread(target=hardware_monitoring_loop, args=(robot,), daemon=True)
-    monitor_thread.start()
+    # 단계별 워커 파이프라인 (감지/추종은 카메라 속도로, 대화는 말하는 동안에도 다음 말을 들음)
+    state = SharedState(faces=(), face_detected=False, distance=0.0, emotion="neutral")
+    
+    def detect(frame):
+        face_detected, distance, face_count = robot.detect_face(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        robot.current_distance = distance
+        robot.face_detected = face_detected
+        state.update(distance=distance)
+        print(f"[📏] 거리:{distance:5.1f}cm 얼굴:{face_count}", end='\r')
+        return robot.last_faces
+    
+    def emotion(frame, faces):
+        return get_current_emotion(frame, faces)
+    
+    pipeline = robot_pipeline(
+        state,
+        frames=robot.frames,
+        detect=detect,
+        emotion=emotion,
+        listen=lambda on_speech, playing: stt_listen(max_seconds=10, on_speech=on_speech,
+                                                     playing=playing),
+        chat=lambda text, ctx, cancel: local_chat_stream(text, ctx["emotion"], ctx["face_detected"], ctx["distance"], cancel),
+        synthesize=synthesize_pcm,
+        player=get_player(),
+    )
+    pipeline.start()
     
     print("🚀 반려로봇 시작! (자동 추종 + 음성대화)")
+    print("🎤 말해줘... (말이 끝나면 바로 인식)")
     print("Ctrl+C로 종료")
     
     try:
         while True:
-            print("\n=== 새 대화 ===")
-            
-            # 1) 하드웨어 상태 확인
-            print(f"[📸 얼굴]: {'O' if robot.face_detected else 'X'}, [📏 거리]: {robot.current_distance:.1f}cm")
-            
-            # 2) 표정 감지 (기존 모듈 사용)
-            emotion = get_current_emotion()
-            print(f"[😊 감정]: {emotion}")
-            
-            # 3) 음성 입력
-            print("🎤 말해줘... (10초)")
-            text = stt_from_mic(seconds=10)
-            print(f"[💭 STT]: '{text}'")
-            
-            # 4) LLM 응답 생성 (하드웨어 상태 포함)
-            reply = local_chat(text, emotion, robot.face_detected, robot.current_distance)
-            print(f"[🤖 로봇]: {reply}")
-            
-            # 5) TTS 출력
-            tts_play(reply)
-            print("-" * 50)
+            time.sleep(15)
+            snap = state.snapshot()
+            print(f"\n[📸 얼굴]: {'O' if snap['face_detected'] else 'X'}, [📏 거리]: {snap['distance']:.1f}cm, "
+                  f"[😊 감정]: {snap['emotion']}")
+            pipeline.report()
+            robot.face_tracker.report()
+            robot.follower.report()
             
     except KeyboardInterrupt:
         print("\n👋 로봇 종료 중...")
     finally:
         robot.running = False
+        pipeline.stop()
+        get_player().interrupt()
         robot.cleanup()
         print("✅ 모든 하드웨어 정리 완료!")
 
@@ -3,13 +3,11 @@ from gpiozero import DistanceSensor
 import RPi.GPIO as GPIO
 from time import sleep
 import numpy as np
-import sounddevice as sd
-import soundfile as sf
-import wave
-from piper import PiperVoice
-import subprocess
-import os
 import time
+from phrase_bank import get_bank
+from tts_piper import play_pcm
+from face_tracker import FaceTracker
+from follow_controller import FollowController
 
 # GPIO 핀 설정 (모터 드라이버) - 초음파 핀 충돌 해결
 left_in3 = 24
@@ -40,27 +38,29 @@ right_pwm.start(0)
 # 초음파 센서
 distanceSensor = DistanceSensor(echo=ECHO_PIN, trigger=TRIG_PIN)
 
-# Piper TTS 초기화 (한 번만 로드)
-print("🤖 음성 모델 로딩 중...")
-voice = PiperVoice.load("en_US-lessac-medium.onnx")
+# Piper TTS - 고정 대사는 시작할 때 한 번만 합성 (다음 실행부터는 디스크 캐시에서 바로)
+print("🤖 대사 음성 준비 중...")
+phrases = get_bank("lessac")
+phrases.render([
+    "안녕하세요! 얼굴을 찾아서 따라갈게요!",
+    "더 가까이 오세요!",
+    "따라갈게요!",
+    "너무 가까워요! 멈췄어요!",
+])
 print("✅ TTS 준비 완료!")
 
 def tts_speak(text: str):
-    """TTS 음성 출력"""
+    """TTS 음성 출력 (뱅크에 있는 대사는 합성 없이 바로 재생)"""
     try:
-        wav_path = "/tmp/robot_speak.wav"
-        with wave.open(wav_path, "wb") as wav_file:
-            voice.synthesize_wav(text, wav_file)
-        subprocess.run(["aplay", wav_path], check=True)
-        os.remove(wav_path)  # 임시 파일 삭제
+        pcm, sample_rate = phrases.get(text)
+        play_pcm(pcm, sample_rate)
         return True
     except Exception as e:
         print(f"TTS 오류: {e}")
         return False
 
 # 카메라 및 얼굴 감지 초기화
-cascade_path = "/home/sptcnl/haarcascade_frontalface_default.xml"
-face_cascade = cv2.CascadeClassifier(cascade_path)  # Haar Cascade 로드[web:12][web:17]
+face_tracker = FaceTracker()  # FACE_DETECTOR 백엔드 + ROI 추적 (전체 감지는 가끔만)
 
 # USB 카메라 초기화
 cam_index = 0  # 필요시 1, 2로 변경
@@ -108,9 +108,22 @@ def right_turn(speed=60):
     left_pwm.ChangeDutyCycle(speed)
     right_pwm.ChangeDutyCycle(speed)
 
+def set_wheels(left, right):
+    """좌우 바퀴 속도 -100~100 (음수는 후진) - 주행 제어기가 호출"""
+    GPIO.output(left_in3, GPIO.HIGH if left > 0 else GPIO.LOW)
+    GPIO.output(left_in4, GPIO.HIGH if left < 0 else GPIO.LOW)
+    GPIO.output(right_in3, GPIO.HIGH if right > 0 else GPIO.LOW)
+    GPIO.output(right_in4, GPIO.HIGH if right < 0 else GPIO.LOW)
+    left_pwm.ChangeDutyCycle(min(100, abs(left)))
+    right_pwm.ChangeDutyCycle(min(100, abs(right)))
+
+# 주행 제어: 비전은 목표만 갱신, 바퀴 속도는 제어 스레드가 20Hz 로 PID + 가감속 제한
+follower = FollowController(set_wheels)
+
 try:
     print("🚀 얼굴 추적 + TTS 반려로봇 시작 (ESC로 종료)")
     tts_speak("안녕하세요! 얼굴을 찾아서 따라갈게요!")
+    follower.start()
     
     while True:
         current_time = time.time()
@@ -128,8 +141,8 @@ try:
         # USB 카메라는 기본이 BGR 포맷
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
-        # 얼굴 감지
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=5)
+        # 얼굴 감지 (마지막 얼굴 주변만 찾고, 놓치거나 N 프레임마다 전체 감지)
+        faces = face_tracker.update(gray)
         
         if len(faces) > 0:
             # 가장 큰 얼굴 선택
@@ -152,32 +165,23 @@ try:
                     tts_speak("따라갈게요!")
                     last_speak_time = current_time
             
-            # 거리 50cm 이상이고 얼굴이 감지되면 추적
-            if distance_cm > 50:
-                if abs(error_x) < 50:  # 중앙
-                    forward(40)
-                    status = "전진"
-                elif error_x < -50:  # 왼쪽 (우회전)
-                    right_turn(50)
-                    status = "우회전"
-                else:  # 오른쪽 (좌회전)
-                    left_turn(50)
-                    status = "좌회전"
-            else:
-                stop()
-                status = "가까움(정지)"
+            # 얼굴 위치/거리 → 제어기 목표 (50cm 이내면 전진 없이 방향만 맞춤)
+            follower.update_from_box((x, y, w, h), frame.shape[1], distance_cm)
+            status = follower.status
+            if distance_cm <= follower.stop_distance:
                 if current_time - last_speak_time > SPEAK_COOLDOWN:
                     tts_speak("너무 가까워요! 멈췄어요!")
                     last_speak_time = current_time
         else:
-            stop()
+            follower.lose_target()   # 제어기가 천천히 정지
             status = "얼굴없음"
             print(" | 얼굴 없음        ", end='\r')
         
         # 상태 표시
         cv2.putText(frame, f"Dist: {distance_cm:.0f}cm", (10, 30), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        cv2.putText(frame, status, (10, 70), 
+        left_speed, right_speed = follower.speeds
+        cv2.putText(frame, f"{status} L{left_speed:+.0f} R{right_speed:+.0f}", (10, 70), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
         
         cv2.imshow("🤖 Face Tracking + TTS Robot", frame)
@@ -191,7 +195,10 @@ except KeyboardInterrupt:
     print("\n⏹️  수동 중단")
 
 finally:
+    follower.stop()
     stop()
+    face_tracker.report()
+    follower.report()
     if 'cap' in locals():
         cap.release()
     cv2.destroyAllWindows()
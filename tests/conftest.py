@@ -0,0 +1,5 @@
+# 모듈들이 저장소 최상위에 평평하게 있음 → 테스트에서 바로 import 할 수 있게
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
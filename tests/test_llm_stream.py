@@ -0,0 +1,26 @@
+from llm_stream import sentence_chunks
+
+
+def test_splits_sentences():
+    frags = ["Hello", " there. ", "How are", " you? I am", " fine"]
+    assert list(sentence_chunks(frags)) == ["Hello there.", "How are you?", "I am fine"]
+
+
+def test_does_not_split_decimal_number():
+    # 토큰이 "3." / "5" 로 나뉘어 와도 "3.5" 는 한 덩어리
+    frags = ["It costs 3", ".", "5 dollars", ". ", "Thanks!"]
+    assert list(sentence_chunks(frags)) == ["It costs 3.5 dollars.", "Thanks!"]
+
+
+def test_does_not_split_thousands_separator():
+    frags = ["We walked 1,", "000 steps today, ", "what fun"]
+    assert list(sentence_chunks(frags)) == ["We walked 1,000 steps today,", "what fun"]
+
+
+def test_sentence_end_at_end_of_text():
+    assert list(sentence_chunks(["멍멍! 안녕하세요."])) == ["멍멍!", "안녕하세요."]
+    assert list(sentence_chunks(["첫 줄\n둘째 줄"])) == ["첫 줄", "둘째 줄"]
+
+
+def test_max_chars():
+    assert list(sentence_chunks(["abc. def. ghi."], max_chars=6)) == ["abc.", "de"]
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("piper")
+
+import numpy as np
+
+import phrase_bank
+import voice_registry
+
+
+class FakeChunk:
+    def __init__(self, pcm):
+        self.audio_int16_array = pcm
+
+
+class FakeVoice:
+    """모델 파일 내용(첫 바이트)을 PCM 값으로 돌려주는 가짜 PiperVoice"""
+    loads = []
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.value = f.read()[0]
+        self.config = type("Config", (), {"sample_rate": 22050})()
+
+    @classmethod
+    def load(cls, path):
+        cls.loads.append(path)
+        return cls(path)
+
+    def synthesize(self, text):
+        yield FakeChunk(np.full(4, self.value, dtype=np.int16))
+
+
+@pytest.fixture
+def voice(tmp_path, monkeypatch):
+    model = tmp_path / "test-voice.onnx"
+    model.write_bytes(b"\x01model")
+    (tmp_path / "test-voice.onnx.json").write_text("{}")
+    FakeVoice.loads = []
+    monkeypatch.setattr(voice_registry, "PiperVoice", FakeVoice)
+    monkeypatch.setitem(voice_registry.VOICES, "test", str(model))
+    yield model
+    voice_registry.evict("test")
+
+
+def test_voice_change_reloads_voice(tmp_path, voice):
+    bank = phrase_bank.PhraseBank("test", cache_dir=str(tmp_path / "cache"))
+    pcm, _ = bank.get("멍멍!")
+    assert pcm[0] == 1
+    old_dir = bank.dir
+
+    voice.write_bytes(b"\x02new model")      # 음성 모델 교체 (크기도 바뀜)
+    os.utime(voice, ns=(0, 12345))
+    bank.check_voice(force=True)
+
+    assert bank.dir != old_dir
+    pcm, _ = bank.get("멍멍!")
+    assert pcm[0] == 2                        # 새 모델로 다시 합성 (예전 PiperVoice 재사용 안 함)
+    assert len(FakeVoice.loads) == 2
+    with np.load(os.path.join(bank.dir, phrase_bank.text_hash("멍멍!") + ".npz")) as data:
+        assert data["pcm"][0] == 2
+
+
+def test_unchanged_voice_is_not_reloaded(tmp_path, voice):
+    bank = phrase_bank.PhraseBank("test", cache_dir=str(tmp_path / "cache"))
+    bank.get("멍멍!")
+    bank.check_voice(force=True)
+    bank.get("좋은 하루!")
+    assert len(FakeVoice.loads) == 1
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from pipeline import SharedState, robot_pipeline
+
+
+class Frames:
+    def next(self, timeout):
+        time.sleep(timeout)
+
+
+class Player:
+    def __init__(self, busy=False):
+        self.busy = busy
+        self.played = []
+
+    def play(self, pcm, sample_rate):
+        self.played.append(pcm)
+
+    def interrupt(self):
+        self.busy = False
+
+
+def run_pipeline(listen, player, seconds=1.0):
+    heard = []
+
+    def chat(text, ctx, cancel):
+        heard.append(text)
+        yield f"re: {text}"
+
+    p = robot_pipeline(SharedState(emotion="neutral", face_detected=False), Frames(),
+                       detect=lambda frame: (), emotion=lambda frame, faces: None,
+                       listen=listen, chat=chat, synthesize=lambda text: (text, 16000),
+                       player=player)
+    p.start()
+    time.sleep(seconds)
+    p.stop()
+    return heard
+
+
+def scripted(*results):
+    """listen 호출마다 results 를 하나씩 (함수면 (on_speech, playing) 으로 불러서) 돌려줌"""
+    it = iter(results)
+    lock = threading.Lock()
+
+    def listen(on_speech, playing):
+        time.sleep(0.05)
+        with lock:
+            result = next(it, None)
+        return result(on_speech, playing) if callable(result) else result
+    return listen
+
+
+def test_utterance_heard_during_playback_is_dropped():
+    # 로봇이 말하는 중에 들린 소리 (끼어들기 아님) = 자기 목소리 → 다음 턴이 되면 안 됨
+    player = Player(busy=True)
+    heard = run_pipeline(scripted(("I am a happy robot", time.time())), player)
+    assert heard == []
+
+
+def test_barge_in_during_playback_is_kept():
+    player = Player(busy=True)
+
+    def user(on_speech, playing):
+        assert playing()
+        on_speech()
+        return "wait", time.time()
+
+    heard = run_pipeline(scripted(user), player)
+    assert heard == ["wait"]
+
+
+def test_utterance_when_quiet_is_kept():
+    heard = run_pipeline(scripted(("hello", time.time())), Player())
+    assert heard == ["hello"]
@@ -0,0 +1,45 @@
+from response_cache import ResponseCache, negated, normalize
+
+LOVE = "🥰 저도 주인님 사랑해요! 🐾"
+GREETING = "🐕 안녕하세요 주인님! 오늘도 화이팅! 💕"
+
+
+def test_fuzzy_matches_stt_typo():
+    cache = ResponseCache()
+    assert cache.lookup("안녕하세여").reply == GREETING
+    assert cache.lookup("너무 귀여어").reply == LOVE
+
+
+def test_fuzzy_ignores_negation():
+    cache = ResponseCache()
+    assert cache.lookup("너무 안 귀여워") is None
+    assert cache.lookup("사랑 안해") is None
+    assert cache.lookup("i don't love you") is None
+
+
+def test_fuzzy_ignores_short_or_different_length_keys():
+    cache = ResponseCache()
+    assert cache.lookup("하이킹") is None
+    assert cache.lookup("he") is None
+    assert cache.lookup("hi") is not None          # 정확히 일치하면 짧아도 됨
+
+
+def test_negated():
+    assert negated(normalize("너무 안 귀여워"))
+    assert negated(normalize("I don't like it"))
+    assert negated(normalize("싫어"))
+    assert not negated(normalize("안녕하세요"))
+    assert not negated(normalize("너무 귀여워"))
+
+
+def test_each_hit_counted_once():
+    cache = ResponseCache()
+    cache.put("오늘 날씨 어때", "neutral", "맑아요!")
+    cache.lookup("안녕")                      # 인텐트
+    cache.lookup("안녕하세여")                # fuzzy 인텐트
+    cache.lookup("오늘 날씨 어때", "neutral")  # 캐시
+    cache.lookup("오늘 날씨 어떄", "neutral")  # fuzzy 캐시
+    cache.lookup("배고파", "neutral")          # 미스
+    s = cache.stats()
+    assert (s["intent_hits"], s["fuzzy_hits"], s["hits"], s["misses"]) == (1, 2, 1, 1)
+    assert s["hit_rate"] == 4 / 5
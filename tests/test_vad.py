@@ -0,0 +1,37 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vad import VoiceActivityDetector, EchoGate
+
+RATE = 16000
+CHUNK = 1024
+FRAME_MS = CHUNK * 1000 / RATE
+
+
+def tone(amplitude, freq=220.0, frames=1):
+    t = np.arange(CHUNK * frames) / RATE
+    pcm = (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+    return [pcm[i * CHUNK:(i + 1) * CHUNK].tobytes() for i in range(frames)]
+
+
+def energy_gate():
+    vad = VoiceActivityDetector(rate=RATE)
+    vad.webrtc = None    # 합성한 소리로 시험 → 에너지 VAD 로 고정
+    return EchoGate(vad, FRAME_MS, onset_ms=600, ratio=2.0)
+
+
+def test_playback_only_does_not_barge_in():
+    gate = energy_gate()
+    # 스피커 소리만 3초 (크기가 조금씩 변하는 로봇 목소리)
+    levels = [3000, 4000, 5000, 3500] * 12
+    assert not any(gate.feed(f) for level in levels for f in tone(level))
+
+
+def test_loud_speech_over_playback_barges_in():
+    gate = energy_gate()
+    for f in tone(3000, frames=20):
+        assert not gate.feed(f)
+    fired = [gate.feed(f) for f in tone(12000, freq=150.0, frames=15)]
+    assert any(fired)
+    assert fired.index(True) + 1 >= gate.onset_frames   # 짧은 큰 소리로는 안 끊김
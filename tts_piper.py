@@ -3,24 +3,78 @@
 import sounddevice as sd
 import soundfile as sf
 import os
-import subprocess
 import sys
-import wave
-from piper import PiperVoice
-import subprocess
+import queue
+import threading
+import numpy as np
+from voice_registry import get_voice
+from audio_output import get_player
+import phrase_bank
 
-def tts_play(text: str):
-    try:
-        # 1. 음성 모델 로드
-        voice = PiperVoice.load("en_US-lessac-medium.onnx")
+def synthesize_pcm(text: str, voice_name: str = "lessac"):
+    """텍스트 → (int16 PCM numpy 배열, sample_rate) - 디스크 안 거침 (고정 대사는 뱅크에서 바로)"""
+    cached = phrase_bank.lookup(voice_name, text)
+    if cached is not None:
+        return cached
+    voice = get_voice(voice_name)
+    chunks = [chunk.audio_int16_array for chunk in voice.synthesize(text)]
+    pcm = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16)
+    return pcm, voice.config.sample_rate
+
+def play_pcm(pcm, sample_rate: int, interrupt: bool = True, wait: bool = True):
+    """이미 합성해 둔 PCM 재생 (응답 캐시 등)"""
+    player = get_player()
+    player.play(pcm, sample_rate, interrupt=interrupt)
+    if wait:
+        player.wait()
 
-        with wave.open("test.wav", "wb") as wav_file:
-            voice.synthesize_wav(text, wav_file)
-        subprocess.run(["aplay", "test.wav"])
+def tts_play(text: str, voice_name: str = "lessac", interrupt: bool = True, wait: bool = True):
+    """한 문장 읽기 (interrupt=True 면 말하던 것 끊고 바로 시작)"""
+    try:
+        pcm, sample_rate = synthesize_pcm(text, voice_name)
+        play_pcm(pcm, sample_rate, interrupt, wait)
         return True
     except Exception as e:
         print(f'error: {e}')
 
+def tts_play_stream(chunks, voice_name: str = "lessac", interrupt: bool = True, wait: bool = True):
+    """문장/절 generator 를 받아서 생성되는 대로 바로 읽기
+
+    LLM 이 다음 절을 생성하는 동안 앞 절을 합성/재생 → 첫 절까지의 지연만 체감됨
+    """
+    q = queue.Queue()
+    player = get_player()
+    if interrupt:
+        player.interrupt()
+
+    def speaker():
+        while True:
+            text = q.get()
+            if text is None:
+                break
+            try:
+                pcm, sample_rate = synthesize_pcm(text, voice_name)
+                player.play(pcm, sample_rate)
+            except Exception as e:
+                print(f'error: {e}')
+
+    worker = threading.Thread(target=speaker, daemon=True)
+    worker.start()
+
+    spoken = []
+    try:
+        for chunk in chunks:
+            spoken.append(chunk)
+            q.put(chunk)
+    except Exception as e:
+        print(f'error: {e}')
+    finally:
+        q.put(None)
+        worker.join()
+        if wait:
+            player.wait()
+    return " ".join(spoken)
+
 if __name__ == "__main__":
     print("🤖 반려로봇 TTS 테스트")
     print("-" * 40)
@@ -0,0 +1,140 @@
+# vad.py
+"""
+음성 구간 감지 (VAD) + 발화 끝점(endpoint) 판정
+- webrtcvad 가 설치돼 있으면 사용, 없으면 에너지(RMS) 기반 VAD
+- SpeechEndpointer: 마이크 프레임을 하나씩 넣으면 말 시작/끝을 찾아서 발화 단위로 돌려줌
+- EchoGate: 로봇이 말하는 동안 (스피커 소리가 마이크로 들어옴) 사람이 끼어들었는지만 판정
+"""
+
+from collections import deque
+
+import numpy as np
+
+try:
+    import webrtcvad
+    WEBRTC_AVAILABLE = True
+except ImportError:
+    WEBRTC_AVAILABLE = False
+
+
+def frame_rms(frame: bytes) -> float:
+    samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    if samples.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(samples * samples)))
+
+
+class VoiceActivityDetector:
+    """int16 mono PCM 프레임 → 말소리인지 여부"""
+
+    def __init__(self, rate=16000, aggressiveness=2, min_rms=300.0, noise_ratio=3.0):
+        self.rate = rate
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.noise_rms = min_rms / noise_ratio
+        self.webrtc = webrtcvad.Vad(aggressiveness) if WEBRTC_AVAILABLE else None
+        self.sub_len = rate * 30 // 1000  # webrtcvad 는 10/20/30ms 프레임만 받음
+
+    def is_speech(self, frame: bytes) -> bool:
+        if self.webrtc is not None:
+            return self._webrtc_speech(frame)
+        return self._energy_speech(frame)
+
+    def _webrtc_speech(self, frame):
+        step = self.sub_len * 2
+        votes = total = 0
+        for i in range(0, len(frame) - step + 1, step):
+            total += 1
+            votes += self.webrtc.is_speech(frame[i:i + step], self.rate)
+        return total > 0 and votes * 2 > total
+
+    def _energy_speech(self, frame):
+        rms = frame_rms(frame)
+        if rms == 0.0:
+            return False
+        speech = rms > max(self.min_rms, self.noise_rms * self.noise_ratio)
+        if not speech:
+            # 조용할 때만 주변 소음 레벨 갱신
+            self.noise_rms = 0.95 * self.noise_rms + 0.05 * rms
+        return speech
+
+
+class SpeechEndpointer:
+    """프레임 단위로 넣으면 발화 시작/끝을 판정
+
+    - start_ms 이상 연속 말소리 → 발화 시작 (직전 pre_roll_ms 포함)
+    - end_silence_ms 이상 조용함 → 발화 끝
+    - max_speech_ms 넘으면 강제로 끝
+    - voiced: 이번 발화에서 말소리였던 프레임 수 (barge-in 판정용)
+    """
+
+    def __init__(self, vad: VoiceActivityDetector, frame_ms: float,
+                 pre_roll_ms=300, start_ms=150, end_silence_ms=700, max_speech_ms=10000):
+        self.vad = vad
+        self.start_frames = max(1, int(start_ms / frame_ms))
+        self.end_frames = max(1, int(end_silence_ms / frame_ms))
+        self.max_frames = max(1, int(max_speech_ms / frame_ms))
+        self.pre_roll = deque(maxlen=max(1, int(pre_roll_ms / frame_ms)) + self.start_frames)
+        self.reset()
+
+    def reset(self):
+        self.pre_roll.clear()
+        self.triggered = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self.voiced = 0
+        self.frames = []
+
+    def feed(self, frame: bytes):
+        """프레임 1개 추가 → 발화가 끝났으면 프레임 리스트, 아니면 None"""
+        speech = self.vad.is_speech(frame)
+
+        if not self.triggered:
+            self.pre_roll.append(frame)
+            self.speech_run = self.speech_run + 1 if speech else 0
+            if self.speech_run >= self.start_frames:
+                self.triggered = True
+                self.frames = list(self.pre_roll)
+                self.silence_run = 0
+                self.voiced = self.speech_run
+            return None
+
+        self.frames.append(frame)
+        self.voiced += speech
+        self.silence_run = 0 if speech else self.silence_run + 1
+        if self.silence_run >= self.end_frames or len(self.frames) >= self.max_frames:
+            frames = self.frames
+            self.reset()
+            return frames
+        return None
+
+
+class EchoGate:
+    """재생 중 마이크 프레임 → 사람이 끼어들었는지 (로봇 자기 목소리는 무시)
+
+    스피커 소리도 VAD 에는 말소리로 들림 → 재생 중 마이크 레벨(에코 레벨)을 따라가다가
+    그보다 ratio 배 이상 큰 말소리가 onset_ms 이상 이어질 때만 끼어들기로 봄
+    recent: 끼어들기 직전 프레임들 (발화 앞부분으로 씀)
+    """
+
+    def __init__(self, vad: VoiceActivityDetector, frame_ms: float,
+                 onset_ms=600, ratio=2.0, pre_roll_ms=300):
+        self.vad = vad
+        self.onset_frames = max(1, int(onset_ms / frame_ms))
+        self.ratio = ratio
+        self.recent = deque(maxlen=max(1, int(pre_roll_ms / frame_ms)) + self.onset_frames)
+        self.echo_rms = None
+        self.run = 0
+
+    def feed(self, frame: bytes) -> bool:
+        """프레임 1개 추가 → 끼어들기면 True"""
+        self.recent.append(frame)
+        rms = frame_rms(frame)
+        floor = max(self.echo_rms or 0.0, self.vad.min_rms)
+        if self.echo_rms is not None and rms > floor * self.ratio and self.vad.is_speech(frame):
+            self.run += 1
+        else:
+            self.run = 0
+            # 끼어들기 후보가 아닌 프레임으로만 에코 레벨 갱신 (사람 목소리가 섞이지 않게)
+            self.echo_rms = rms if self.echo_rms is None else 0.9 * self.echo_rms + 0.1 * rms
+        return self.run >= self.onset_frames